@@ -1,9 +1,117 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, render_template, request, jsonify
+import json
 import os
-from utils.core_parser import analyze_codebase
-from utils.visualization import generate_visualization_data
+import threading
+from collections import OrderedDict
+from utils.aggregation import DEFAULT_NODE_BUDGET, expand, level_of_detail
+from utils.compact import CompactStructure
+from utils.core_parser import analyze_codebase, iter_codebase, merge_partial, EXTRACTOR_VERSION
+from utils.discovery import FileDiscovery
+from utils.graph_diff import PayloadHistory
+from utils.graph_store import DEFAULT_PAGE_SIZE, GraphStore
+from utils.layout import LayoutCache, layout_expansion, layout_payload
+from utils.parse_cache import ParseCache
+from utils.snapshot import SNAPSHOT_EXTENSION, is_snapshot, load_snapshot, save_snapshot
+from utils.visualization import NodeDetails, generate_visualization_data, class_node_id, get_node_color, summary_payload
+from utils.watcher import CodebaseWatcher
+
+# Most folders watched at once; the least recently requested watcher is stopped beyond that
+MAX_WATCHERS = 8
 
 app = Flask(__name__)
+parse_cache = ParseCache(version=EXTRACTOR_VERSION)
+layout_cache = LayoutCache()
+payload_history = PayloadHistory()
+watchers = OrderedDict()  # least recently requested first
+watchers_lock = threading.Lock()
+folder_locks = {}  # (kind, folder) -> lock held while that folder is analyzed
+folder_locks_lock = threading.Lock()
+graph_stores = {}
+node_details_cache = {}
+node_details_lock = threading.Lock()
+
+
+def folder_lock(kind, folder_path):
+    """Lock of one folder, so a slow analysis only holds up requests for that folder"""
+    with folder_locks_lock:
+        return folder_locks.setdefault((kind, folder_path), threading.Lock())
+
+
+def watched_structure(folder_path, parsed=None, discovery=None):
+    """Current analysis of folder_path, watched for changes from the first request on
+
+    At most MAX_WATCHERS folders are watched; the least recently
+    requested watcher is stopped to make room for a new one. A new
+    watcher starts from ``parsed``, the iter_codebase() output of an
+    analysis just streamed with ``discovery``, instead of running its own.
+    """
+    with watchers_lock:
+        watcher = watchers.get(folder_path)
+        if watcher is not None:
+            watchers.move_to_end(folder_path)
+            return watcher.structure
+
+    with folder_lock('watcher', folder_path):
+        with watchers_lock:
+            watcher = watchers.get(folder_path)
+        if watcher is None:
+            # The initial analysis runs outside watchers_lock
+            watcher = CodebaseWatcher(folder_path, cache=parse_cache).start(parsed, discovery)
+            with watchers_lock:
+                watchers[folder_path] = watcher
+                evicted = [watchers.popitem(last=False)[1] for _ in range(len(watchers) - MAX_WATCHERS)]
+            for old in evicted:
+                old.stop()
+                with node_details_lock:
+                    node_details_cache.pop(old.root_folder, None)
+    return watcher.structure
+
+
+def with_layout(viz_data, folder_path, mode):
+    """Fixed node coordinates from utils.layout, cached per folder; a false mode leaves layout to the client"""
+    if not mode:
+        return viz_data
+    return layout_payload(viz_data, mode, layout_cache, folder_path)
+
+
+def analysis(folder_path):
+    """Analysis of folder_path: a snapshot file, or the watched folder"""
+    if is_snapshot(folder_path):
+        return load_snapshot(folder_path)
+    return watched_structure(folder_path)
+
+
+def node_details(folder_path):
+    """utils.visualization.NodeDetails of the current analysis of folder_path, rebuilt when the analysis changes"""
+    if is_snapshot(folder_path):
+        stamp, structure = os.path.getmtime(folder_path), None
+    else:
+        structure = watched_structure(folder_path)
+        stamp = structure['_meta'].get('watch', {}).get('version')
+    with node_details_lock:
+        cached = node_details_cache.get(folder_path)
+        if cached is None or cached[0] != stamp:
+            cached = node_details_cache[folder_path] = (stamp, NodeDetails(structure or load_snapshot(folder_path)))
+    return cached[1]
+
+
+def graph_store(folder_path, refresh=False):
+    """utils.graph_store.GraphStore of folder_path (or a snapshot), analyzed on first use in this process"""
+    store = graph_stores.get(folder_path)
+    if store is not None and not refresh:
+        # A refresh in progress fills staging tables; the store answers from the previous analysis meanwhile
+        return store
+    # Only requests for this folder wait while it is analyzed for the first time
+    with folder_lock('graph_store', folder_path):
+        store = graph_stores.get(folder_path)
+        if store is None or refresh:
+            store = store or GraphStore.for_root(folder_path)
+            if is_snapshot(folder_path):
+                store.write(load_snapshot(folder_path))
+            else:
+                store.analyze(folder_path, cache=parse_cache)
+            graph_stores[folder_path] = store
+    return store
 
 
 @app.route('/')
@@ -14,7 +122,7 @@ def index():
 @app.route('/visualization-data')
 def visualization_data():
     test_path = "E:\\PYTHON_PROJECTS\\python_checklist"
-    class_structure = analyze_codebase(test_path)
+    class_structure = watched_structure(test_path)
     viz_data = generate_visualization_data(class_structure)
 
     # Debug output
@@ -39,8 +147,31 @@ def analyze_code():
         if not os.path.exists(folder_path):
             return jsonify({'error': 'Path does not exist'}), 400
 
-        class_structure = analyze_codebase(folder_path)
-        viz_data = generate_visualization_data(class_structure)
+        page_size = request.json.get('page_size')
+        if page_size:
+            # One page of classes from the graph store, instead of the whole graph
+            store = graph_store(folder_path, refresh=bool(request.json.get('refresh')))
+            page = int(request.json.get('page', 0))
+            viz_data = store.visualization_page(page * int(page_size), int(page_size))
+            viz_data['page'] = page
+            viz_data['page_size'] = int(page_size)
+            return jsonify(viz_data)
+
+        max_classes = request.json.get('max_classes')
+        if max_classes and not is_snapshot(folder_path):
+            class_structure = analyze_codebase(folder_path, cache=parse_cache,
+                                               max_classes=max_classes, compact=True)
+        else:
+            class_structure = analysis(folder_path)
+        # Large graphs start folded into packages, directories or files; details come from /node/details
+        viz_data = level_of_detail(generate_visualization_data(class_structure, details=False),
+                                   request.json.get('node_budget', DEFAULT_NODE_BUDGET),
+                                   class_structure['_meta'].get('root_folder'))
+        viz_data = summary_payload(with_layout(viz_data, folder_path, request.json.get('layout', 'force')))
+        # A client that shows an earlier version of this folder's graph only gets what changed
+        viz_data = payload_history.respond(folder_path, viz_data, request.json.get('since'))
+        if viz_data.get('delta'):
+            return jsonify(viz_data)
 
         # Debug output
         print(f"\n🔥 Visualization Data:")
@@ -53,6 +184,207 @@ def analyze_code():
     except Exception as e:
         print(f"Error in analysis: {str(e)}")
         return jsonify({'error': str(e)}), 500
+
+
+@app.route('/analyze/stream', methods=['POST'])
+def analyze_code_stream():
+    """Stream newly found classes as NDJSON lines, then the full visualization data"""
+    folder_path = request.json.get('folder_path', '').strip()
+    if not folder_path:
+        return jsonify({'error': 'Empty folder path'}), 400
+
+    folder_path = os.path.normpath(folder_path)
+
+    if not os.path.exists(folder_path):
+        return jsonify({'error': 'Path does not exist'}), 400
+
+    max_classes = request.json.get('max_classes')
+    node_budget = request.json.get('node_budget', DEFAULT_NODE_BUDGET)
+    layout = request.json.get('layout', 'force')
+
+    if is_snapshot(folder_path):
+        # A saved analysis opens in one message, without scanning anything
+        structure = load_snapshot(folder_path)
+        viz_data = level_of_detail(generate_visualization_data(structure, details=False), node_budget,
+                                   structure['_meta'].get('root_folder'))
+        viz_data = payload_history.respond(folder_path, summary_payload(with_layout(viz_data, folder_path, layout)))
+        viz_data['done'] = True
+        return Response(json.dumps(viz_data) + '\n', mimetype='application/x-ndjson')
+
+    def generate():
+        structure = CompactStructure()
+        structure['_meta']['root_folder'] = folder_path
+        discovery = FileDiscovery(folder_path)
+        parsed = []  # seeds the folder's watcher, so class details don't analyze it again
+        try:
+            for filepath, partial in iter_codebase(folder_path, cache=parse_cache, discovery=discovery):
+                parsed.append((filepath, partial))
+                if filepath is not None:
+                    structure['_meta']['files_processed'] += 1
+                merge_partial(structure, partial)
+                if partial['classes']:
+                    yield json.dumps({
+                        'files_processed': structure['_meta']['files_processed'],
+                        'total_classes': len(structure['classes']),
+                        'nodes': [
+                            {'id': class_node_id(cls, folder_path), 'label': cls['name'],
+                             'color': get_node_color(cls)}
+                            for cls in partial['classes']
+                        ]
+                    }) + '\n'
+                if max_classes and len(structure['classes']) >= max_classes:
+                    structure['_meta']['truncated'] = True
+                    break
+            if not structure['_meta'].get('truncated'):
+                watched_structure(folder_path, parsed, discovery)
+
+            viz_data = level_of_detail(generate_visualization_data(structure, details=False), node_budget,
+                                       folder_path)
+            viz_data = payload_history.respond(folder_path,
+                                               summary_payload(with_layout(viz_data, folder_path, layout)))
+            viz_data['done'] = True
+            viz_data['truncated'] = structure['_meta'].get('truncated', False)
+            yield json.dumps(viz_data) + '\n'
+
+        except Exception as e:
+            print(f"Error in streaming analysis: {str(e)}")
+            yield json.dumps({'done': True, 'error': str(e)}) + '\n'
+
+    return Response(generate(), mimetype='application/x-ndjson')
+
+
+@app.route('/expand', methods=['POST'])
+def expand_group():
+    """Children of one package, directory or file node of a folded graph
+
+    Takes the folder_path, the node_id to expand and the ids of the
+    ``visible`` nodes, which the children's edges are drawn to.
+    """
+    folder_path = request.json.get('folder_path', '').strip()
+    node_id = request.json.get('node_id')
+    if not folder_path or not node_id:
+        return jsonify({'error': 'folder_path and node_id are required'}), 400
+
+    folder_path = os.path.normpath(folder_path)
+    if not os.path.exists(folder_path):
+        return jsonify({'error': 'Path does not exist'}), 400
+
+    try:
+        structure = analysis(folder_path)
+        viz_data = expand(generate_visualization_data(structure, details=False), node_id,
+                          request.json.get('visible', []), structure['_meta'].get('root_folder'))
+        layout = request.json.get('layout', 'force')
+        if layout:
+            viz_data = layout_expansion(viz_data, node_id, layout, layout_cache, folder_path)
+        viz_data = summary_payload(viz_data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"Error expanding {node_id}: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+    return jsonify(viz_data)
+
+
+@app.route('/node/details')
+def node_details_endpoint():
+    """Methods, attributes, bases, docstring, file and tooltip of the class node ``id``
+
+    Bulk graph payloads leave these out; clients fetch them on hover or click.
+    """
+    folder_path = request.args.get('folder_path', '').strip()
+    node_id = request.args.get('id')
+    if not folder_path or not node_id:
+        return jsonify({'error': 'folder_path and id are required'}), 400
+
+    folder_path = os.path.normpath(folder_path)
+    if not os.path.exists(folder_path):
+        return jsonify({'error': 'Path does not exist'}), 400
+
+    try:
+        details = node_details(folder_path).get(node_id)
+    except Exception as e:
+        print(f"Error loading details of {node_id}: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+    if details is None:
+        return jsonify({'error': f"Unknown node: {node_id}"}), 404
+    return jsonify(details)
+
+
+@app.route('/graph/query')
+def query_graph():
+    """Page through the graph store of a folder
+
+    ``query`` is one of classes, relationships, inheritors, dependencies,
+    dependents or edges_in_file; ``name``, ``file``, ``type`` and
+    ``transitive`` are its arguments, ``limit`` and ``offset`` the page.
+    """
+    folder_path = request.args.get('folder_path', '').strip()
+    if not folder_path:
+        return jsonify({'error': 'Empty folder path'}), 400
+
+    folder_path = os.path.normpath(folder_path)
+    if not os.path.exists(folder_path):
+        return jsonify({'error': 'Path does not exist'}), 400
+
+    query = request.args.get('query', 'relationships')
+    name = request.args.get('name')
+    filepath = request.args.get('file')
+    types = request.args.getlist('type') or None
+    page = {'limit': request.args.get('limit', DEFAULT_PAGE_SIZE, type=int),
+            'offset': request.args.get('offset', 0, type=int)}
+    try:
+        store = graph_store(folder_path)
+        if query == 'classes':
+            items = store.classes(name=name, file=filepath, **page)
+            total = store.count_classes(name=name, file=filepath)
+        elif query == 'relationships':
+            items = store.relationships(source=name, types=types, file=filepath, **page)
+            total = store.count_relationships(source=name, types=types, file=filepath)
+        elif query == 'inheritors' and name:
+            items = store.inheritors(name, transitive=request.args.get('transitive') == 'true', **page)
+            total = None
+        elif query in ('dependencies', 'dependents') and name:
+            items = getattr(store, query)(name, **({'types': types} if types else {}), **page)
+            total = None
+        elif query == 'edges_in_file' and filepath:
+            items = store.edges_in_file(filepath, **page)
+            total = store.count_relationships(file=filepath)
+        else:
+            return jsonify({'error': f"Unknown query or missing argument: {query}"}), 400
+    except Exception as e:
+        print(f"Error in graph query: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+    return jsonify(dict(page, query=query, items=items, total=total))
+
+
+@app.route('/snapshot/save', methods=['POST'])
+def save_analysis_snapshot():
+    """Save the current analysis of a folder as a snapshot the analyze endpoints can open"""
+    folder_path = request.json.get('folder_path', '').strip()
+    if not folder_path:
+        return jsonify({'error': 'Empty folder path'}), 400
+
+    folder_path = os.path.normpath(folder_path)
+    if not os.path.isdir(folder_path):
+        return jsonify({'error': 'Path is not a directory'}), 400
+
+    snapshot_path = request.json.get('snapshot_path') or folder_path + SNAPSHOT_EXTENSION
+    try:
+        structure = watched_structure(folder_path)
+        save_snapshot(structure, snapshot_path)
+    except Exception as e:
+        print(f"Error saving snapshot: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+    return jsonify({
+        'snapshot_path': snapshot_path,
+        'bytes': os.path.getsize(snapshot_path),
+        'classes': len(structure['classes']),
+        'relationships': len(structure['relationships'])
+    })
+
+
 @app.route('/test-data')
 def test_data():
     """Return sample data matching your debug output structure"""
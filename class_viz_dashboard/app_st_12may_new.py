@@ -2,12 +2,21 @@ import os
 import pandas as pd
 import streamlit as st
 from streamlit_agraph import agraph, Node, Edge, Config
-from typing import Dict, List, Any, Tuple
+from typing import Dict, List, Any, Optional, Tuple
 import ast
 from abc import ABC, abstractmethod
-from javalang import parse
-from javalang.tree import ClassDeclaration, InterfaceDeclaration
 from utils.core_parser import *
+from utils.aggregation import DEFAULT_NODE_BUDGET, choose_level, collapse, group_level
+from utils.compact import CompactStructure
+from utils.graph_store import DEFAULT_PAGE_SIZE, GraphStore
+from utils.layout import LayoutCache, layout_payload
+from utils.parse_cache import ParseCache
+from utils.profiling import AnalysisProfile
+from utils.relationships import relationship_contexts, relationship_count
+from utils.snapshot import SNAPSHOT_EXTENSION, is_snapshot, load_snapshot, save_snapshot
+from utils.symbols import SymbolTable
+from utils.visualization import edge_width
+from utils.watcher import CodebaseWatcher
 
 # ======================
 # CONSTANTS & STYLING
@@ -68,42 +77,139 @@ NODE_COLORS = {
     "default": {"class": "#8CD17D", "interface": "#FFD700"}
 }
 
+# Layout choices whose node coordinates come from utils.layout, with physics off
+PRECOMPUTED_LAYOUTS = {
+    "Precomputed force-directed": "force",
+    "Precomputed layered": "hierarchical"
+}
+
 
 # ======================
 # CORE FUNCTIONS
 # ======================
 
-def analyze_code(folder_path: str) -> None:
-    """Analyze codebase and store results in session state"""
+@st.cache_resource
+def get_parse_cache() -> ParseCache:
+    """On-disk parse cache shared by every session of this server"""
+    return ParseCache(version=EXTRACTOR_VERSION)
+
+
+@st.cache_resource
+def get_graph_store(folder_path: str) -> GraphStore:
+    """SQLite store of the latest analysis of folder_path, which the relationships table pages through"""
+    return GraphStore.for_root(folder_path)
+
+
+@st.cache_resource
+def get_watcher(folder_path: str) -> CodebaseWatcher:
+    """Live analysis of folder_path, kept current as files change"""
+    return CodebaseWatcher(folder_path, cache=get_parse_cache()).start()
+
+
+def analyze_code(folder_path: str, max_classes: int = 0, live: bool = False, profile: bool = False) -> None:
+    """Analyze codebase and store results in session state; ``profile`` times the analysis"""
     if not folder_path or not os.path.exists(folder_path):
         st.error("Please provide a valid folder path")
         return
 
     with st.spinner(f"Analyzing {folder_path}..."):
         try:
-            structure = analyze_codebase(folder_path)
-            if structure['errors']:
-                st.warning(f"Found {len(structure['errors'])} errors during analysis")
-                for error in structure['errors']:
-                    st.error(error)
-
-            nodes, edges, metrics = process_structure(structure)
-
-            st.session_state.graph_data = {
-                "nodes": nodes,
-                "edges": edges,
-                "metrics": metrics,
-                "raw_data": structure
-            }
-            st.session_state.selected_node = None
-            st.toast("Analysis completed successfully!", icon="✅")
+            if is_snapshot(folder_path):
+                store_structure(load_snapshot(folder_path), folder_path)
+                return
+
+            if live:
+                watcher = get_watcher(folder_path)
+                store_structure(watcher.structure, folder_path, watcher.version)
+                return
+
+            structure = CompactStructure()
+            structure['_meta']['root_folder'] = folder_path
+            cache = get_parse_cache()
+            discovery = FileDiscovery(folder_path)
+            structure['_meta']['discovery'] = discovery.stats
+            analysis_profile = AnalysisProfile(structure['_meta'], cache=cache) if profile else None
+            progress = st.empty()
+            # Show classes as they are found and stop early at max_classes
+            for filepath, partial in iter_codebase(folder_path, cache=cache, discovery=discovery, profile=profile):
+                if filepath is not None:
+                    structure['_meta']['files_processed'] += 1
+                merge_partial(structure, partial)
+                if partial['classes']:
+                    progress.caption(
+                        f"{structure['_meta']['files_processed']} files scanned, "
+                        f"{len(structure['classes'])} classes found "
+                        f"(latest: {', '.join(cls['name'] for cls in partial['classes'])})"
+                    )
+                if max_classes and len(structure['classes']) >= max_classes:
+                    structure['_meta']['truncated'] = True
+                    st.info(f"Stopped after {max_classes} classes")
+                    break
+            progress.empty()
+            if analysis_profile is not None:
+                analysis_profile.finish(discovery.stats['seconds'])
+
+            store_structure(structure, folder_path)
 
         except Exception as e:
             st.error(f"Analysis failed: {str(e)}")
 
 
-def process_structure(structure: Dict[str, Any]) -> Tuple[List[Node], List[Edge], Dict[str, Any]]:
-    """Convert raw analysis data into visualization components"""
+def store_structure(structure: Dict[str, Any], folder_path: str, watch_version: Optional[int] = None) -> None:
+    """Build the graph for an analysis result and keep it in session state"""
+    if structure['errors']:
+        st.warning(f"Found {len(structure['errors'])} errors during analysis")
+        for error in structure['errors']:
+            st.error(error)
+
+    symbols = SymbolTable.from_structure(structure)
+    nodes, edges, metrics = process_structure(structure, symbols)
+    node_budget = st.session_state.get("node_budget", DEFAULT_NODE_BUDGET)
+    graph = class_graph(structure, symbols)
+    lod = None
+    if len(nodes) > node_budget:
+        lod = {"level": choose_level(graph, node_budget, symbols.root_folder),
+               "expanded": set(), "node_budget": node_budget}
+    graph_store = get_graph_store(folder_path)
+    graph_store.write(structure)
+
+    st.session_state.graph_data = {
+        "nodes": nodes,
+        "edges": edges,
+        "metrics": metrics,
+        "raw_data": structure,
+        "symbols": symbols,
+        "graph": graph,
+        "graph_store": graph_store,
+        "lod": lod,
+        "folder": folder_path,
+        "watch_version": watch_version
+    }
+    apply_level_of_detail(st.session_state.graph_data)
+    st.session_state.selected_node = None
+    st.toast("Analysis completed successfully!", icon="✅")
+
+
+def refresh_live_graph() -> None:
+    """Pick up the watcher's latest structure if the files changed since the last render"""
+    graph_data = st.session_state.graph_data
+    if not graph_data or graph_data.get("watch_version") is None:
+        return
+
+    watcher = get_watcher(graph_data["folder"])
+    if watcher.version != graph_data["watch_version"]:
+        store_structure(watcher.structure, graph_data["folder"], watcher.version)
+
+
+def process_structure(structure: Dict[str, Any],
+                      symbols: Optional[SymbolTable] = None) -> Tuple[List[Node], List[Edge], Dict[str, Any]]:
+    """Convert raw analysis data into visualization components
+
+    Nodes are identified by qualified class name and relationships are
+    resolved through the symbol table, so same-named classes stay apart.
+    """
+    if symbols is None:
+        symbols = SymbolTable.from_structure(structure)
     nodes = []
     edges = []
     class_info = {}
@@ -114,15 +220,18 @@ def process_structure(structure: Dict[str, Any]) -> Tuple[List[Node], List[Edge]
     }
 
     # Process classes
-    for cls in structure["classes"]:
-        class_info[cls["name"]] = cls
+    for index, cls in enumerate(structure["classes"]):
+        node_id = symbols.qualnames[index]
         metrics["total_classes"] += 1
+        if node_id in class_info:
+            continue
+        class_info[node_id] = cls
 
         node_type = "interface" if cls["type"] == "interface" else "class"
         language = cls.get("language", "default")
 
         nodes.append(Node(
-            id=cls["name"],
+            id=node_id,
             label=cls["name"],
             size=25 if node_type == "interface" else 20,
             color=NODE_COLORS.get(language, {}).get(node_type, NODE_COLORS["default"][node_type]),
@@ -138,27 +247,98 @@ def process_structure(structure: Dict[str, Any]) -> Tuple[List[Node], List[Edge]
         if rel_type not in RELATIONSHIP_TYPES:
             continue
 
-        if rel["source"] in class_info and rel["target"] in class_info:
-            style = RELATIONSHIP_TYPES[rel_type]
-            edge_data = {
-                "source": rel["source"],
-                "target": rel["target"],
-                "label": style["label"],
-                "color": style["color"],
-                "width": style["width"],
-                "dashes": style["dashes"],
-                "arrows_to": style.get("arrow_to",
-                                    {"enabled": True, "type": style["arrow"]} if style["arrow"] else None),
-                "title": rel.get("context", ""),
-                "smooth": True,
-            }
-
-            edges.append(Edge(**edge_data))
+        source, target = symbols.resolve_relationship(rel)
+        if source is not None and target is not None:
+            edges.append(relationship_edge(symbols.qualnames[source], symbols.qualnames[target], rel_type,
+                                           relationship_count(rel), relationship_contexts(rel)))
             metrics["total_relationships"] += 1
             metrics["by_type"][rel_type] += 1
     return nodes, edges, metrics
 
 
+def relationship_edge(source: str, target: str, rel_type: str, count: int, contexts: List[str]) -> Edge:
+    """Edge styled for its relationship type, wider the more often it was found"""
+    style = RELATIONSHIP_TYPES[rel_type]
+    return Edge(
+        source=source,
+        target=target,
+        label=style["label"],
+        color=style["color"],
+        width=edge_width(count, style["width"]),
+        dashes=style["dashes"],
+        arrows_to=style.get("arrow_to", {"enabled": True, "type": style["arrow"]} if style["arrow"] else None),
+        title="\n".join(contexts) + (f"\n\u00d7{count}" if count > 1 else ""),
+        smooth=True,
+    )
+
+
+def class_graph(structure: Dict[str, Any], symbols: SymbolTable) -> Dict[str, Any]:
+    """Classes and resolved relationships, keyed by qualified name, in the shape utils.aggregation folds"""
+    nodes = [{"id": symbols.qualnames[index], "file": cls["file"], "language": cls.get("language", "unknown")}
+             for index, cls in enumerate(structure["classes"])]
+    links = []
+    for rel in structure.get("relationships", []):
+        rel_type = rel.get("type", "association").lower()
+        source, target = symbols.resolve_relationship(rel)
+        if rel_type in RELATIONSHIP_TYPES and source is not None and target is not None:
+            links.append({"from": symbols.qualnames[source], "to": symbols.qualnames[target],
+                          "label": rel_type, "count": relationship_count(rel)})
+    return {"nodes": nodes, "links": links, "stats": {}}
+
+
+def apply_level_of_detail(graph_data: Dict[str, Any]) -> None:
+    """Set the nodes and edges to draw: every class, or package, directory and file groups over the node budget"""
+    lod = graph_data["lod"]
+    if lod is None:
+        graph_data["view_nodes"], graph_data["view_edges"] = graph_data["nodes"], graph_data["edges"]
+        graph_data["view_links"] = graph_data["graph"]["links"]
+        return
+
+    view = collapse(graph_data["graph"], lod["level"], lod["expanded"], graph_data["symbols"].root_folder)
+    class_nodes = {node.id: node for node in graph_data["nodes"]}
+    graph_data["view_nodes"] = []
+    for node in view["nodes"]:
+        if group_level(node["id"]) == "class":
+            graph_data["view_nodes"].append(class_nodes[node["id"]])
+            continue
+        key = node["id"].partition(":")[2]
+        graph_data["view_nodes"].append(Node(
+            id=node["id"],
+            label=node["label"],
+            size=min(20 + node["classes"] // 10, 60),
+            color=node["color"]["background"],
+            shape="box",
+            title=f"{key}\nLevel: {node['lod']}\nClasses: {node['classes']}\n"
+                  f"Internal relationships: {node['internal_relationships']}\nClick to expand",
+            borderWidth=2,
+            font={"size": 14}
+        ))
+    graph_data["view_edges"] = [relationship_edge(link["from"], link["to"], link["label"], link["count"], [])
+                                for link in view["links"]]
+    graph_data["view_links"] = view["links"]
+
+
+@st.cache_resource
+def get_layout_cache() -> LayoutCache:
+    return LayoutCache()
+
+
+def place_view_nodes(graph_data: Dict[str, Any], mode: str) -> bool:
+    """Give the nodes to draw fixed coordinates from utils.layout; False when NumPy is missing
+
+    Layouts are cached per folder and start from the previous positions,
+    so expanding a group or re-analyzing moves the other nodes little.
+    """
+    placed = layout_payload({"nodes": [{"id": node.id} for node in graph_data["view_nodes"]],
+                             "links": graph_data["view_links"]},
+                            mode, get_layout_cache(), graph_data["folder"])
+    if "layout" not in placed:
+        return False
+    for node, position in zip(graph_data["view_nodes"], placed["nodes"]):
+        node.x, node.y = position["x"], position["y"]
+    return True
+
+
 
 # ======================
 # UI COMPONENTS
@@ -168,6 +348,12 @@ def render_visualization(layout_mode: str, physics_options: Dict[str, Any]) -> N
     if "graph_data" not in st.session_state:
         return
 
+    graph_data = st.session_state.graph_data
+    precomputed = layout_mode in PRECOMPUTED_LAYOUTS and place_view_nodes(graph_data,
+                                                                          PRECOMPUTED_LAYOUTS[layout_mode])
+    if layout_mode in PRECOMPUTED_LAYOUTS and not precomputed:
+        st.info("Precomputed layouts need NumPy; falling back to the force-directed physics")
+
     config = Config(
         width="100%",
         height=700,
@@ -177,7 +363,7 @@ def render_visualization(layout_mode: str, physics_options: Dict[str, Any]) -> N
         collapsible=True,
         node={'labelProperty': 'label'},
         link={'highlightColor': '#F7A7A6'},
-        physics={
+        physics={"enabled": False} if precomputed else {
             "hierarchicalRepulsion": {
                 "nodeDistance": physics_options.get("node_distance", 150),
                 "centralGravity": physics_options.get("central_gravity", 0.1),
@@ -192,13 +378,26 @@ def render_visualization(layout_mode: str, physics_options: Dict[str, Any]) -> N
         }
     )
 
+    lod = graph_data["lod"]
+    if lod is not None:
+        st.caption(f"{len(graph_data['nodes'])} classes are over the node budget of {lod['node_budget']}: "
+                   f"showing {lod['level']} groups, click one to expand it")
+        if lod["expanded"] and st.button("Collapse all"):
+            lod["expanded"].clear()
+            apply_level_of_detail(graph_data)
+
     selected_node = agraph(
-        nodes=st.session_state.graph_data["nodes"],
-        edges=st.session_state.graph_data["edges"],
+        nodes=graph_data["view_nodes"],
+        edges=graph_data["view_edges"],
         config=config
     )
 
-    if selected_node:
+    if selected_node and group_level(selected_node) != "class":
+        if lod is not None and selected_node not in lod["expanded"]:
+            lod["expanded"].add(selected_node)
+            apply_level_of_detail(graph_data)
+            st.rerun()
+    elif selected_node:
         st.session_state.selected_node = selected_node
         st.rerun()
 
@@ -211,10 +410,10 @@ def show_node_details() -> None:
 
     node_name = st.session_state.selected_node
     graph_data = st.session_state.graph_data
-    node_data = next((c for c in graph_data["raw_data"]["classes"] if c["name"] == node_name), None)
-
-    if not node_data:
+    index = graph_data["symbols"].by_qualname.get(node_name)
+    if index is None:
         return
+    node_data = graph_data["raw_data"]["classes"][index]
 
     with st.expander(f"🔍 {node_name} Details", expanded=True):
         col1, col2 = st.columns(2)
@@ -240,8 +439,8 @@ def show_node_details() -> None:
 
 
 
-def show_metrics() -> None:
-    """Display analysis metrics"""
+def show_metrics(profile: bool = False) -> None:
+    """Display analysis metrics, and with ``profile`` the timings of the analysis"""
     if "graph_data" not in st.session_state:
         return
 
@@ -264,6 +463,53 @@ def show_metrics() -> None:
     else:
         st.warning("No relationships detected")
 
+    measurements = raw_data.get("_meta", {}).get("profile")
+    if profile and measurements:
+        show_profile(measurements)
+
+
+def show_snapshot_controls() -> None:
+    """Save the current analysis so it can be reopened without scanning the sources"""
+    graph_data = st.session_state.graph_data
+    if graph_data["raw_data"].get("_meta", {}).get("snapshot"):
+        st.caption(f"Opened from snapshot {graph_data['folder']}")
+        return
+
+    snapshot_path = st.text_input("Snapshot file",
+                                  value=os.path.normpath(graph_data["folder"]) + SNAPSHOT_EXTENSION)
+    if st.button("💾 Save snapshot"):
+        try:
+            save_snapshot(graph_data["raw_data"], snapshot_path)
+            st.success(f"Saved {os.path.getsize(snapshot_path) / 2**20:.1f} MB to {snapshot_path}")
+        except Exception as e:
+            st.error(f"Saving the snapshot failed: {str(e)}")
+
+
+def show_profile(profile: Dict[str, Any]) -> None:
+    """Display the timing and memory measurements of the analysis"""
+    with st.expander("⏱️ Performance"):
+        cols = st.columns(3)
+        cols[0].metric("Wall time", f"{profile.get('wall_seconds', 0.0):.2f}s")
+        cols[1].metric("CPU time", f"{profile.get('cpu_seconds', 0.0):.2f}s")
+        cols[2].metric("Read", f"{profile['bytes_read'] / 2**20:.1f} MB")
+        if 'peak_rss_bytes' in profile:
+            st.caption(f"Peak RSS {profile['peak_rss_bytes'] / 2**20:.0f} MB"
+                       + (f", workers {profile['peak_worker_rss_bytes'] / 2**20:.0f} MB"
+                          if 'peak_worker_rss_bytes' in profile else ""))
+
+        st.markdown("**Phases**")
+        st.dataframe(pd.DataFrame.from_dict(profile['phases'], orient='index'), use_container_width=True)
+
+        st.markdown("**Slowest files**")
+        st.dataframe(pd.DataFrame([
+            {"File": entry['file'], "Seconds": entry['seconds'], "Bytes": entry['bytes']}
+            for entry in profile['slowest_files']
+        ]), use_container_width=True)
+
+        if profile.get('top_allocations'):
+            st.markdown("**Top allocations**")
+            st.dataframe(pd.DataFrame(profile['top_allocations']), use_container_width=True)
+
 
 
 # ======================
@@ -288,11 +534,40 @@ def main():
         folder_path = st.text_input(
             "Project Folder Path",
             value=".",  # Default to current directory
-            help="Path to directory containing Python/Java files"
+            help=f"Path to directory containing Python/Java files, or a saved {SNAPSHOT_EXTENSION} snapshot"
+        )
+
+        max_classes = st.number_input(
+            "Max classes (0 = no limit)",
+            min_value=0,
+            value=0,
+            step=100,
+            help="Stop the analysis once this many classes were found"
+        )
+
+        st.number_input(
+            "Node budget",
+            min_value=10,
+            value=DEFAULT_NODE_BUDGET,
+            step=100,
+            key="node_budget",
+            help="Larger graphs are drawn folded into package, directory or file nodes"
+        )
+
+        live = st.checkbox(
+            "Live watch",
+            help="Keep the graph current as files change instead of re-scanning on every click"
+        )
+
+        profile = st.checkbox(
+            "Profile analysis",
+            help="Time each phase and list the slowest files; adds a little overhead per file"
         )
 
         if st.button("Analyze Code", type="primary"):
-            analyze_code(folder_path)
+            analyze_code(folder_path, int(max_classes), live, profile)
+        else:
+            refresh_live_graph()
 
         st.markdown("---")
         st.markdown("**Relationship Legend**")
@@ -309,7 +584,8 @@ def main():
 
         if st.session_state.graph_data:
             st.markdown("---")
-            show_metrics()
+            show_metrics(profile)
+            show_snapshot_controls()
 
     with center_panel:
         if st.session_state.graph_data:
@@ -317,22 +593,29 @@ def main():
 
             # Filter controls
             rel_type = st.selectbox("Filter by type:", ["All"] + list(RELATIONSHIP_TYPES.keys()))
+            types = None if rel_type == "All" else [rel_type]
+
+            # One page of relationships at a time, queried from the graph store
+            graph_store = st.session_state.graph_data["graph_store"]
+            total = graph_store.count_relationships(types=types)
+            pages = max(1, -(-total // DEFAULT_PAGE_SIZE))
+            page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1, step=1)
+            st.caption(f"{total} relationships")
 
             # Create relationship DataFrame
             relationships = []
-            for rel in st.session_state.graph_data["raw_data"]["relationships"]:
+            for rel in graph_store.relationships(types=types, limit=DEFAULT_PAGE_SIZE,
+                                                 offset=(int(page) - 1) * DEFAULT_PAGE_SIZE):
                 relationships.append({
                     "Source": rel["source"],
                     "Target": rel["target"],
                     "Type": rel["type"],
-                    "Context": rel.get("context", ""),
+                    "Context": "; ".join(relationship_contexts(rel)),
+                    "Count": relationship_count(rel),
                     "File": rel.get("file", "")
                 })
 
-            df = pd.DataFrame(relationships)
-
-            if rel_type != "All":
-                df = df[df["Type"] == rel_type]
+            df = pd.DataFrame(relationships, columns=["Source", "Target", "Type", "Context", "Count", "File"])
 
             st.dataframe(
                 df.style.apply(
@@ -356,7 +639,7 @@ def main():
             with st.expander("⚙️ Display Settings", expanded=True):
                 layout_mode = st.selectbox(
                     "Layout Algorithm",
-                    ["Hierarchical", "Force-directed"],
+                    ["Hierarchical", "Force-directed", *PRECOMPUTED_LAYOUTS],
                     index=0
                 )
                 physics_options = {
@@ -0,0 +1,88 @@
+"""Compare full visualization payloads with the diffs sent after one file changed.
+
+Usage:
+    python benchmarks/bench_graph_diff.py [--sizes 10000 50000] [--output results.json]
+
+For every size, bench_visualization.build_structure() makes the first
+analysis. The second analysis edits one module: it adds a class and
+changes the methods of another. The run prints the JSON size of the full
+second payload and of the PayloadHistory diff that replaces it, and the
+time the diff took. It fails when apply_diff() on the first payload does
+not give the second.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_visualization import ROOT, build_structure  # noqa: E402
+from utils.graph_diff import PayloadHistory, apply_diff  # noqa: E402
+from utils.visualization import generate_visualization_data  # noqa: E402
+
+DEFAULT_SIZES = (10000, 50000)
+
+
+def edit_one_file(structure: Dict[str, Any]) -> Dict[str, Any]:
+    """structure after a change to the first module: one class gains a method, one class is added"""
+    classes = [dict(cls) for cls in structure['classes']]
+    classes[0]['methods'] = classes[0]['methods'] + ['reset']
+    classes.insert(1, dict(classes[0], name='AddedLater', methods=['run']))
+    relationships = [{'source': classes[0]['name'], 'target': 'AddedLater', 'type': 'composition',
+                      'file': classes[0]['file']}] + list(structure['relationships'])
+    return dict(structure, classes=classes, relationships=relationships)
+
+
+def comparable(viz_data: Dict[str, Any]):
+    return (sorted(json.dumps(node, sort_keys=True) for node in viz_data['nodes']),
+            sorted(json.dumps(link, sort_keys=True) for link in viz_data['links']))
+
+
+def bench_size(classes: int) -> Dict[str, Any]:
+    history = PayloadHistory()
+    before = build_structure(classes)
+    first = history.respond(ROOT, generate_visualization_data(before))
+    second = generate_visualization_data(edit_one_file(before))
+
+    started = time.perf_counter()
+    delta = history.respond(ROOT, second, since=first['version'])
+    elapsed = time.perf_counter() - started
+
+    return {
+        'classes': classes,
+        'full_bytes': len(json.dumps(second)),
+        'delta_bytes': len(json.dumps(delta)),
+        'diff_seconds': elapsed,
+        'changes': {part: {kind: len(items) for kind, items in delta[part].items()} for part in ('nodes', 'links')},
+        'applies': comparable(apply_diff(first, delta)) == comparable(second),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES))
+    parser.add_argument('--output', help="also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = []
+    for classes in sorted(args.sizes):
+        result = bench_size(classes)
+        results.append(result)
+        print(f"{result['classes']:8} classes  full {result['full_bytes']:11,} bytes  "
+              f"delta {result['delta_bytes']:7,} bytes  diff {result['diff_seconds']:6.3f}s  {result['changes']}")
+
+    failures = [f"{result['classes']} classes: diff does not reproduce the payload"
+                for result in results if not result['applies']]
+    for failure in failures:
+        print(f"FAILED: {failure}")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'runs': results, 'failures': failures}, f, indent=2)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,135 @@
+"""Benchmark the type-declaration Java visitor against full javalang tree iteration.
+
+Usage:
+    python benchmarks/bench_java_visitor.py folder [--repeat N]
+
+Every .java file under ``folder`` is parsed once up front so only the
+extraction step is timed. The classes and the inheritance/implements edges
+of both implementations are compared; the field and parameter edges that
+only the new visitor produces are counted separately.
+"""
+import argparse
+import os
+import sys
+import time
+from typing import Any, Dict
+
+from javalang import parse
+from javalang.tree import ClassDeclaration, InterfaceDeclaration
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.discovery import FileDiscovery, read_source  # noqa: E402
+from utils.java_visitor import JavaStructureVisitor  # noqa: E402
+
+filepath_trees = {}
+
+
+def legacy_parse_java_file(filepath: str, structure: Dict[str, Any]) -> None:
+    """parse_java_file as it was before JavaStructureVisitor (reference only)"""
+    tree = filepath_trees[filepath]
+
+    for path, node in tree:
+        if isinstance(node, (ClassDeclaration, InterfaceDeclaration)):
+            class_info = {
+                'name': node.name,
+                'language': 'java',
+                'file': filepath,
+                'methods': [m.name for m in node.methods] if hasattr(node, 'methods') else [],
+                'type': 'interface' if isinstance(node, InterfaceDeclaration) else 'class',
+                'docstring': node.documentation or ''
+            }
+
+            structure['classes'].append(class_info)
+
+            if isinstance(node, ClassDeclaration):
+                if node.extends:
+                    structure['relationships'].append({
+                        'source': node.extends.name,
+                        'target': node.name,
+                        'type': 'inheritance',
+                        'file': filepath
+                    })
+
+                if node.implements:
+                    for interface in node.implements:
+                        structure['relationships'].append({
+                            'source': interface.name,
+                            'target': node.name,
+                            'type': 'implements',
+                            'file': filepath
+                        })
+
+
+def load_trees(folder: str) -> None:
+    for filepath in FileDiscovery(folder, extensions=('.java',), max_size=None):
+        try:
+            filepath_trees[filepath] = parse.parse(read_source(filepath))
+        except Exception:
+            continue
+
+
+def run_legacy() -> Dict[str, Dict[str, Any]]:
+    results = {}
+    for filepath in filepath_trees:
+        structure = {'classes': [], 'relationships': []}
+        legacy_parse_java_file(filepath, structure)
+        results[filepath] = structure
+    return results
+
+
+def run_visitor() -> Dict[str, Dict[str, Any]]:
+    results = {}
+    for filepath, tree in filepath_trees.items():
+        structure = {'classes': [], 'relationships': []}
+        JavaStructureVisitor(filepath).visit(tree).emit(structure)
+        results[filepath] = structure
+    return results
+
+
+def comparable(structure: Dict[str, Any]) -> Dict[str, Any]:
+    """The part of the output both implementations produce"""
+    return {
+        'classes': [{k: v for k, v in cls.items() if k != 'attributes'} for cls in structure['classes']],
+        'relationships': [
+            {k: v for k, v in rel.items() if k not in ('source_ref', 'count')}
+            for rel in structure['relationships'] if rel['type'] in ('inheritance', 'implements')
+        ],
+    }
+
+
+def best_of(run, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('folder')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    load_trees(args.folder)
+    print(f"{len(filepath_trees)} files")
+
+    legacy, visitor = run_legacy(), run_visitor()
+    mismatches = [f for f in legacy if comparable(legacy[f]) != comparable(visitor[f])]
+    new_edges = sum(len(s['relationships']) - len(comparable(s)['relationships']) for s in visitor.values())
+    print(f"Compared {len(legacy)} files: {len(mismatches)} mismatches, "
+          f"{new_edges} field/parameter edges only in the visitor")
+    for filepath in mismatches[:10]:
+        print(f"  mismatch: {filepath}")
+
+    legacy_time = best_of(run_legacy, args.repeat)
+    visitor_time = best_of(run_visitor, args.repeat)
+    print(f"tree iteration: {legacy_time:.3f}s")
+    print(f"type visitor  : {visitor_time:.3f}s ({legacy_time / visitor_time:.2f}x)")
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
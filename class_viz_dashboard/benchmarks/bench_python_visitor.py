@@ -0,0 +1,248 @@
+"""Benchmark the single-pass Python visitor against the old multi-walk parser.
+
+Usage:
+    python benchmarks/bench_python_visitor.py [folder] [--repeat N]
+
+Both implementations are run on every .py file under ``folder`` (default:
+the Python standard library). Files are parsed once up front so only the
+extraction step is timed, and the outputs are compared for every file the
+old implementation could handle.
+"""
+import argparse
+import ast
+import os
+import sys
+import sysconfig
+import time
+from typing import Dict, Any
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.python_visitor import PythonStructureVisitor  # noqa: E402
+from utils.relationships import RelationshipCollector  # noqa: E402
+
+
+def _get_imported_names(tree: ast.AST) -> Dict[str, str]:
+    """Extract imported class names and their origins"""
+    imports = {}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                imports[alias.name.split('.')[-1]] = alias.name
+        elif isinstance(node, ast.ImportFrom):
+            for alias in node.names:
+                imports[alias.name] = f"{node.module}.{alias.name}"
+    return imports
+
+
+def legacy_parse_python_file(filepath: str, structure: Dict[str, Any]) -> None:
+    """parse_python_file as it was before the single-pass visitor (reference only)"""
+    tree = filepath_trees[filepath]
+
+    imported_names = _get_imported_names(tree)
+    classes = {node.name: node for node in ast.walk(tree) if isinstance(node, ast.ClassDef)}
+
+    for class_name, class_node in classes.items():
+        class_info = {
+            'name': class_name,
+            'language': 'python',
+            'file': filepath,
+            'methods': [node.name for node in class_node.body if isinstance(node, ast.FunctionDef)],
+            'attributes': [
+                node.target.attr
+                for node in class_node.body
+                if isinstance(node, ast.Assign)
+                   and len(node.targets) == 1
+                   and isinstance(node.targets[0], ast.Attribute)
+                   and isinstance(node.targets[0].value, ast.Name)
+                   and node.targets[0].value.id == 'self'
+            ],
+            'type': 'class',
+            'docstring': ast.get_docstring(class_node) or ''
+        }
+
+        # Check for abstract base class
+        bases = [base.id for base in class_node.bases]
+
+        if any(isinstance(b, ast.Name) and b.id == 'ABC' for b in class_node.bases):
+            class_info['type'] = 'interface'
+
+        structure['classes'].append(class_info)
+
+        # Add inheritance/implementation relationships
+        for base in class_node.bases:
+            if isinstance(base, ast.Name):
+                if base.id in imported_names and imported_names[base.id] == 'abc.ABC':
+                    continue
+
+                base_type = 'inheritance'
+                target_class = classes.get(base.id)  # Use .get() to avoid KeyError
+                if target_class and target_class.type == 'interface':  # check if target_class exists and then check its type
+                    base_type = 'implements'
+
+                structure['relationships'].append({
+                    'source': base.id,
+                    'target': class_name,
+                    'type': base_type,
+                    'file': filepath
+                })
+
+        # Process class body for relationships
+        for node in class_node.body:
+            if isinstance(node, ast.FunctionDef):
+                # Detect dependencies in method parameters
+                for arg in node.args.args:
+                    if arg.annotation and isinstance(arg.annotation, ast.Name):
+                        structure['relationships'].append({
+                            'source': class_name,
+                            'target': arg.annotation.id,
+                            'type': 'dependency',
+                            'context': f'Parameter in {node.name}()',
+                            'file': filepath
+                        })
+
+                # Detect method calls to other classes
+                for call in [n for n in ast.walk(node) if isinstance(n, ast.Call)]:
+                    if isinstance(call.func, ast.Attribute):
+                        var_name = call.func.value.id if isinstance(call.func.value, ast.Name) else None
+                        if var_name and var_name != 'self':
+                            # Check if the variable is in the imported names.
+                            if var_name in imported_names:
+                                target_class_name = imported_names[var_name].split('.')[-1]  # Get the class name
+                                structure['relationships'].append({
+                                    'source': class_name,
+                                    'target': target_class_name,
+                                    'type': 'association',
+                                    'context': f'Method call in {node.name}()',
+                                    'file': filepath
+                                })
+                            elif var_name in classes:
+                                structure['relationships'].append({
+                                    'source': class_name,
+                                    'target': var_name,
+                                    'type': 'association',
+                                    'context': f'Method call in {node.name}()',
+                                    'file': filepath
+                                })
+
+
+
+            elif isinstance(node, ast.Assign):
+                # Detect composition/aggregation
+                for target in node.targets:
+                    if (isinstance(target, ast.Attribute) and
+                            isinstance(target.value, ast.Name) and
+                            target.value.id == 'self'):
+
+                        attr_name = target.attr
+                        if isinstance(node.value, ast.Call) and isinstance(node.value.func, ast.Name):
+                            target_class = node.value.func.id
+                            structure['relationships'].append({
+                                'source': class_name,
+                                'target': target_class,
+                                'type': 'composition',
+                                'context': f'Attribute: {attr_name}',
+                                'file': filepath
+                            })
+                        elif isinstance(node.value, ast.Name):
+                            target_class = node.value.id
+                            structure['relationships'].append({
+                                'source': class_name,
+                                'target': target_class,
+                                'type': 'aggregation',
+                                'context': f'Attribute: {attr_name}',
+                                'file': filepath
+                            })
+    return structure
+
+
+filepath_trees: Dict[str, ast.AST] = {}
+
+
+def load_trees(folder: str) -> None:
+    for root, dirs, files in os.walk(folder):
+        dirs[:] = [d for d in dirs if not d.startswith('.') and d not in ('venv', '__pycache__')]
+        for file in files:
+            if file.endswith('.py'):
+                filepath = os.path.join(root, file)
+                try:
+                    with open(filepath, 'r', encoding='utf-8') as f:
+                        filepath_trees[filepath] = ast.parse(f.read())
+                except (SyntaxError, UnicodeDecodeError, ValueError, OSError):
+                    continue
+
+
+def run_legacy() -> Dict[str, Any]:
+    results = {}
+    for filepath in filepath_trees:
+        structure = {'classes': [], 'relationships': []}
+        try:
+            legacy_parse_python_file(filepath, structure)
+        except Exception:
+            structure = None
+        results[filepath] = structure
+    return results
+
+
+def run_visitor() -> Dict[str, Any]:
+    results = {}
+    for filepath, tree in filepath_trees.items():
+        structure = {'classes': [], 'relationships': []}
+        PythonStructureVisitor(filepath).visit(tree).emit(structure)
+        results[filepath] = structure
+    return results
+
+
+def deduplicated(structure: Dict[str, Any]) -> Dict[str, Any]:
+    """The old parser's output with repeated edges collapsed, as the visitor does"""
+    relationships = []
+    collector = RelationshipCollector(relationships)
+    for rel in structure['relationships']:
+        collector.add(dict(rel))
+    return dict(structure, relationships=relationships)
+
+
+def without_refs(structure: Dict[str, Any]) -> Dict[str, Any]:
+    """Drop the import references the old parser did not record"""
+    return dict(structure, relationships=[
+        {k: v for k, v in rel.items() if k not in ('source_ref', 'target_ref')}
+        for rel in structure['relationships']
+    ])
+
+
+def best_of(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('folder', nargs='?', default=sysconfig.get_paths()['stdlib'])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    load_trees(args.folder)
+    nodes = sum(sum(1 for _ in ast.walk(tree)) for tree in filepath_trees.values())
+    print(f"{len(filepath_trees)} files, {nodes} AST nodes")
+
+    legacy, visitor = run_legacy(), run_visitor()
+    compared = [f for f, structure in legacy.items() if structure is not None]
+    mismatches = [f for f in compared if deduplicated(legacy[f]) != without_refs(visitor[f])]
+    print(f"Compared {len(compared)} files "
+          f"({len(legacy) - len(compared)} raised in the old parser): {len(mismatches)} mismatches")
+    for filepath in mismatches[:10]:
+        print(f"  mismatch: {filepath}")
+
+    legacy_time = best_of(run_legacy, args.repeat)
+    visitor_time = best_of(run_visitor, args.repeat)
+    print(f"multi-walk : {legacy_time:.3f}s")
+    print(f"single-pass: {visitor_time:.3f}s ({legacy_time / visitor_time:.2f}x)")
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
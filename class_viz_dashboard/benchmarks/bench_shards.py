@@ -0,0 +1,83 @@
+"""Analyze a codebase in shards run as separate processes and check the merge.
+
+Usage:
+    python benchmarks/bench_shards.py ROOT [--shards N] [--by hash|directory] [--output results.json]
+
+Each shard is analyzed by its own ``python -m utils.shards analyze``
+process, as separate build agents would, and saved as a snapshot; the
+snapshots are then merged and the merged classes, relationships and
+errors are compared with a single-process analyze_codebase() run. Exits
+non-zero when they differ.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List, Optional
+
+DASHBOARD_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DASHBOARD_DIR)
+
+from utils.core_parser import analyze_codebase  # noqa: E402
+from utils.shards import SHARD_MODES, merge_shards  # noqa: E402
+from utils.snapshot import load_snapshot  # noqa: E402
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('root')
+    parser.add_argument('--shards', type=int, default=4)
+    parser.add_argument('--by', choices=SHARD_MODES, default='hash')
+    parser.add_argument('--output', help="also write the results to this JSON file")
+    args = parser.parse_args(argv)
+    root = os.path.abspath(args.root)
+
+    started = time.perf_counter()
+    single = analyze_codebase(root)
+    single_seconds = time.perf_counter() - started
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = [os.path.join(directory, f"shard{index}.cvz") for index in range(args.shards)]
+        started = time.perf_counter()
+        processes = [subprocess.Popen([sys.executable, '-m', 'utils.shards', 'analyze', root,
+                                       '--shard', f"{index}/{args.shards}", '--by', args.by, '--output', path],
+                                      cwd=DASHBOARD_DIR, stdout=subprocess.DEVNULL)
+                     for index, path in enumerate(paths)]
+        if any(process.wait() for process in processes):
+            print("A shard process failed")
+            return 1
+        shard_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        shards = [load_snapshot(path) for path in paths]
+        merged = merge_shards(shards)
+        merge_seconds = time.perf_counter() - started
+
+    mismatches = [key for key in ('classes', 'relationships', 'errors') if list(merged[key]) != list(single[key])]
+    result = {
+        'root': root,
+        'shards': args.shards,
+        'by': args.by,
+        'files': single['_meta']['files_processed'],
+        'classes': len(single['classes']),
+        'relationships': len(single['relationships']),
+        'shard_files': [shard['_meta']['files_processed'] for shard in shards],
+        'single_seconds': single_seconds,
+        'shard_seconds': shard_seconds,
+        'merge_seconds': merge_seconds,
+        'mismatches': mismatches,
+    }
+    print(f"{result['files']} files in {args.shards} shards of {', '.join(map(str, result['shard_files']))} files")
+    print(f"single process {single_seconds:.2f}s, shard processes {shard_seconds:.2f}s, merge {merge_seconds:.2f}s")
+    print("merged result identical to single run" if not mismatches else f"MISMATCH in {', '.join(mismatches)}")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
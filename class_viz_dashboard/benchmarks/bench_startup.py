@@ -0,0 +1,66 @@
+"""Measure how long the analyzer modules and the apps take to import.
+
+Usage:
+    python benchmarks/bench_startup.py [module ...] [--repeat N] [--output results.json]
+
+Each module (default: STARTUP_MODULES) is imported in a fresh interpreter
+``--repeat`` times and the best wall time is reported, together with
+whether javalang ended up loaded. Modules whose dependencies are missing
+(for example streamlit) are reported as skipped.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Any, Dict, List, Optional
+
+DASHBOARD_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STARTUP_MODULES = ('utils.core_parser', 'app', 'app_st_12may_new', 'app_st_12may', 'app_st')
+
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+print(json.dumps({{'seconds': time.perf_counter() - started, 'javalang': 'javalang' in sys.modules,
+                  'modules': len(sys.modules)}}))
+"""
+
+
+def measure_import(module: str, repeat: int = 5) -> Dict[str, Any]:
+    """Best import time of module over repeat fresh interpreters"""
+    best = None
+    for _ in range(repeat):
+        completed = subprocess.run([sys.executable, '-c', _PROBE.format(module=module)], cwd=DASHBOARD_DIR,
+                                   capture_output=True, text=True)
+        if completed.returncode:
+            lines = completed.stderr.strip().splitlines()
+            return {'module': module, 'skipped': lines[-1] if lines else f"exit {completed.returncode}"}
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        if best is None or result['seconds'] < best['seconds']:
+            best = result
+    return dict(best, module=module)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('modules', nargs='*', default=list(STARTUP_MODULES))
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', help="also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = [measure_import(module, args.repeat) for module in args.modules]
+    for result in results:
+        if 'skipped' in result:
+            print(f"{result['module']:24} skipped ({result['skipped']})")
+        else:
+            print(f"{result['module']:24} {result['seconds'] * 1000:8.1f} ms  {result['modules']:5} modules  "
+                  f"javalang {'loaded' if result['javalang'] else 'not loaded'}")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,211 @@
+"""Time the analyzers on synthetic codebases and save the results as JSON.
+
+Usage:
+    python benchmarks/bench_suite.py [--sizes 1000 10000 100000] [--output results.json]
+        [--baseline old.json] [--tolerance 1.2] [--workers N] [--repeat N] [--keep DIR]
+
+For every size a codebase with that many classes is generated by
+benchmarks/synthetic.py, then these are timed (best of ``--repeat``):
+
+- analyze_codebase() on the Python and Java files
+- generate_visualization_data() on its result
+- the impact analyzers' analyze_file(), analyze_java_file() and
+  analyze_groovy_file() passes, and their snapshot save/load/compare
+
+The impact analyzers live in impact_analysis_02062025 and import graphviz
+at module level; if they cannot be imported their timings are reported as
+skipped. With ``--baseline`` every timing is compared against an earlier
+results file and the exit status is 1 if any got slower than
+``--tolerance`` times the baseline.
+"""
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic import generate_codebase  # noqa: E402
+from utils.core_parser import analyze_codebase  # noqa: E402
+from utils.visualization import generate_visualization_data  # noqa: E402
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+IMPACT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                          'impact_analysis_02062025')
+IMPACT_ANALYZERS = {
+    'python': os.path.join('sample_project', 'python_analyzer_patch.py'),
+    'java': os.path.join('test_samples', 'java_analyzer.py'),
+    'groovy': os.path.join('test_samples', 'groovy_analyzer_patch.py'),
+}
+
+
+def best_of(run: Callable[[], Any], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def load_impact_analyzer(language: str, impact_dir: str = IMPACT_DIR):
+    """Import one impact analyzer script as a module"""
+    path = os.path.join(impact_dir, IMPACT_ANALYZERS[language])
+    spec = importlib.util.spec_from_file_location(f"impact_{language}_analyzer", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def impact_relationships(analyzer, language: str, filepaths: List[str]) -> Dict[str, list]:
+    """Run an impact analyzer over filepaths the way its main() does"""
+    relationships = {k: [] for k in analyzer.RELATIONSHIP_KEYS}
+    if language == 'python':
+        for filepath in filepaths:
+            analyzer.analyze_file(filepath, relationships)
+        return relationships
+
+    class_names = set()
+    analyze = analyzer.analyze_java_file if language == 'java' else analyzer.analyze_groovy_file
+    fields = (analyzer.analyze_java_fields_and_associations if language == 'java'
+              else analyzer.analyze_groovy_fields_and_associations)
+    for filepath in filepaths:
+        analyze(filepath, relationships, class_names)
+    for filepath in filepaths:
+        fields(filepath, relationships, class_names)
+    return relationships
+
+
+def compare_snapshot(analyzer, relationships: Dict[str, list], snapshot_path: str) -> None:
+    """Save a snapshot, load it back and compare it with a slightly changed graph"""
+    changed = {k: [tuple(rel) for i, rel in enumerate(rels) if i % 100] for k, rels in relationships.items()}
+    with contextlib.redirect_stdout(io.StringIO()):
+        analyzer.save_relationships_snapshot(relationships, snapshot_path)
+        analyzer.compare_relationships(analyzer.load_relationships_snapshot(snapshot_path), changed)
+
+
+def bench_size(classes: int, workdir: str, args: argparse.Namespace) -> Dict[str, Any]:
+    files = max(classes // args.classes_per_file, 1)
+    root = os.path.join(workdir, f"synthetic_{classes}")
+    started = time.perf_counter()
+    manifest = generate_codebase(root, files=files, classes_per_file=args.classes_per_file,
+                                 inheritance_depth=args.inheritance_depth,
+                                 relationship_density=args.relationship_density, seed=args.seed)
+    result = {
+        'classes': classes,
+        'files': sum(manifest['files'].values()),
+        'bytes': manifest['bytes'],
+        'generate_seconds': time.perf_counter() - started,
+        'timings': {},
+        'skipped': {},
+    }
+    timings = result['timings']
+    print(f"{classes} classes: {result['files']} files, {manifest['bytes'] / 2**20:.1f} MB")
+
+    structure = analyze_codebase(root, workers=args.workers, profile=True)
+    timings['analyze_codebase'] = best_of(lambda: analyze_codebase(root, workers=args.workers), args.repeat)
+    result['analyzed_classes'] = len(structure['classes'])
+    result['analyzed_relationships'] = len(structure['relationships'])
+    result['profile'] = structure['_meta'].get('profile')
+
+    timings['generate_visualization_data'] = best_of(lambda: generate_visualization_data(structure), args.repeat)
+
+    for language in IMPACT_ANALYZERS:
+        name = f"impact_{language}"
+        try:
+            analyzer = load_impact_analyzer(language, args.impact_dir)
+        except Exception as e:
+            result['skipped'][name] = f"{type(e).__name__}: {e}"
+            continue
+        directory = os.path.join(root, language)
+        filepaths = sorted(os.path.join(dirpath, f) for dirpath, _, names in os.walk(directory) for f in names)
+        timings[name] = best_of(lambda: impact_relationships(analyzer, language, filepaths), args.repeat)
+
+        relationships = impact_relationships(analyzer, language, filepaths)
+        snapshot_path = os.path.join(workdir, f"snapshot_{language}.json")
+        timings[f"snapshot_compare_{language}"] = best_of(
+            lambda: compare_snapshot(analyzer, relationships, snapshot_path), args.repeat)
+
+    for name, seconds in timings.items():
+        print(f"  {name:32} {seconds:8.3f}s")
+    for name, reason in result['skipped'].items():
+        print(f"  {name:32}  skipped ({reason})")
+    return result
+
+
+def compare_results(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Timings that got slower than tolerance times the baseline, as printable lines"""
+    regressions = []
+    previous = {run['classes']: run['timings'] for run in baseline['runs']}
+    print(f"\nCompared with {baseline.get('created', 'the baseline')}:")
+    for run in results['runs']:
+        for name, seconds in run['timings'].items():
+            before = previous.get(run['classes'], {}).get(name)
+            if not before:
+                continue
+            ratio = seconds / before
+            line = f"  {run['classes']:>7} classes {name:32} {before:8.3f}s -> {seconds:8.3f}s ({ratio:.2f}x)"
+            print(line)
+            if ratio > tolerance:
+                regressions.append(line)
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES),
+                        help="class counts to benchmark")
+    parser.add_argument('--classes-per-file', type=int, default=10)
+    parser.add_argument('--inheritance-depth', type=int, default=3)
+    parser.add_argument('--relationship-density', type=float, default=2.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--impact-dir', default=IMPACT_DIR)
+    parser.add_argument('--output', default='bench_results.json')
+    parser.add_argument('--baseline', help="earlier results file to check for regressions")
+    parser.add_argument('--tolerance', type=float, default=1.2)
+    parser.add_argument('--keep', help="generate the codebases here and keep them")
+    args = parser.parse_args(argv)
+
+    results = {
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'options': {k: v for k, v in vars(args).items() if k not in ('output', 'baseline', 'keep')},
+        'runs': [],
+    }
+    workdir = args.keep or tempfile.mkdtemp(prefix='class_viz_bench_')
+    try:
+        for classes in args.sizes:
+            results['runs'].append(bench_size(classes, workdir, args))
+    finally:
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results saved to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = compare_results(results, json.load(f), args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} timings slower than {args.tolerance:g}x the baseline:")
+            print('\n'.join(regressions))
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,120 @@
+"""Show that generate_visualization_data() scales linearly with the graph size.
+
+Usage:
+    python benchmarks/bench_visualization.py [--sizes 10000 25000 50000 100000]
+        [--relationships-per-class X] [--repeat N] [--max-ratio R] [--output results.json]
+
+For every size an analysis structure with that many classes is built in
+memory: packages of PACKAGE_SIZE modules, duplicated class names across
+packages, inheritance, composition and dependency edges, and some
+parents that are not classes of the analysis (external nodes). The best
+time of ``--repeat`` runs is divided by classes + relationships; the run
+fails when that per-item time at the largest size exceeds ``--max-ratio``
+times the one at the smallest, or when the input was modified.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.visualization import generate_visualization_data  # noqa: E402
+
+DEFAULT_SIZES = (10000, 25000, 50000, 100000)
+# Modules per package and classes per module of the generated structures
+PACKAGE_SIZE = 50
+CLASSES_PER_MODULE = 5
+# One class in this many inherits from an external parent
+EXTERNAL_PARENT_EVERY = 100
+ROOT = '/bench'
+
+
+def build_structure(classes: int, relationships_per_class: float = 2.0, seed: int = 0) -> Dict[str, Any]:
+    """Analysis structure with ``classes`` classes, as analyze_codebase() would return it"""
+    rng = random.Random(seed)
+    structure = {'classes': [], 'relationships': [], 'errors': [],
+                 '_meta': {'files_processed': 0, 'languages': {'python'}, 'root_folder': ROOT}}
+    for index in range(classes):
+        module = index // CLASSES_PER_MODULE
+        filepath = f"{ROOT}/pkg_{module // PACKAGE_SIZE}/mod_{module}.py"
+        # Names repeat in every package, so resolution has to use the modules
+        name = f"C{index % (PACKAGE_SIZE * CLASSES_PER_MODULE)}"
+        structure['classes'].append({'name': name, 'language': 'python', 'file': filepath,
+                                     'methods': ['run', 'stop'], 'type': 'class', 'docstring': ''})
+        if index % CLASSES_PER_MODULE:
+            structure['relationships'].append({'source': f"C{index % (PACKAGE_SIZE * CLASSES_PER_MODULE) - 1}",
+                                               'target': name, 'type': 'inheritance', 'file': filepath})
+        if index % EXTERNAL_PARENT_EVERY == 0:
+            structure['relationships'].append({'source': f"Base{index // EXTERNAL_PARENT_EVERY % 50}",
+                                               'target': name, 'type': 'inheritance', 'file': filepath})
+        extra = relationships_per_class - 1
+        while extra > 0 and (extra >= 1 or rng.random() < extra):
+            other = rng.randrange(module * CLASSES_PER_MODULE, module * CLASSES_PER_MODULE + CLASSES_PER_MODULE)
+            structure['relationships'].append({'source': name,
+                                               'target': f"C{other % (PACKAGE_SIZE * CLASSES_PER_MODULE)}",
+                                               'type': rng.choice(('composition', 'dependency')),
+                                               'file': filepath, 'count': rng.randint(1, 3)})
+            extra -= 1
+        structure['_meta']['files_processed'] = module + 1
+    return structure
+
+
+def bench_size(classes: int, args: argparse.Namespace) -> Dict[str, Any]:
+    structure = build_structure(classes, args.relationships_per_class, args.seed)
+    before = (len(structure['classes']), len(structure['relationships']))
+    best = None
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        payload = generate_visualization_data(structure)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    items = before[0] + before[1]
+    return {
+        'classes': before[0],
+        'relationships': before[1],
+        'nodes': len(payload['nodes']),
+        'links': len(payload['links']),
+        'seconds': best,
+        'microseconds_per_item': best / items * 1e6,
+        'input_modified': (len(structure['classes']), len(structure['relationships'])) != before,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES))
+    parser.add_argument('--relationships-per-class', type=float, default=2.0)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--max-ratio', type=float, default=2.0,
+                        help="largest allowed per-item time ratio between the largest and smallest size")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = []
+    for classes in sorted(args.sizes):
+        result = bench_size(classes, args)
+        results.append(result)
+        print(f"{result['classes']:8} classes {result['relationships']:8} relationships  "
+              f"{result['nodes']:8} nodes {result['links']:8} links  {result['seconds']:8.3f}s  "
+              f"{result['microseconds_per_item']:6.2f} us/item")
+
+    ratio = results[-1]['microseconds_per_item'] / results[0]['microseconds_per_item']
+    failures = [f"{result['classes']} classes: input modified" for result in results if result['input_modified']]
+    if ratio > args.max_ratio:
+        failures.append(f"per-item time grew {ratio:.2f}x, more than {args.max_ratio}x")
+    print(f"per-item time ratio largest/smallest: {ratio:.2f}")
+    for failure in failures:
+        print(f"FAILED: {failure}")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'runs': results, 'ratio': ratio, 'failures': failures}, f, indent=2)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
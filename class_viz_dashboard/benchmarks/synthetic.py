@@ -0,0 +1,172 @@
+"""Generate synthetic Python, Java and Groovy codebases for benchmarking.
+
+Usage:
+    python benchmarks/synthetic.py folder [--files N] [--classes-per-file N]
+        [--inheritance-depth N] [--relationship-density X] [--languages python java groovy]
+
+Files are spread round-robin over the languages and grouped into packages
+of PACKAGE_SIZE files. Class names are unique per language, so every
+relationship target exists; classes form inheritance chains up to
+``inheritance_depth`` deep and each class refers to ``relationship_density``
+earlier classes on average, alternating composition (field created with
+``new``/a call), aggregation (field passed in) and dependency (method
+parameter). Output is deterministic for a given seed.
+"""
+import argparse
+import os
+import random
+import sys
+from typing import Any, Dict, List, Sequence, Tuple
+
+LANGUAGES = ('python', 'java', 'groovy')
+EXTENSIONS = {'python': '.py', 'java': '.java', 'groovy': '.groovy'}
+# Files per generated package directory
+PACKAGE_SIZE = 100
+
+
+def generate_codebase(root: str, files: int = 100, classes_per_file: int = 10, inheritance_depth: int = 3,
+                      relationship_density: float = 2.0, methods_per_class: int = 3,
+                      languages: Sequence[str] = LANGUAGES, seed: int = 0) -> Dict[str, Any]:
+    """Write a synthetic codebase under root and return what was generated
+
+    The returned manifest has the options, the class, relationship and
+    file counts per language and the total bytes written.
+    """
+    rng = random.Random(seed)
+    manifest = {
+        'root': root,
+        'options': {
+            'files': files,
+            'classes_per_file': classes_per_file,
+            'inheritance_depth': inheritance_depth,
+            'relationship_density': relationship_density,
+            'methods_per_class': methods_per_class,
+            'languages': list(languages),
+            'seed': seed,
+        },
+        'files': {language: 0 for language in languages},
+        'classes': {language: 0 for language in languages},
+        'relationships': {language: 0 for language in languages},
+        'bytes': 0,
+    }
+    # Per language: (class name, package, module) of every class generated so far
+    declared: Dict[str, List[Tuple[str, str, str]]] = {language: [] for language in languages}
+
+    for index in range(files):
+        language = languages[index % len(languages)]
+        package = f"pkg_{index // PACKAGE_SIZE}"
+        module = f"mod_{index}"
+        classes = declared[language]
+
+        specs = []
+        for _ in range(classes_per_file):
+            number = len(classes)
+            name = f"{language[0].upper()}{number}"
+            parent = None
+            if inheritance_depth and number % (inheritance_depth + 1):
+                parent = classes[-1]
+            references = []
+            if classes:
+                count = int(relationship_density) + (rng.random() < relationship_density % 1)
+                references = [rng.choice(classes) for _ in range(count)]
+            specs.append((name, parent, references))
+            classes.append((name, package, module))
+            manifest['relationships'][language] += (parent is not None) + len(references)
+
+        source = _RENDERERS[language](package, module, specs, methods_per_class)
+        directory = os.path.join(root, language, package)
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, module + EXTENSIONS[language]), 'w', encoding='utf-8') as f:
+            f.write(source)
+        manifest['files'][language] += 1
+        manifest['classes'][language] += len(specs)
+        manifest['bytes'] += len(source)
+    return manifest
+
+
+def _render_python(package: str, module: str, specs, methods_per_class: int) -> str:
+    local = {name for name, _, _ in specs}
+    imports = sorted({(pkg, mod, name) for _, parent, refs in specs
+                      for name, pkg, mod in ([parent] if parent else []) + refs if name not in local})
+    lines = [f"from python.{pkg}.{mod} import {name}" for pkg, mod, name in imports]
+    for name, parent, references in specs:
+        lines += ['', '', f"class {name}({parent[0] if parent else 'object'}):",
+                  f'    """Synthetic class {name}"""', '']
+        params = [f"r{i}: {target}" for i, (target, _, _) in enumerate(references) if i % 3 == 1]
+        lines.append(f"    def __init__(self{''.join(', ' + p for p in params)}):")
+        lines.append(f"        self.value = 0")
+        for i, (target, _, _) in enumerate(references):
+            if i % 3 == 0:
+                lines.append(f"        self.f{i} = {target}()")
+            elif i % 3 == 1:
+                lines.append(f"        self.f{i} = r{i}")
+        for m in range(methods_per_class):
+            dependencies = [f"d{i}: {target}" for i, (target, _, _) in enumerate(references) if i % 3 == 2 and m == 0]
+            lines += ['', f"    def method_{m}(self{''.join(', ' + d for d in dependencies)}):",
+                      f"        return self.value + {m}"]
+    return '\n'.join(lines) + '\n'
+
+
+def _render_java(package: str, module: str, specs, methods_per_class: int, groovy: bool = False) -> str:
+    end = '' if groovy else ';'
+    local = {name for name, _, _ in specs}
+    imports = sorted({(pkg, name) for _, parent, refs in specs
+                      for name, pkg, _ in ([parent] if parent else []) + refs if name not in local and pkg != package})
+    lines = [f"package {package}{end}", '']
+    lines += [f"import {pkg}.{name}{end}" for pkg, name in imports]
+    for name, parent, references in specs:
+        # Package-private, since the file names do not match the class names
+        extends = f" extends {parent[0]}" if parent else ''
+        lines += ['', f"/** Synthetic class {name} */", f"class {name}{extends} {{",
+                  f"    private int value{end}"]
+        params = []
+        for i, (target, _, _) in enumerate(references):
+            if i % 3 == 0:
+                lines.append(f"    private {target} f{i} = new {target}(){end}")
+            elif i % 3 == 1:
+                lines.append(f"    private {target} f{i}{end}")
+                params.append((i, target))
+        lines += ['', f"    public {name}({', '.join(f'{target} r{i}' for i, target in params)}) {{"]
+        lines += [f"        this.f{i} = r{i}{end}" for i, _ in params]
+        lines.append('    }')
+        for m in range(methods_per_class):
+            dependencies = [f"{target} d{i}" for i, (target, _, _) in enumerate(references) if i % 3 == 2 and m == 0]
+            lines += ['', f"    public int method{m}({', '.join(dependencies)}) {{",
+                      f"        return value + {m}{end}", '    }']
+        lines.append('}')
+    return '\n'.join(lines) + '\n'
+
+
+def _render_groovy(package: str, module: str, specs, methods_per_class: int) -> str:
+    return _render_java(package, module, specs, methods_per_class, groovy=True)
+
+
+_RENDERERS = {'python': _render_python, 'java': _render_java, 'groovy': _render_groovy}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('folder')
+    parser.add_argument('--files', type=int, default=100)
+    parser.add_argument('--classes-per-file', type=int, default=10)
+    parser.add_argument('--inheritance-depth', type=int, default=3)
+    parser.add_argument('--relationship-density', type=float, default=2.0)
+    parser.add_argument('--methods-per-class', type=int, default=3)
+    parser.add_argument('--languages', nargs='+', choices=LANGUAGES, default=list(LANGUAGES))
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    manifest = generate_codebase(args.folder, files=args.files, classes_per_file=args.classes_per_file,
+                                 inheritance_depth=args.inheritance_depth,
+                                 relationship_density=args.relationship_density,
+                                 methods_per_class=args.methods_per_class, languages=args.languages,
+                                 seed=args.seed)
+    for language in args.languages:
+        print(f"{language:7} {manifest['files'][language]:7} files {manifest['classes'][language]:8} classes "
+              f"{manifest['relationships'][language]:8} relationships")
+    print(f"{manifest['bytes'] / 2**20:.1f} MB written to {args.folder}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
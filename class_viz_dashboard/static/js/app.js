@@ -3,7 +3,21 @@ function initializeApp() {
     console.log('Initializing application with vis version:', vis.version);
 
     let network = null;
+    let graph = null;
+    let folderPath = '';
+    // Folder and payload version currently drawn; analyzing it again only fetches what changed
+    let shownPath = '';
+    let version = null;
+    // Stop streaming once this many classes were found (0 = no limit)
+    const MAX_CLASSES = 0;
+    // Larger graphs arrive folded into package, directory or file nodes
+    const NODE_BUDGET = 1500;
+    // Node coordinates computed by the server ('force' or 'hierarchical'); null lets vis.js lay out the graph
+    const LAYOUT = 'force';
     const container = document.getElementById('network');
+    const detailsPanel = document.getElementById('classDetails');
+    // Class details fetched from /node/details, by node id, for the graph currently drawn
+    const details = new Map();
     const analyzeBtn = document.getElementById('analyzeBtn');
 
     // Initialize container
@@ -25,29 +39,181 @@ function initializeApp() {
     analyzeBtn.addEventListener('click', analyzeCode);
 
     async function analyzeCode() {
-        const folderPath = document.getElementById('folderPath').value.trim();
+        folderPath = document.getElementById('folderPath').value.trim();
         if (!folderPath) {
             showError('Please enter a folder path');
             return;
         }
 
+        if (folderPath === shownPath && version !== null) {
+            await reanalyzeCode();
+            return;
+        }
+
         try {
             showLoading('Analyzing code...');
 
-            const response = await fetch('/analyze', {
+            const response = await fetch('/analyze/stream', {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ folder_path: folderPath })
+                body: JSON.stringify({ folder_path: folderPath, max_classes: MAX_CLASSES, node_budget: NODE_BUDGET, layout: LAYOUT })
             });
 
-            const data = await response.json();
-            createVisualization(data);
+            if (!response.ok) {
+                const data = await response.json();
+                showError('Analysis failed: ' + data.error);
+                return;
+            }
+
+            // Classes are drawn as they arrive; the final message has the full graph
+            const live = createVisualization({ nodes: [], links: [] });
+            await readStream(response, message => {
+                if (message.done) {
+                    if (message.error) {
+                        showError('Analysis failed: ' + message.error);
+                    } else {
+                        details.clear();
+                        createVisualization(message);
+                        shownPath = folderPath;
+                        version = message.version;
+                    }
+                } else {
+                    live.nodes.update(message.nodes);
+                }
+            });
 
         } catch (error) {
             showError('Analysis failed: ' + error.message);
         }
     }
 
+    async function reanalyzeCode() {
+        // Apply the server's diff to the drawn graph, keeping positions and the viewport
+        try {
+            const response = await fetch('/analyze', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ folder_path: folderPath, node_budget: NODE_BUDGET, layout: LAYOUT,
+                                       since: version })
+            });
+            const data = await response.json();
+            if (!response.ok) {
+                showError('Analysis failed: ' + data.error);
+                return;
+            }
+            if (data.delta) {
+                applyDelta(data);
+            } else {
+                details.clear();
+                createVisualization(data);
+            }
+            version = data.version;
+        } catch (error) {
+            showError('Analysis failed: ' + error.message);
+        }
+    }
+
+    function applyDelta(delta) {
+        // Changes to nodes the user expanded or removed are skipped rather than drawn again
+        delta.nodes.removed.concat(delta.nodes.changed.map(node => node.id)).forEach(id => details.delete(id));
+        graph.edges.remove(delta.links.removed);
+        graph.nodes.remove(delta.nodes.removed);
+        const changed = delta.nodes.changed.filter(node => graph.nodes.get(node.id));
+        // A changed class gets its tooltip fetched again on the next hover
+        graph.nodes.update(delta.nodes.added.concat(changed.map(node => Object.assign({ title: null }, node))));
+        graph.edges.update(delta.links.added.concat(delta.links.changed.filter(link => graph.edges.get(link.id))));
+    }
+
+    async function expandNode(nodeId) {
+        // Replace a folded node by its children, linked to the nodes already drawn
+        const response = await fetch('/expand', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ folder_path: folderPath, node_id: nodeId, visible: graph.nodes.getIds(), layout: LAYOUT })
+        });
+        const data = await response.json();
+        if (!response.ok) {
+            showError('Expanding failed: ' + data.error);
+            return;
+        }
+        graph.edges.remove(network.getConnectedEdges(nodeId));
+        graph.nodes.remove(nodeId);
+        graph.nodes.update(data.nodes);
+        graph.edges.update(data.links);
+    }
+
+    async function fetchDetails(nodeId) {
+        // Methods, attributes and docstrings are not part of the graph payload
+        if (!details.has(nodeId)) {
+            const params = new URLSearchParams({ folder_path: folderPath, id: nodeId });
+            details.set(nodeId, fetch('/node/details?' + params).then(response => response.ok ? response.json() : null));
+        }
+        return details.get(nodeId);
+    }
+
+    async function showTooltip(nodeId) {
+        const info = await fetchDetails(nodeId);
+        if (info && graph.nodes.get(nodeId)) {
+            const tooltip = document.createElement('div');
+            tooltip.innerHTML = info.title;
+            graph.nodes.update({ id: nodeId, title: tooltip });
+        }
+    }
+
+    async function showDetails(nodeId) {
+        const info = await fetchDetails(nodeId);
+        detailsPanel.innerHTML = '';
+        if (!info) {
+            return;
+        }
+        const card = document.createElement('div');
+        card.className = 'card card-body';
+        const heading = document.createElement('h5');
+        heading.textContent = info.name;
+        card.appendChild(heading);
+        [
+            ['Type', info.type],
+            ['Language', info.language],
+            ['File', info.file],
+            ['Inherits', info.bases.join(', ') || 'None'],
+            ['Methods', info.methods.join(', ') || 'None'],
+            ['Attributes', info.attributes.join(', ') || 'None']
+        ].forEach(([name, value]) => {
+            const row = document.createElement('div');
+            const label = document.createElement('i');
+            label.textContent = name + ': ';
+            row.append(label, value);
+            card.appendChild(row);
+        });
+        if (info.docstring) {
+            const docstring = document.createElement('pre');
+            docstring.className = 'mt-2';
+            docstring.textContent = info.docstring;
+            card.appendChild(docstring);
+        }
+        detailsPanel.appendChild(card);
+    }
+
+    async function readStream(response, onMessage) {
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+
+        while (true) {
+            const { done, value } = await reader.read();
+            if (done) {
+                break;
+            }
+            buffer += decoder.decode(value, { stream: true });
+            const lines = buffer.split('\n');
+            buffer = lines.pop();
+            lines.filter(line => line.trim()).forEach(line => onMessage(JSON.parse(line)));
+        }
+        if (buffer.trim()) {
+            onMessage(JSON.parse(buffer));
+        }
+    }
+
     function createVisualization(data) {
         // Clear previous
         if (network) {
@@ -58,7 +224,11 @@ function initializeApp() {
         const nodes = new vis.DataSet(data.nodes || []);
         const edges = new vis.DataSet(data.links || []);
 
-        network = new vis.Network(container, { nodes, edges }, {
+        // Nodes placed by the server keep their x/y, so neither layout nor physics runs in the browser
+        const options = data.layout ? {
+            layout: { hierarchical: false },
+            physics: { enabled: false }
+        } : {
             layout: {
                 hierarchical: {
                     direction: 'UD',
@@ -70,7 +240,32 @@ function initializeApp() {
                     nodeDistance: 200
                 }
             }
+        };
+        // Class nodes arrive without styling or tooltips; these fetch on hover or click
+        options.nodes = { shape: 'box', borderWidth: 2, font: { size: 14 } };
+        options.interaction = { hover: true };
+        network = new vis.Network(container, { nodes, edges }, options);
+        network.on('hoverNode', params => {
+            const node = nodes.get(params.node);
+            if (node && !node.lod && !node.title) {
+                showTooltip(node.id);
+            }
+        });
+        network.on('click', params => {
+            const node = params.nodes.length ? nodes.get(params.nodes[0]) : null;
+            if (node && !node.lod) {
+                showDetails(node.id);
+            }
         });
+        network.on('doubleClick', params => {
+            const node = params.nodes.length ? nodes.get(params.nodes[0]) : null;
+            if (node && node.lod) {
+                expandNode(node.id);
+            }
+        });
+
+        graph = { nodes, edges };
+        return graph;
     }
 
     // Helper functions
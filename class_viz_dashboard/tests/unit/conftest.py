@@ -0,0 +1,11 @@
+import pytest
+
+from benchmarks.synthetic import generate_codebase
+
+
+@pytest.fixture
+def codebase(tmp_path):
+    """A small synthetic Python, Java and Groovy codebase; returns its root folder"""
+    root = tmp_path / 'codebase'
+    generate_codebase(str(root), files=24, classes_per_file=4, relationship_density=1.5)
+    return str(root)
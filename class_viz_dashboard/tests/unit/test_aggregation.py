@@ -0,0 +1,53 @@
+import pytest
+
+from utils.aggregation import aggregate, choose_level, collapse, expand, group_id, level_of_detail
+from utils.core_parser import analyze_codebase
+from utils.visualization import generate_visualization_data
+
+
+@pytest.fixture
+def viz(codebase):
+    return generate_visualization_data(analyze_codebase(codebase), details=False)
+
+
+def test_level_of_detail_picks_the_most_detailed_level_within_budget(viz, codebase):
+    assert choose_level(viz, len(viz['nodes']), codebase) == 'class'
+
+    files = {group_id(node, 'file', codebase) for node in viz['nodes']}
+    folded = level_of_detail(viz, len(files), codebase)
+    assert folded['stats']['level'] == 'file'
+    assert folded['stats']['class_nodes'] == len(viz['nodes'])
+    assert {node['id'] for node in folded['nodes']} == files
+    assert level_of_detail(viz, 1, codebase)['stats']['level'] == 'package'
+
+
+def test_aggregate_edges_add_up_to_the_class_edges(viz, codebase):
+    folded = aggregate(viz, 'file', codebase)
+
+    assert sum(node['classes'] for node in folded['nodes']) == len(viz['nodes'])
+    class_total = sum(link.get('count', 1) for link in viz['links'])
+    group_total = sum(link['count'] for link in folded['links'])
+    internal_total = sum(node['internal_relationships'] for node in folded['nodes'])
+    assert group_total + internal_total == class_total
+
+
+def test_expand_opens_a_group_one_level_down(viz, codebase):
+    folded = aggregate(viz, 'package', codebase)
+    package = next(node['id'] for node in folded['nodes'] if node['id'] != 'package:external')
+    visible = [node['id'] for node in folded['nodes']]
+
+    opened = expand(viz, package, visible, codebase)
+    directories = {group_id(node, 'directory', codebase) for node in viz['nodes']
+                   if group_id(node, 'package', codebase) == package}
+    assert {node['id'] for node in opened['nodes']} == directories
+    assert opened['stats']['level'] == 'directory'
+    assert all(link['from'] in directories or link['to'] in directories for link in opened['links'])
+    assert all({link['from'], link['to']} <= directories | set(visible) for link in opened['links'])
+
+    collapsed = {node['id'] for node in collapse(viz, 'package', [package], codebase)['nodes']}
+    assert collapsed == directories | set(visible) - {package}
+
+
+def test_expand_rejects_a_class_node(viz, codebase):
+    with pytest.raises(ValueError):
+        expand(viz, viz['nodes'][0]['id'], root_folder=codebase)
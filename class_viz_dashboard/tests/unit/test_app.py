@@ -0,0 +1,41 @@
+import json
+
+import pytest
+
+import app as app_module
+from utils import watcher as watcher_module
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(app_module, 'watchers', app_module.OrderedDict())
+    monkeypatch.setattr(app_module, 'node_details_cache', {})
+    yield app_module.app.test_client()
+    for watcher in app_module.watchers.values():
+        watcher.stop()
+
+
+def test_details_after_a_stream_reuse_its_analysis(client, tmp_path, monkeypatch):
+    (tmp_path / 'a.py').write_text('class A:\n    """Docs of A"""\n')
+    response = client.post('/analyze/stream', json={'folder_path': str(tmp_path), 'layout': None})
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert lines[-1]['done'] and 'error' not in lines[-1]
+
+    def analyze_again(*args, **kwargs):
+        raise AssertionError("the folder was analyzed again")
+
+    monkeypatch.setattr(watcher_module, 'iter_codebase', analyze_again)
+    node_id = lines[0]['nodes'][0]['id']
+    details = client.get('/node/details', query_string={'folder_path': str(tmp_path), 'id': node_id}).get_json()
+    assert details['docstring'] == 'Docs of A'
+
+
+def test_details_of_unknown_nodes_and_missing_arguments(client, tmp_path):
+    (tmp_path / 'a.py').write_text('class A:\n    pass\n')
+    folder_path = str(tmp_path)
+
+    assert client.get('/node/details', query_string={'folder_path': folder_path}).status_code == 400
+    response = client.get('/node/details', query_string={'folder_path': folder_path, 'id': 'B::a.py'})
+    assert response.status_code == 404
+    details = client.get('/node/details', query_string={'folder_path': folder_path, 'id': 'A::a.py'}).get_json()
+    assert details['name'] == 'A' and details['methods'] == []
@@ -0,0 +1,48 @@
+from benchmarks.synthetic import generate_codebase
+from utils import batch
+from utils.batch import analyze_many
+from utils.core_parser import analyze_codebase
+
+
+def make_repos(tmp_path, count):
+    roots = []
+    for seed in range(count):
+        root = str(tmp_path / f"repo{seed}")
+        generate_codebase(root, files=6, classes_per_file=3, languages=('python', 'java'), seed=seed)
+        roots.append(root)
+    return roots
+
+
+def test_shared_pool_gives_each_repository_its_own_analysis(tmp_path):
+    roots = make_repos(tmp_path, 3)
+    stats = {}
+    results = dict(analyze_many(roots, workers=2, stats=stats))
+
+    assert sorted(results) == roots
+    for root in roots:
+        expected = analyze_codebase(root)
+        assert results[root]['classes'] == expected['classes']
+        assert results[root]['relationships'] == expected['relationships']
+        assert results[root]['_meta']['root_folder'] == root
+    assert stats['repos'] == 3 and stats['repos_failed'] == 0
+    assert stats['files'] == 18
+    assert stats['classes'] == sum(len(structure['classes']) for structure in results.values())
+
+
+def test_a_failing_repository_does_not_stop_the_batch(tmp_path, monkeypatch):
+    roots = make_repos(tmp_path, 2)
+    analyze = batch.analyze_codebase
+
+    def failing_analyze(root, **options):
+        if root == roots[0]:
+            raise RuntimeError("disk on fire")
+        return analyze(root, **options)
+
+    monkeypatch.setattr(batch, 'analyze_codebase', failing_analyze)
+    stats = {}
+    results = dict(analyze_many(roots, workers=1, stats=stats))
+
+    assert results[roots[0]]['_meta']['failed']
+    assert results[roots[0]]['errors'] == [f"Analysis of {roots[0]} failed: disk on fire"]
+    assert results[roots[1]]['classes']
+    assert stats['repos'] == 2 and stats['repos_failed'] == 1
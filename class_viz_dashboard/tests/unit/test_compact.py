@@ -0,0 +1,28 @@
+from utils.compact import CompactStructure, StringTable
+from utils.core_parser import analyze_codebase
+from utils.visualization import generate_visualization_data
+
+
+def test_compact_analysis_holds_the_same_records(codebase):
+    plain = analyze_codebase(codebase)
+    compact = analyze_codebase(codebase, compact=True)
+    assert isinstance(compact, CompactStructure)
+    assert len(compact['classes']) == len(plain['classes'])
+    assert list(compact['classes']) == plain['classes']
+    assert compact['relationships'][-1] == plain['relationships'][-1]
+    converted = CompactStructure.from_structure(plain).to_dict()
+    for key in ('classes', 'relationships', 'errors'):
+        assert converted[key] == plain[key]
+
+
+def test_compact_visualization_equals_the_dict_one(codebase):
+    plain = analyze_codebase(codebase)
+    assert generate_visualization_data(CompactStructure.from_structure(plain)) == generate_visualization_data(plain)
+
+
+def test_strings_are_interned_once():
+    table = StringTable()
+    first = table.intern('utils/models.py')
+    assert table.intern('utils/models.py') == first
+    assert table[first] == 'utils/models.py'
+    assert table[table.intern(None)] is None
@@ -0,0 +1,44 @@
+from utils import core_parser
+from utils.core_parser import analyze_codebase, iter_codebase, merge_partial, new_structure
+
+
+def records(structure):
+    return structure['classes'], structure['relationships'], structure['errors']
+
+
+def test_parallel_analysis_equals_serial(codebase):
+    serial = analyze_codebase(codebase)
+    assert serial['classes'] and serial['relationships']
+    assert records(analyze_codebase(codebase, workers=2)) == records(serial)
+
+
+def test_parallel_files_keep_discovery_order_across_windows(codebase):
+    serial = [filepath for filepath, _ in iter_codebase(codebase)]
+    parallel = [filepath for filepath, _ in iter_codebase(codebase, workers=3, window=5)]
+    assert parallel == serial
+
+
+def test_merged_stream_equals_analyze_codebase(codebase):
+    structure = new_structure()
+    for _, partial in iter_codebase(codebase):
+        merge_partial(structure, partial)
+    assert records(structure) == records(analyze_codebase(codebase))
+
+
+def test_stream_yields_before_parsing_everything(codebase, monkeypatch):
+    parsed = []
+    parse = core_parser.parse_source_file
+
+    def counting_parse(filepath, profile=False):
+        parsed.append(filepath)
+        return parse(filepath, profile)
+
+    monkeypatch.setattr(core_parser, 'parse_source_file', counting_parse)
+    filepath, _ = next(iter_codebase(codebase))
+    assert parsed == [filepath]
+
+
+def test_max_classes_stops_the_analysis(codebase):
+    structure = analyze_codebase(codebase, max_classes=10)
+    assert structure['_meta']['truncated']
+    assert 10 <= len(structure['classes']) < 14
@@ -0,0 +1,111 @@
+import os
+
+import pytest
+
+from utils.core_parser import new_structure
+from utils.discovery import FileDiscovery, may_declare_types, read_source, sniff_encoding
+from utils.frontends import frontend_for
+from utils.profiling import PhaseTimer
+
+
+@pytest.mark.skipif(not hasattr(os, 'symlink'), reason="needs symlinks")
+def test_symlink_loop_is_not_followed(tmp_path):
+    package = tmp_path / 'pkg'
+    package.mkdir()
+    (package / 'x.py').write_text('class X:\n    pass\n')
+    os.symlink('..', package / 'loop')
+    os.symlink('.', package / 'alias.py')
+
+    discovery = FileDiscovery(str(tmp_path))
+    assert list(discovery) == [str(package / 'x.py')]
+    assert not discovery.errors
+    assert discovery.is_included(str(package / 'x.py'))
+    assert not discovery.is_included(str(package / 'loop' / 'pkg' / 'x.py'))
+
+
+def test_walk_from_a_subdirectory_applies_inherited_rules(tmp_path):
+    (tmp_path / '.gitignore').write_text('skip/\n*_gen.py\n')
+    (tmp_path / 'src' / 'skip').mkdir(parents=True)
+    (tmp_path / 'src' / 'a.py').write_text('')
+    (tmp_path / 'src' / 'a_gen.py').write_text('')
+    (tmp_path / 'src' / 'skip' / 'b.py').write_text('')
+
+    discovery = FileDiscovery(str(tmp_path))
+    assert list(discovery.walk(str(tmp_path / 'src'))) == [(str(tmp_path / 'src'), [str(tmp_path / 'src' / 'a.py')])]
+    assert list(discovery.walk(str(tmp_path / 'src' / 'skip'))) == []
+    assert not discovery.is_included_dir(str(tmp_path / 'src' / 'skip'))
+
+
+def relative(discovery, root):
+    return sorted(os.path.relpath(filepath, root).replace(os.sep, '/') for filepath in discovery)
+
+
+def test_gitignore_rules_excludes_and_size_limit(tmp_path):
+    (tmp_path / '.gitignore').write_text('*.py\n!keep.py\n/top/\n')
+    for path in ('keep.py', 'drop.py', 'pkg/drop.py', 'top/a.java', 'pkg/top/b.java', 'node_modules/c.java',
+                 '.hidden/d.java', 'pkg/big.java', 'pkg/notes.txt'):
+        (tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / path).write_text('class X {}\n')
+    (tmp_path / 'pkg' / 'big.java').write_text('class Big {}\n' + ' ' * 100)
+    (tmp_path / 'pkg' / '.gitignore').write_text('!drop.py\n')
+
+    discovery = FileDiscovery(str(tmp_path), max_size=50)
+    # A nested .gitignore only applies below its own directory
+    assert relative(discovery, tmp_path) == ['keep.py', 'pkg/drop.py', 'pkg/top/b.java']
+    assert discovery.stats['skipped_size'] == 1
+    assert discovery.is_included(str(tmp_path / 'keep.py'))
+    assert not discovery.is_included(str(tmp_path / 'drop.py'))
+    assert relative(FileDiscovery(str(tmp_path), use_gitignore=False, excludes=()), tmp_path) == [
+        'drop.py', 'keep.py', 'node_modules/c.java', 'pkg/big.java', 'pkg/drop.py', 'pkg/top/b.java', 'top/a.java']
+
+
+@pytest.mark.parametrize('data, encoding', [
+    ('class Caf\u00e9: pass\n'.encode('utf-8-sig'), 'utf-8-sig'),
+    ('class Caf\u00e9: pass\n'.encode('utf-16-le'), 'utf-16-le'),
+    ('# -*- coding: latin-1 -*-\nclass Caf\u00e9: pass\n'.encode('latin-1'), 'iso8859-1'),
+    ('class Caf\u00e9: pass\n'.encode('utf-8'), 'utf-8'),
+])
+def test_encodings_are_sniffed(tmp_path, data, encoding):
+    assert sniff_encoding(data[:1024]) == encoding
+    (tmp_path / 'cafe.py').write_bytes(data)
+    assert 'class Caf\u00e9: pass' in read_source(str(tmp_path / 'cafe.py'))
+
+
+def declared_types(filepath):
+    """Classes the file's parser finds, without the prefilter"""
+    structure = new_structure()
+    frontend_for(filepath).parse(filepath, structure, PhaseTimer())
+    return structure['classes']
+
+
+@pytest.mark.parametrize('name, source', [
+    ('crlf.py', b'x = 1\r\nclass A:\r\n    pass\r\n'),
+    ('cr.py', b'x = 1\rclass A:\r    pass\r'),
+    ('formfeed.py', b'x = 1\n\x0cclass A:\n    pass\n'),
+    ('nested.py', b'if True:\n    class A: pass\n'),
+    ('utf16.py', 'class A:\n    pass\n'.encode('utf-16')),
+    ('Escaped.java', b'public \\u0063lass A {}\n'),
+    ('Enum.java', b'interface A { enum Kind { ONE } }\n'),
+])
+def test_prefilter_passes_every_file_that_declares_a_type(tmp_path, name, source):
+    (tmp_path / name).write_bytes(source)
+    filepath = str(tmp_path / name)
+    assert declared_types(filepath)
+    assert may_declare_types(filepath)
+
+
+def test_prefilter_has_no_false_negatives_on_a_codebase(codebase):
+    filepaths = list(FileDiscovery(codebase))
+    assert filepaths
+    for filepath in filepaths:
+        if declared_types(filepath):
+            assert may_declare_types(filepath), filepath
+
+
+@pytest.mark.parametrize('name, source', [
+    ('functions.py', b'def classify(x):\n    return x.klass\n'),
+    ('Empty.java', b''),
+])
+def test_prefilter_skips_files_without_types(tmp_path, name, source):
+    (tmp_path / name).write_bytes(source)
+    assert not may_declare_types(str(tmp_path / name))
@@ -0,0 +1,50 @@
+import os
+import re
+import subprocess
+import sys
+
+from utils.core_parser import analyze_codebase, iter_codebase
+from utils.frontends import FRONTENDS, frontend_for, register_frontend
+
+DASHBOARD_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+TOY_PARSER = '''
+def parse_toy_file(filepath, structure, phases):
+    with open(filepath) as f:
+        for line in f:
+            if line.startswith('type '):
+                structure['classes'].append({'name': line.split()[1], 'language': 'toy', 'file': filepath,
+                                             'methods': [], 'attributes': [], 'type': 'class', 'docstring': ''})
+'''
+
+
+def test_python_projects_never_import_javalang(tmp_path):
+    (tmp_path / 'a.py').write_text('class A:\n    pass\n')
+    probe = ("import sys\n"
+             "from utils.core_parser import analyze_codebase\n"
+             f"assert analyze_codebase({str(tmp_path)!r})['classes']\n"
+             "print('javalang' in sys.modules, 'utils.java_visitor' in sys.modules)\n")
+    completed = subprocess.run([sys.executable, '-c', probe], cwd=DASHBOARD_DIR, capture_output=True, text=True,
+                               check=True)
+    assert completed.stdout.split() == ['False', 'False']
+
+
+def test_registered_languages_are_discovered_and_parsed(tmp_path, monkeypatch):
+    (tmp_path / 'toy_frontend.py').write_text(TOY_PARSER)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    # Setting the key first makes monkeypatch remove the registration after the test
+    monkeypatch.setitem(FRONTENDS, '.toy', None)
+    frontend = register_frontend('toy', ('.toy',), 'toy_frontend:parse_toy_file', re.compile(rb'^type ', re.M))
+    (tmp_path / 'src').mkdir()
+    (tmp_path / 'src' / 'shapes.toy').write_text('type Circle\ntype Square\n')
+    (tmp_path / 'src' / 'empty.toy').write_text('nothing here\n')
+
+    assert frontend_for('shapes.toy') is frontend and not frontend.loaded
+    assert sorted(filepath for filepath, _ in iter_codebase(str(tmp_path / 'src'))) == [
+        str(tmp_path / 'src' / 'empty.toy'), str(tmp_path / 'src' / 'shapes.toy')]
+    structure = analyze_codebase(str(tmp_path / 'src'), profile=True)
+    assert [cls['name'] for cls in structure['classes']] == ['Circle', 'Square']
+    assert structure['_meta']['languages'] == {'toy'}
+    # The frontend's type_keywords prefilter skipped the file without types
+    assert structure['_meta']['prefilter']['files_skipped'] == 1
+    assert frontend.loaded
@@ -0,0 +1,62 @@
+import copy
+import glob
+import os
+
+from utils.core_parser import analyze_codebase
+from utils.graph_diff import PayloadHistory, apply_diff, diff_payloads, is_empty, link_id, with_link_ids
+from utils.visualization import generate_visualization_data
+
+
+def payload(root):
+    return with_link_ids(generate_visualization_data(analyze_codebase(root), details=False))
+
+
+def by_id(viz_data):
+    return ({node['id']: node for node in viz_data['nodes']}, {link_id(link): link for link in viz_data['links']})
+
+
+def edit_codebase(root):
+    filepaths = sorted(glob.glob(os.path.join(root, '**', '*.py'), recursive=True))
+    with open(filepaths[0], 'a', encoding='utf-8') as f:
+        f.write("\n\nclass AddedLater(Exception):\n    pass\n")
+    os.remove(filepaths[1])
+
+
+def test_applying_the_diff_reproduces_the_new_payload(codebase):
+    old = payload(codebase)
+    edit_codebase(codebase)
+    new = payload(codebase)
+    original = copy.deepcopy(old)
+
+    diff = diff_payloads(old, new)
+    assert not is_empty(diff)
+    assert by_id(apply_diff(old, diff)) == by_id(new)
+    assert old == original
+    assert is_empty(diff_payloads(new, copy.deepcopy(new)))
+
+
+def test_changed_nodes_keep_their_drawn_positions(codebase):
+    old = payload(codebase)
+    new = copy.deepcopy(old)
+    for number, node in enumerate(new['nodes']):
+        node['x'], node['y'] = float(number), 0.0
+    new['nodes'][0]['label'] = 'Renamed'
+
+    diff = diff_payloads(old, new)
+    assert diff['nodes']['changed'] == [{name: value for name, value in new['nodes'][0].items()
+                                         if name not in ('x', 'y')}]
+    assert not diff['nodes']['added'] and not diff['links']['changed']
+
+
+def test_history_sends_a_delta_to_clients_that_show_the_previous_version(codebase):
+    history = PayloadHistory()
+    first = history.respond(codebase, payload(codebase))
+    assert first['version'] == 1 and 'delta' not in first
+    assert history.respond(codebase, payload(codebase), since=1)['version'] == 1
+
+    edit_codebase(codebase)
+    delta = history.respond(codebase, payload(codebase), since=1)
+    assert delta['delta'] and delta['base'] == 1 and delta['version'] == 2
+    assert by_id(apply_diff(first, delta)) == by_id(payload(codebase))
+    # A client showing some other version gets the whole graph
+    assert 'delta' not in history.respond(codebase, payload(codebase), since=1)
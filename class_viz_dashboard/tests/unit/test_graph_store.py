@@ -0,0 +1,87 @@
+import collections
+import threading
+
+from utils import graph_store
+from utils.core_parser import analyze_codebase
+from utils.graph_store import GraphStore
+
+
+def write_module(path, classes):
+    path.write_text(''.join(f"class {name}({base}):\n    pass\n\n" for name, base in classes))
+
+
+def test_page_looks_up_unresolved_sources_in_one_query(tmp_path):
+    code = tmp_path / 'code'
+    code.mkdir()
+    write_module(code / 'models.py', [(f"Model{number}", f"External{number}") for number in range(30)])
+    store = GraphStore(str(tmp_path / 'graph.sqlite3'))
+    store.analyze(str(code))
+    statements = []
+    store._conn.set_trace_callback(statements.append)
+
+    page = store.visualization_page(0, 100)
+
+    assert len([node for node in page['nodes'] if node['id'].endswith('::external')]) == 30
+    assert len(page['links']) == 30
+    assert len([sql for sql in statements if 'FROM classes WHERE name' in sql]) == 1
+
+
+def test_queries_answer_from_the_previous_analysis_while_analyzing(tmp_path, monkeypatch):
+    code = tmp_path / 'code'
+    code.mkdir()
+    write_module(code / 'first.py', [('First', 'object')])
+    store = GraphStore(str(tmp_path / 'graph.sqlite3'))
+    store.analyze(str(code))
+    write_module(code / 'second.py', [('Second', 'First')])
+
+    parsing = threading.Event()
+    release = threading.Event()
+    iter_codebase = graph_store.iter_codebase
+
+    def slow_iter_codebase(*args, **kwargs):
+        for item in iter_codebase(*args, **kwargs):
+            yield item
+            parsing.set()
+            release.wait(10)
+
+    monkeypatch.setattr(graph_store, 'iter_codebase', slow_iter_codebase)
+    refresh = threading.Thread(target=store.analyze, args=(str(code),))
+    refresh.start()
+    try:
+        assert parsing.wait(10)
+        assert [cls['name'] for cls in store.classes()] == ['First']
+    finally:
+        release.set()
+        refresh.join()
+    assert sorted(cls['name'] for cls in store.classes()) == ['First', 'Second']
+    assert store.inheritors('First')[0]['name'] == 'Second'
+
+
+def test_queries_match_the_analysis(tmp_path, codebase):
+    structure = analyze_codebase(codebase)
+    store = GraphStore(str(tmp_path / 'graph.sqlite3'))
+    store.write(structure)
+
+    relationships = structure['relationships']
+    assert store.count_classes() == len(structure['classes'])
+    assert store.count_relationships() == len(relationships)
+    assert store.relationship_types() == dict(collections.Counter(rel['type'] for rel in relationships))
+    name = next(rel['target'] for rel in relationships if rel['type'] == 'inheritance')
+    assert [cls['file'] for cls in store.classes(name=name)] == [cls['file'] for cls in structure['classes']
+                                                                 if cls['name'] == name]
+    parents = [rel['source'] for rel in relationships if rel['target'] == name and rel['type'] == 'inheritance']
+    assert [rel['source'] for rel in store.dependents(name, types=('inheritance',))] == parents
+    page = store.classes(limit=5, offset=5)
+    assert [cls['name'] for cls in page] == [cls['name'] for cls in structure['classes'][5:10]]
+
+
+def test_transitive_inheritors(tmp_path):
+    code = tmp_path / 'code'
+    code.mkdir()
+    write_module(code / 'tree.py', [('Base', 'object'), ('Mid', 'Base'), ('Leaf', 'Mid'), ('Other', 'object')])
+    store = GraphStore(str(tmp_path / 'graph.sqlite3'))
+    store.analyze(str(code))
+
+    assert [cls['name'] for cls in store.inheritors('Base')] == ['Mid']
+    assert [cls['name'] for cls in store.inheritors('Base', transitive=True)] == ['Mid', 'Leaf']
+    assert store.meta()['root_folder'] == str(code)
@@ -0,0 +1,103 @@
+import subprocess
+
+import pytest
+
+from utils import core_parser
+from utils.compact import CompactStructure
+from utils.core_parser import analyze_codebase
+from utils.incremental import git_changed_files
+from utils.spill import SpilledStructure
+
+
+def git(repo, *args):
+    subprocess.run(['git', '-C', str(repo), '-c', 'user.name=test', '-c', 'user.email=test@example.com', *args],
+                   check=True, capture_output=True)
+
+
+@pytest.fixture
+def repo(tmp_path):
+    git(tmp_path, 'init', '-q')
+    (tmp_path / 'base.py').write_text('class Base:\n    pass\n')
+    (tmp_path / 'child.py').write_text('from base import Base\n\nclass Child(Base):\n    pass\n')
+    (tmp_path / 'gone.py').write_text('class Gone:\n    pass\n')
+    git(tmp_path, 'add', '.')
+    git(tmp_path, 'commit', '-q', '-m', 'base')
+    return tmp_path
+
+
+def commit_changes(repo):
+    (repo / 'child.py').write_text('from base import Base\n\nclass Renamed(Base):\n    pass\n')
+    (repo / 'gone.py').unlink()
+    (repo / 'added.py').write_text('class Added:\n    pass\n')
+    git(repo, 'add', '-A')
+    git(repo, 'commit', '-q', '-m', 'change')
+
+
+def unordered(records):
+    return sorted(sorted(record.items()) for record in records)
+
+
+def class_names(structure):
+    return sorted(cls['name'] for cls in structure['classes'])
+
+
+@pytest.mark.parametrize('options', [{'compact': True}, {'memory_budget': 1}], ids=['compact', 'spilled'])
+def test_update_keeps_the_type_of_previous(repo, options):
+    previous = analyze_codebase(str(repo), **options)
+    commit_changes(repo)
+
+    updated = analyze_codebase(str(repo), previous=previous, base_rev='HEAD~1', **options)
+
+    assert type(updated) is type(previous)
+    assert class_names(updated) == ['Added', 'Base', 'Renamed']
+    assert [(rel['source'], rel['target']) for rel in updated['relationships']] == [('Base', 'Renamed')]
+    assert updated['_meta']['incremental']['deleted'] == 1
+
+
+def test_update_applies_the_analysis_options(repo):
+    previous = analyze_codebase(str(repo), excludes=('vendor/',))
+    (repo / 'vendor').mkdir()
+    (repo / 'vendor' / 'lib.py').write_text('class Vendored:\n    pass\n')
+    commit_changes(repo)
+
+    updated = analyze_codebase(str(repo), previous=previous, base_rev='HEAD~1', excludes=('vendor/',),
+                               compact=True)
+
+    assert isinstance(updated, CompactStructure)
+    assert class_names(updated) == ['Added', 'Base', 'Renamed']
+
+
+def test_failed_diff_falls_back_with_the_analysis_options(repo):
+    previous = analyze_codebase(str(repo), compact=True)
+
+    updated = analyze_codebase(str(repo), previous=previous, base_rev='no-such-revision', compact=True)
+
+    assert isinstance(updated, CompactStructure)
+    assert class_names(updated) == ['Base', 'Child', 'Gone']
+    assert updated['errors'][-1].startswith('Git diff no-such-revision..HEAD failed')
+
+
+def test_changed_files_come_from_the_git_diff(repo):
+    commit_changes(repo)
+    assert git_changed_files(str(repo), 'HEAD~1') == {'added': [str(repo / 'added.py')],
+                                                      'modified': [str(repo / 'child.py')],
+                                                      'deleted': [str(repo / 'gone.py')]}
+
+
+def test_update_parses_only_the_changed_files(repo, monkeypatch):
+    previous = analyze_codebase(str(repo))
+    commit_changes(repo)
+    parsed = []
+    parse = core_parser.parse_source_file
+
+    def counting_parse(filepath, profile=False):
+        parsed.append(filepath)
+        return parse(filepath, profile)
+
+    monkeypatch.setattr(core_parser, 'parse_source_file', counting_parse)
+    updated = analyze_codebase(str(repo), previous=previous, base_rev='HEAD~1')
+
+    assert sorted(parsed) == [str(repo / 'added.py'), str(repo / 'child.py')]
+    full = analyze_codebase(str(repo))
+    assert unordered(updated['classes']) == unordered(full['classes'])
+    assert unordered(updated['relationships']) == unordered(full['relationships'])
@@ -0,0 +1,67 @@
+import pytest
+
+from utils import java_visitor
+from utils.core_parser import parse_source_file
+from utils.java_visitor import ParseBudgetExceeded, parse_java_source
+
+CART = """package shop;
+
+import java.util.List;
+import shop.model.Item;
+
+public class Cart extends Base implements Checkout {
+    private Item item = new Item();
+    private List<Item> items;
+
+    public void add(Discount discount) {
+    }
+}
+
+interface Checkout {
+    void pay();
+}
+"""
+
+
+def write_cart(tmp_path):
+    path = tmp_path / 'Cart.java'
+    path.write_text(CART)
+    return str(path)
+
+
+def test_type_declarations_and_relationships(tmp_path):
+    partial = parse_source_file(write_cart(tmp_path))
+
+    assert [(cls['name'], cls['type'], cls['methods'], cls['attributes']) for cls in partial['classes']] == [
+        ('Cart', 'class', ['add'], ['item', 'items']),
+        ('Checkout', 'interface', ['pay'], []),
+    ]
+    assert [(rel['source'], rel['target'], rel['type'], rel.get('target_ref'))
+            for rel in partial['relationships']] == [
+        ('Base', 'Cart', 'inheritance', None),
+        ('Checkout', 'Cart', 'implements', None),
+        ('Cart', 'Item', 'composition', 'shop.model.Item'),
+        ('Cart', 'List', 'aggregation', 'java.util.List'),
+        ('Cart', 'Item', 'aggregation', 'shop.model.Item'),
+        ('Cart', 'Discount', 'dependency', None),
+    ]
+
+
+def test_files_over_the_size_budget_are_not_parsed(tmp_path, monkeypatch):
+    monkeypatch.setattr(java_visitor, 'JAVA_PARSE_SIZE_BUDGET', 100)
+    partial = parse_source_file(write_cart(tmp_path))
+    assert partial['classes'] == []
+    assert 'byte budget' in partial['errors'][0]
+    assert not partial.get('transient')
+
+
+def test_parsing_stops_at_the_time_budget(tmp_path, monkeypatch):
+    with pytest.raises(ParseBudgetExceeded) as raised:
+        parse_java_source(CART, time_budget=0.0)
+    assert raised.value.transient
+
+    monkeypatch.setattr(java_visitor, 'JAVA_PARSE_TIME_BUDGET', 0.0)
+    partial = parse_source_file(write_cart(tmp_path))
+    assert partial['classes'] == []
+    assert 'budget' in partial['errors'][0]
+    assert partial['transient']
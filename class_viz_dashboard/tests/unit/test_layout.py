@@ -0,0 +1,85 @@
+import os
+
+import pytest
+
+from utils.layout import (LAYOUT_LAYER_SPACING, LAYOUT_NODE_SPACING, LayoutCache, compute_layout, layout_expansion,
+                          layout_payload)
+
+
+def test_layout_cache_evicts_least_recently_used(tmp_path):
+    positions = {f"Class{number}": [float(number), 0.0] for number in range(50)}
+    cache = LayoutCache(str(tmp_path))
+    cache.save('first', 'a', positions)
+    entry_bytes = os.path.getsize(cache._path('first'))
+    cache = LayoutCache(str(tmp_path), max_bytes=int(entry_bytes * 3.5))
+    cache.save('second', 'b', positions)
+    cache.save('third', 'c', positions)
+    for age, key in enumerate(('third', 'second', 'first')):
+        os.utime(cache._path(key), (1000 + age, 1000 + age))
+
+    assert cache.load('third')['signature'] == 'c'
+    cache.save('fourth', 'd', positions)
+
+    assert cache.load('second')['signature'] is None
+    assert [cache.load(key)['signature'] for key in ('first', 'third', 'fourth')] == ['a', 'c', 'd']
+    assert len(os.listdir(tmp_path)) == 3
+
+
+def test_layout_cache_counts_a_replaced_file_once(tmp_path):
+    cache = LayoutCache(str(tmp_path), max_bytes=10 ** 6)
+    for _ in range(3):
+        cache.save('root', 'a', {'Class': [0.0, 0.0]})
+    assert cache._total_bytes == os.path.getsize(cache._path('root'))
+
+
+def payload(node_ids):
+    return {'nodes': [{'id': node_id} for node_id in node_ids],
+            'links': [{'from': a, 'to': b, 'label': 'inheritance'} for a, b in zip(node_ids, node_ids[1:])]}
+
+
+def test_layout_cache_keeps_only_the_current_nodes(tmp_path):
+    cache = LayoutCache(str(tmp_path))
+    layout_payload(payload(['A', 'B', 'C']), cache=cache, key='root')
+
+    layout_payload(payload(['B', 'C', 'D']), cache=cache, key='root')
+    positions = cache.load('root\0force')['positions']
+    assert sorted(positions) == ['B', 'C', 'D']
+
+
+def test_hierarchical_layout_puts_children_one_layer_below_their_parents():
+    positions = compute_layout(['A', 'B', 'C', 'D'], [('A', 'B', 'inheritance'), ('A', 'C', 'implements'),
+                                                      ('B', 'D', 'dependency')], mode='hierarchical')
+
+    assert positions['B'][1] == positions['C'][1] == positions['A'][1] + LAYOUT_LAYER_SPACING
+    assert positions['B'][0] != positions['C'][0]
+    # A class in no hierarchy goes below the layers
+    assert positions['D'][1] > positions['B'][1]
+    assert compute_layout(['A', 'B'], [('A', 'B', 'inheritance')]) == compute_layout(['A', 'B'], [('A', 'B', 'x')])
+
+
+def test_layout_rejects_unknown_modes():
+    with pytest.raises(ValueError):
+        compute_layout(['A'], [], mode='circular')
+
+
+def test_unchanged_graph_reuses_the_cached_layout(tmp_path):
+    cache = LayoutCache(str(tmp_path))
+    first = layout_payload(payload(['A', 'B', 'C']), cache=cache, key='root')
+    second = layout_payload(payload(['A', 'B', 'C']), cache=cache, key='root')
+
+    assert first['layout'] == {'mode': 'force', 'physics': False, 'cached': False}
+    assert second['layout']['cached']
+    assert [(node['x'], node['y']) for node in second['nodes']] == [(node['x'], node['y']) for node in first['nodes']]
+
+
+def test_expanded_children_surround_their_group_and_keep_their_places(tmp_path):
+    cache = LayoutCache(str(tmp_path))
+    layout_payload(payload(['package:a', 'package:b']), cache=cache, key='root')
+    parent = cache.load('root\0force')['positions']['package:a']
+
+    children = layout_expansion(payload(['directory:a/x', 'directory:a/y']), 'package:a', cache=cache, key='root')
+    for node in children['nodes']:
+        distance = ((node['x'] - parent[0]) ** 2 + (node['y'] - parent[1]) ** 2) ** 0.5
+        assert distance == pytest.approx(LAYOUT_NODE_SPACING, abs=0.2)
+    again = layout_expansion(payload(['directory:a/x', 'directory:a/y']), 'package:a', cache=cache, key='root')
+    assert [(node['x'], node['y']) for node in again['nodes']] == [(node['x'], node['y']) for node in children['nodes']]
@@ -0,0 +1,126 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from utils import java_visitor
+from utils import parse_cache
+from utils.core_parser import EXTRACTOR_VERSION, analyze_codebase, iter_files, parse_source_file
+from utils.parse_cache import ParseCache
+
+
+def write_files(directory, names):
+    directory.mkdir()
+    paths = []
+    for name in names:
+        path = directory / f"{name.lower()}.py"
+        path.write_text(f"class {name}:\n    def run(self):\n        pass\n")
+        paths.append(str(path))
+    return paths
+
+
+def test_concurrent_analyses_keep_each_others_pending_misses(tmp_path):
+    cache = ParseCache(cache_dir=str(tmp_path / 'cache'))
+    first = write_files(tmp_path / 'first', ['A1', 'A2'])
+    second = write_files(tmp_path / 'second', ['B1', 'B2', 'B3'])
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        # One file per window: the second analysis has looked up B2 but not stored it yet
+        running = iter_files(second, cache=cache, window=1, pool=pool)
+        assert next(running)[0] == second[0]
+        assert cache.pending_digest(second[1]) is not None
+
+        # The first analysis runs to completion and flushes the shared cache
+        assert [filepath for filepath, _ in iter_files(first, cache=cache)] == first
+        assert [filepath for filepath, _ in running] == second[1:]
+
+    cache.close()
+    reopened = ParseCache(cache_dir=str(tmp_path / 'cache'))
+    for filepath in first + second:
+        assert reopened.get(filepath) is not None, filepath
+    assert reopened.misses == 0
+
+
+def test_time_budget_failures_are_not_cached(tmp_path, monkeypatch):
+    source = tmp_path / 'Slow.java'
+    source.write_text('class Slow {\n    void run() {}\n}\n')
+    cache = ParseCache(cache_dir=str(tmp_path / 'cache'))
+
+    monkeypatch.setattr(java_visitor, 'JAVA_PARSE_TIME_BUDGET', 0.0)
+    timed_out = list(iter_files([str(source)], cache=cache))[0][1]
+    assert timed_out['errors'] and timed_out.get('transient')
+    assert cache.get(str(source)) is None
+
+    # The size budget gives the same answer every time, so that failure is cached
+    monkeypatch.setattr(java_visitor, 'JAVA_PARSE_TIME_BUDGET', 10.0)
+    monkeypatch.setattr(java_visitor, 'JAVA_PARSE_SIZE_BUDGET', 1)
+    too_large = list(iter_files([str(source)], cache=cache))[0][1]
+    assert too_large['errors'] and not too_large.get('transient')
+    assert cache.get(str(source))['errors'] == too_large['errors']
+
+
+def test_replaced_entries_are_counted_once(tmp_path):
+    cache = ParseCache(cache_dir=str(tmp_path / 'cache'))
+    paths = write_files(tmp_path / 'code', ['Same'])
+    copy = tmp_path / 'code' / 'copy.py'
+    copy.write_text(open(paths[0]).read())
+    filepaths = paths + [str(copy)]
+    for filepath in filepaths:
+        assert cache.get(filepath) is None
+    for filepath in filepaths:
+        cache.put(filepath, parse_source_file(filepath))
+
+    stored = cache._conn.execute("SELECT COALESCE(SUM(nbytes), 0) FROM entries").fetchone()[0]
+    assert cache._total_bytes == stored
+
+
+def test_files_are_hashed_outside_the_lock(tmp_path, monkeypatch):
+    cache = ParseCache(cache_dir=str(tmp_path / 'cache'))
+    paths = write_files(tmp_path / 'code', ['Hashed'])
+    file_digest = parse_cache._file_digest
+    locked = []
+
+    def checked_digest(filepath):
+        locked.append(cache._lock.locked())
+        return file_digest(filepath)
+
+    monkeypatch.setattr(parse_cache, '_file_digest', checked_digest)
+    assert cache.get(paths[0]) is None
+    assert locked == [False]
+
+
+def test_errors_are_restored_as_parsed(tmp_path):
+    cache = ParseCache(cache_dir=str(tmp_path / 'cache'))
+    paths = write_files(tmp_path / 'code', ['Broken'])
+    errors = [f"Error processing {paths[0]}: bad syntax", "Frontend warning without a path"]
+    assert cache.get(paths[0]) is None
+    cache.put(paths[0], {'classes': [], 'relationships': [], 'errors': errors, 'language': 'python'})
+    cache.flush()
+
+    assert cache.get(paths[0])['errors'] == errors
+
+
+def test_default_version_is_the_extractor_version(tmp_path):
+    assert ParseCache(cache_dir=str(tmp_path / 'cache')).version == EXTRACTOR_VERSION
+
+
+def test_cached_analysis_equals_a_fresh_one(tmp_path, codebase):
+    fresh = analyze_codebase(codebase)
+    cache = ParseCache(cache_dir=str(tmp_path / 'cache'))
+    first = analyze_codebase(codebase, cache=cache)
+    second = analyze_codebase(codebase, cache=cache)
+    assert second['_meta']['cache'] == {'hits': first['_meta']['files_processed'], 'misses': 0}
+    for structure in (first, second):
+        assert structure['classes'] == fresh['classes']
+        assert structure['relationships'] == fresh['relationships']
+
+
+def test_entries_are_addressed_by_content(tmp_path):
+    cache = ParseCache(cache_dir=str(tmp_path / 'cache'))
+    original, edited = write_files(tmp_path / 'src', ['A', 'B'])
+    list(iter_files([original, edited], cache=cache))
+
+    with open(edited, 'a') as f:
+        f.write("class C:\n    pass\n")
+    copy = tmp_path / 'copy.py'
+    copy.write_text(open(original).read())
+    assert cache.get(edited) is None
+    # Same bytes under another name: the entry is shared, with the records moved to the new path
+    assert [cls['file'] for cls in cache.get(str(copy))['classes']] == [str(copy)]
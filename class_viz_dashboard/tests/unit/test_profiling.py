@@ -0,0 +1,36 @@
+from utils.core_parser import analyze_codebase, iter_codebase
+
+
+def write_sources(root):
+    (root / 'a.py').write_text('class A:\n    pass\n')
+    (root / 'b.py').write_text('x = 1\n')
+
+
+def test_profiling_is_off_by_default(tmp_path):
+    write_sources(tmp_path)
+    structure = analyze_codebase(str(tmp_path))
+    assert 'profile' not in structure['_meta']
+    assert 'prefilter' not in structure['_meta']
+    assert all('stats' not in partial for _, partial in iter_codebase(str(tmp_path)))
+
+
+def test_profile_records_phases_and_slowest_files(tmp_path):
+    write_sources(tmp_path)
+    structure = analyze_codebase(str(tmp_path), profile=True)
+    profile = structure['_meta']['profile']
+    assert profile['wall_seconds'] > 0
+    assert sorted(entry['file'] for entry in profile['slowest_files']) == [str(tmp_path / 'a.py'),
+                                                                            str(tmp_path / 'b.py')]
+    assert structure['_meta']['prefilter']['files_skipped'] == 1
+
+
+def test_phases_and_memory_are_measured(tmp_path):
+    write_sources(tmp_path)
+    profile = analyze_codebase(str(tmp_path), profile=True, trace_memory=True)['_meta']['profile']
+    # Per-file phases have CPU times too; walk and merge run in the calling process
+    assert {'prefilter', 'read', 'python_parse', 'extract'} <= set(profile['phases'])
+    assert profile['phases']['python_parse']['cpu_seconds'] >= 0
+    assert profile['phases']['walk']['seconds'] >= 0 and profile['phases']['merge']['seconds'] >= 0
+    assert profile['bytes_read'] == (tmp_path / 'a.py').stat().st_size + (tmp_path / 'b.py').stat().st_size
+    assert profile['traced_peak_bytes'] > 0
+    assert profile['top_allocations']
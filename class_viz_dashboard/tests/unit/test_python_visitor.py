@@ -0,0 +1,71 @@
+from utils.core_parser import parse_source_file
+from utils.symbols import SymbolTable
+
+
+def relationships(partial, rel_type):
+    return [rel for rel in partial['relationships'] if rel['type'] == rel_type]
+
+
+def test_calls_through_an_import_alias_are_associations(tmp_path):
+    (tmp_path / 'models.py').write_text('class Foo:\n    pass\n')
+    service = tmp_path / 'service.py'
+    service.write_text('from models import Foo as Bar\n'
+                       'import helpers as h\n\n'
+                       'class Service:\n'
+                       '    def run(self):\n'
+                       '        Bar.make()\n'
+                       '        h.Helper()\n')
+
+    partial = parse_source_file(str(service))
+
+    associations = relationships(partial, 'association')
+    assert [(rel['target'], rel.get('target_ref')) for rel in associations] == [('Foo', 'models.Foo'),
+                                                                                ('helpers', None)]
+    models = parse_source_file(str(tmp_path / 'models.py'))
+    symbols = SymbolTable.from_structure({'classes': models['classes'] + partial['classes']}, str(tmp_path))
+    assert symbols.qualnames[symbols.resolve_relationship(associations[0])[1]] == 'models.Foo'
+
+
+SHAPES = """from abc import ABC, abstractmethod
+from models import Engine
+
+class Shape(ABC):
+    @abstractmethod
+    def area(self):
+        pass
+
+class Square(Shape):
+    self.engine = Engine()
+    self.owner = owner
+
+    def __init__(self, size: Size):
+        self.size = size
+
+    def paint(self):
+        Engine.start()
+        Size.check()
+
+class Size:
+    pass
+"""
+
+
+def test_one_pass_finds_every_kind_of_relationship(tmp_path):
+    path = tmp_path / 'shapes.py'
+    path.write_text(SHAPES)
+    partial = parse_source_file(str(path))
+
+    assert [(cls['name'], cls['type'], cls['methods'], cls['attributes']) for cls in partial['classes']] == [
+        ('Shape', 'interface', ['area'], []),
+        ('Square', 'class', ['__init__', 'paint'], ['engine', 'owner']),
+        ('Size', 'class', [], []),
+    ]
+    assert [(rel['source'], rel['target'], rel['type'], rel.get('context')) for rel in partial['relationships']] == [
+        ('Shape', 'Square', 'implements', None),
+        ('Square', 'Engine', 'composition', 'Attribute: engine'),
+        ('Square', 'owner', 'aggregation', 'Attribute: owner'),
+        ('Square', 'Size', 'dependency', 'Parameter in __init__()'),
+        ('Square', 'Engine', 'association', 'Method call in paint()'),
+        ('Square', 'Size', 'association', 'Method call in paint()'),
+    ]
+    assert relationships(partial, 'composition')[0]['target_ref'] == 'models.Engine'
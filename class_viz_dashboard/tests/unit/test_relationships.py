@@ -0,0 +1,50 @@
+from utils.core_parser import parse_source_file
+from utils.relationships import (MAX_RELATIONSHIP_CONTEXTS, RelationshipCollector, relationship_contexts,
+                                 relationship_count)
+from utils.visualization import generate_visualization_data
+
+SERVICE = """class Repo:
+    pass
+
+class Service:
+    def load(self, repo: Repo):
+        Repo.get()
+        Repo.get()
+
+    def save(self, repo: Repo):
+        Repo.put()
+"""
+
+
+def test_repeated_edges_collapse_with_counts_and_contexts():
+    relationships = []
+    collector = RelationshipCollector(relationships)
+    for number in range(MAX_RELATIONSHIP_CONTEXTS + 2):
+        collector.add({'source': 'A', 'target': 'B', 'type': 'dependency', 'context': f"Parameter in m{number}()"})
+    collector.add({'source': 'A', 'target': 'B', 'type': 'association'})
+    collector.add({'source': 'A', 'target': 'B', 'type': 'dependency', 'target_ref': 'other.B'})
+
+    assert [(rel['type'], rel.get('target_ref'), relationship_count(rel)) for rel in relationships] == [
+        ('dependency', None, MAX_RELATIONSHIP_CONTEXTS + 2), ('association', None, 1), ('dependency', 'other.B', 1)]
+    assert relationships[0]['context'] == 'Parameter in m0()'
+    assert relationship_contexts(relationships[0]) == [f"Parameter in m{number}()"
+                                                      for number in range(MAX_RELATIONSHIP_CONTEXTS)]
+    assert relationship_contexts({'context': 'Attribute: x'}) == ['Attribute: x']
+    assert relationship_count({}) == 1
+
+
+def test_extraction_counts_repeats_and_weights_the_edge(tmp_path):
+    path = tmp_path / 'service.py'
+    path.write_text(SERVICE)
+    partial = parse_source_file(str(path))
+
+    edges = {(rel['type'], relationship_count(rel), tuple(relationship_contexts(rel)))
+             for rel in partial['relationships']}
+    assert edges == {
+        ('dependency', 2, ('Parameter in load()', 'Parameter in save()')),
+        ('association', 3, ('Method call in load()', 'Method call in save()')),
+    }
+
+    viz = generate_visualization_data({'classes': partial['classes'], 'relationships': partial['relationships']})
+    widths = {link['label']: (link['count'], link['width']) for link in viz['links']}
+    assert widths['dependency'][0] == 2 and widths['dependency'][1] > 1
@@ -0,0 +1,38 @@
+import shutil
+
+import pytest
+
+from utils.compact import CompactStructure
+from utils.core_parser import analyze_codebase
+from utils.shards import merge_shards, parse_shard
+
+
+def records(structure):
+    return list(structure['classes']), list(structure['relationships']), list(structure['errors'])
+
+
+@pytest.mark.parametrize('by', ['hash', 'directory'])
+def test_merged_shards_equal_one_full_run(codebase, by):
+    shards = [analyze_codebase(codebase, shard=(index, 3), shard_by=by) for index in range(3)]
+    files = [shard['_meta']['files_processed'] for shard in shards]
+    assert max(files) < sum(files)
+
+    merged = merge_shards(shards)
+    single = analyze_codebase(codebase)
+    assert records(merged) == records(single)
+    assert merged['_meta']['files_processed'] == single['_meta']['files_processed'] == sum(files)
+    assert isinstance(merge_shards(shards, compact=True), CompactStructure)
+
+
+def test_shards_from_another_checkout_are_moved_to_the_first_root(tmp_path, codebase):
+    other = str(tmp_path / 'other_checkout')
+    shutil.copytree(codebase, other)
+    shards = [analyze_codebase(codebase, shard=(0, 2), compact=True),
+              analyze_codebase(other, shard=(1, 2), compact=True)]
+    assert records(merge_shards(shards)) == records(analyze_codebase(codebase))
+
+
+def test_shard_specs():
+    assert parse_shard('2/8') == (2, 8)
+    with pytest.raises(ValueError):
+        parse_shard('two of eight')
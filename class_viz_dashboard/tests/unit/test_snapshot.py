@@ -0,0 +1,45 @@
+import os
+import sys
+
+import pytest
+
+from utils.core_parser import analyze_codebase
+from utils.compact import CompactStructure
+from utils.snapshot import SnapshotError, is_snapshot, load_snapshot, save_snapshot
+from utils.visualization import generate_visualization_data
+
+
+@pytest.mark.skipif(sys.platform == 'win32', reason="Windows file names are always valid Unicode")
+def test_non_utf8_file_names_round_trip(tmp_path):
+    # Undecodable bytes in a file name come back from os.fsdecode() as lone surrogates
+    filepath = os.fsdecode(os.path.join(os.fsencode(tmp_path), b'caf\xe9.py'))
+    with open(filepath, 'w') as f:
+        f.write('class Cafe:\n    pass\n')
+    structure = analyze_codebase(str(tmp_path))
+    assert [cls['file'] for cls in structure['classes']] == [filepath]
+
+    save_snapshot(structure, str(tmp_path / 'analysis.cvz'))
+    loaded = load_snapshot(str(tmp_path / 'analysis.cvz'))
+    assert [cls['file'] for cls in loaded['classes']] == [filepath]
+
+
+def test_snapshot_round_trip(tmp_path, codebase):
+    structure = analyze_codebase(codebase)
+    path = str(tmp_path / 'analysis.cvz')
+    save_snapshot(structure, path)
+    loaded = load_snapshot(path)
+
+    assert isinstance(loaded, CompactStructure) and is_snapshot(path)
+    for key in ('classes', 'relationships', 'errors'):
+        assert list(loaded[key]) == list(structure[key])
+    assert loaded['_meta']['root_folder'] == codebase
+    assert loaded['_meta']['snapshot']
+    assert generate_visualization_data(loaded) == generate_visualization_data(structure)
+
+
+def test_other_files_are_rejected(tmp_path):
+    path = tmp_path / 'analysis.cvz'
+    path.write_bytes(b'not a snapshot at all')
+    assert not is_snapshot(str(path))
+    with pytest.raises(SnapshotError):
+        load_snapshot(str(path))
@@ -0,0 +1,32 @@
+import pytest
+
+from utils.core_parser import analyze_codebase
+from utils import spill
+from utils.spill import SpilledStructure
+from utils.symbols import SymbolTable
+from utils.visualization import generate_visualization_data
+
+
+def test_spilled_results_equal_in_memory_results(tmp_path, codebase, monkeypatch):
+    # Small chunks, so a small codebase spills several runs
+    monkeypatch.setattr(spill, 'SPILL_CHUNK_RECORDS', 8)
+    plain = analyze_codebase(codebase)
+    spilled = analyze_codebase(codebase, memory_budget=2048, spill_dir=str(tmp_path))
+
+    assert isinstance(spilled, SpilledStructure)
+    assert spilled['_meta']['spill']['runs'] > 1
+    assert spilled.memory_bytes <= 2048
+    for key in ('classes', 'relationships', 'errors'):
+        assert len(spilled[key]) == len(plain[key])
+        assert list(spilled[key]) == plain[key]
+    middle = len(plain['relationships']) // 2
+    assert spilled['relationships'][middle] == plain['relationships'][middle]
+    assert spilled['classes'][-3:] == plain['classes'][-3:]
+    assert generate_visualization_data(spilled) == generate_visualization_data(plain)
+    assert SymbolTable.from_structure(spilled).qualnames == SymbolTable.from_structure(plain).qualnames
+    spilled.close()
+
+
+def test_memory_budget_excludes_compact(codebase):
+    with pytest.raises(ValueError):
+        analyze_codebase(codebase, memory_budget=4096, compact=True)
@@ -0,0 +1,62 @@
+from utils.core_parser import analyze_codebase
+from utils.symbols import SymbolTable
+
+
+def write(root, files):
+    for path, source in files.items():
+        (root / path).parent.mkdir(parents=True, exist_ok=True)
+        (root / path).write_text(source)
+
+
+def resolved(structure, rel_type):
+    """(source, target) qualified names of every relationship of one type"""
+    symbols = SymbolTable.from_structure(structure)
+    pairs = []
+    for rel in structure['relationships']:
+        if rel['type'] == rel_type:
+            source, target = symbols.resolve_relationship(rel)
+            pairs.append((symbols.qualnames[source] if source is not None else None,
+                          symbols.qualnames[target] if target is not None else None))
+    return pairs
+
+
+def test_python_names_resolve_through_aliases_and_relative_imports(tmp_path):
+    write(tmp_path, {
+        'pkg/__init__.py': '',
+        'pkg/models.py': 'class User:\n    pass\n',
+        'pkg/admin/__init__.py': '',
+        'pkg/admin/models.py': 'class User:\n    pass\n',
+        'pkg/admin/views.py': 'from .models import User as AdminUser\n'
+                              'from ..models import User\n\n'
+                              'class Panel(AdminUser):\n'
+                              '    def show(self, user: User):\n'
+                              '        pass\n',
+    })
+    structure = analyze_codebase(str(tmp_path))
+
+    assert resolved(structure, 'inheritance') == [('pkg.admin.models.User', 'pkg.admin.views.Panel')]
+    assert resolved(structure, 'dependency') == [('pkg.admin.views.Panel', 'pkg.models.User')]
+
+
+def test_ambiguous_names_do_not_resolve(tmp_path):
+    write(tmp_path, {
+        'a/models.py': 'class User:\n    pass\n',
+        'b/models.py': 'class User:\n    pass\n',
+    })
+    symbols = SymbolTable.from_structure(analyze_codebase(str(tmp_path)))
+    assert symbols.lookup('User') is None
+    assert symbols.qualnames[symbols.lookup('b.models.User')] == 'b.models.User'
+
+
+def test_java_imports_resolve_by_package(tmp_path):
+    write(tmp_path, {
+        'src/com/acme/User.java': 'package com.acme;\n\npublic class User {}\n',
+        'src/com/other/User.java': 'package com.other;\n\npublic class User {}\n',
+        'src/com/acme/app/Service.java': 'package com.acme.app;\n\n'
+                                         'import com.other.User;\n\n'
+                                         'public class Service {\n'
+                                         '    private User user;\n'
+                                         '}\n',
+    })
+    structure = analyze_codebase(str(tmp_path))
+    assert resolved(structure, 'aggregation') == [('src.com.acme.app.Service', 'src.com.other.User')]
@@ -0,0 +1,32 @@
+import collections
+import os
+
+from benchmarks.synthetic import generate_codebase
+from utils.core_parser import analyze_codebase
+
+
+def read_tree(root):
+    contents = {}
+    for directory, _, files in os.walk(root):
+        for name in files:
+            path = os.path.join(directory, name)
+            with open(path, encoding='utf-8') as f:
+                contents[os.path.relpath(path, root)] = f.read()
+    return contents
+
+
+def test_generated_classes_are_all_found(tmp_path):
+    manifest = generate_codebase(str(tmp_path), files=30, classes_per_file=4, languages=('python', 'java'))
+    structure = analyze_codebase(str(tmp_path))
+
+    assert manifest['files'] == {'python': 15, 'java': 15}
+    assert collections.Counter(cls['language'] for cls in structure['classes']) == manifest['classes']
+    assert not structure['errors']
+    assert manifest['bytes'] == sum(len(source) for source in read_tree(str(tmp_path)).values())
+
+
+def test_output_is_deterministic_for_a_seed(tmp_path):
+    for name, seed in (('a', 1), ('b', 1), ('c', 2)):
+        generate_codebase(str(tmp_path / name), files=12, classes_per_file=3, seed=seed)
+    assert read_tree(str(tmp_path / 'a')) == read_tree(str(tmp_path / 'b'))
+    assert read_tree(str(tmp_path / 'a')) != read_tree(str(tmp_path / 'c'))
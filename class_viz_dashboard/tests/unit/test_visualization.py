@@ -0,0 +1,79 @@
+import copy
+
+from utils.core_parser import analyze_codebase
+from utils.visualization import SUMMARY_NODE_KEYS, NodeDetails, generate_visualization_data, summary_payload
+
+
+def record(name, filepath):
+    return {'name': name, 'language': 'python', 'file': filepath, 'methods': [], 'attributes': [],
+            'type': 'class', 'docstring': ''}
+
+
+STRUCTURE = {
+    'classes': [record('A', '/r/a.py'), record('A', '/r/b.py'), record('B', '/r/b.py')],
+    'relationships': [
+        {'source': 'A', 'target': 'B', 'type': 'inheritance', 'file': '/r/b.py', 'count': 2},
+        {'source': 'Missing', 'target': 'B', 'type': 'inheritance', 'file': '/r/b.py'},
+        {'source': 'B', 'target': 'A', 'type': 'dependency', 'file': '/r/b.py'},
+    ],
+    '_meta': {'root_folder': '/r', 'files_processed': 2},
+}
+
+
+def test_names_resolve_to_nodes_and_missing_parents_become_external():
+    structure = copy.deepcopy(STRUCTURE)
+    viz = generate_visualization_data(structure)
+
+    assert structure == STRUCTURE
+    assert [node['id'] for node in viz['nodes']] == ['A::a.py', 'A::b.py', 'B::b.py', 'Missing::external']
+    # The duplicate name A resolves to the class defined in the relationship's own file
+    assert [(link['from'], link['to'], link['label'], link['count']) for link in viz['links']] == [
+        ('A::b.py', 'B::b.py', 'inheritance', 2),
+        ('Missing::external', 'B::b.py', 'inheritance', 1),
+        ('B::b.py', 'A::b.py', 'dependency', 1),
+    ]
+    assert viz['stats']['total_classes'] == 4 and viz['stats']['total_relationships'] == 3
+
+
+def test_every_link_joins_two_nodes(codebase):
+    structure = analyze_codebase(codebase)
+    viz = generate_visualization_data(structure)
+    node_ids = [node['id'] for node in viz['nodes']]
+
+    assert len(node_ids) == len(set(node_ids))
+    assert all(link['from'] in node_ids and link['to'] in node_ids for link in viz['links'])
+    assert 0 < len(viz['links']) <= len(structure['relationships'])
+    assert sum(link['count'] for link in viz['links']) == sum(rel['count'] for rel in structure['relationships'])
+
+
+def test_summary_nodes_leave_out_the_details():
+    viz = generate_visualization_data(copy.deepcopy(STRUCTURE), details=False)
+    assert all('title' not in node and 'font' not in node for node in viz['nodes'])
+    assert viz['nodes'][0]['file'] == '/r/a.py'
+
+
+def test_summary_payload_keeps_only_the_summary_keys_of_class_nodes():
+    viz = generate_visualization_data(copy.deepcopy(STRUCTURE))
+    group = {'id': 'file:b.py', 'label': 'b.py (2)', 'lod': 'file', 'title': 'Group'}
+    viz['nodes'].append(dict(group))
+
+    nodes = summary_payload(viz)['nodes']
+    assert all(set(node) <= set(SUMMARY_NODE_KEYS) for node in nodes[:-1])
+    assert nodes[0] == {'id': 'A::a.py', 'label': 'A', 'type': 'class', 'language': 'python',
+                        'color': viz['nodes'][0]['color']}
+    assert nodes[-1] == group
+
+
+def test_node_details_describe_every_node_of_the_graph():
+    structure = copy.deepcopy(STRUCTURE)
+    structure['classes'][1].update(methods=['run'], docstring='Second A')
+    details = NodeDetails(structure)
+
+    viz = generate_visualization_data(structure)
+    for node in viz['nodes']:
+        assert details.get(node['id'])['title'] == node['title']
+    assert details.get('A::b.py')['methods'] == ['run'] and details.get('A::b.py')['docstring'] == 'Second A'
+    assert details.get('A::a.py')['file'] == '/r/a.py'
+    assert details.get('Missing::external')['file'] == 'external'
+    assert details.get('Nothing::a.py') is None
+    assert details.get('A::b.py') is details.get('A::b.py')
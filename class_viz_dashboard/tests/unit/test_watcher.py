@@ -0,0 +1,177 @@
+import os
+import sys
+import time
+
+import pytest
+
+from utils import watcher as watcher_module
+from utils.core_parser import iter_codebase
+from utils.discovery import FileDiscovery
+from utils.watcher import CodebaseWatcher, _InotifySource
+
+
+def wait_for(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def class_files(watcher, name):
+    return sorted(cls['file'] for cls in watcher.structure['classes'] if cls['name'] == name)
+
+
+@pytest.mark.skipif(not sys.platform.startswith('linux'), reason="inotify is Linux only")
+def test_renamed_directory_is_replaced(tmp_path):
+    (tmp_path / 'pkg').mkdir()
+    (tmp_path / 'pkg' / 'a.py').write_text('class A:\n    pass\n')
+    watcher = CodebaseWatcher(str(tmp_path), debounce=0.1).start()
+    try:
+        assert watcher.backend == 'inotify'
+        assert class_files(watcher, 'A') == [str(tmp_path / 'pkg' / 'a.py')]
+
+        os.rename(tmp_path / 'pkg', tmp_path / 'pkg2')
+        assert wait_for(lambda: class_files(watcher, 'A') == [str(tmp_path / 'pkg2' / 'a.py')])
+
+        # The moved directory is watched under its new path only
+        (tmp_path / 'pkg2' / 'b.py').write_text('class B:\n    pass\n')
+        assert wait_for(lambda: class_files(watcher, 'B') == [str(tmp_path / 'pkg2' / 'b.py')])
+        assert class_files(watcher, 'A') == [str(tmp_path / 'pkg2' / 'a.py')]
+    finally:
+        watcher.stop()
+
+
+@pytest.mark.skipif(not sys.platform.startswith('linux'), reason="inotify is Linux only")
+def test_directory_moved_out_of_the_tree_is_removed(tmp_path):
+    root = tmp_path / 'root'
+    (root / 'pkg').mkdir(parents=True)
+    (root / 'pkg' / 'a.py').write_text('class A:\n    pass\n')
+    watcher = CodebaseWatcher(str(root), debounce=0.1).start()
+    try:
+        os.rename(root / 'pkg', tmp_path / 'outside')
+        assert wait_for(lambda: not class_files(watcher, 'A'))
+    finally:
+        watcher.stop()
+
+
+@pytest.mark.skipif(not sys.platform.startswith('linux'), reason="inotify is Linux only")
+def test_ignored_directories_are_not_watched(tmp_path):
+    (tmp_path / '.gitignore').write_text('generated/\n')
+    (tmp_path / 'generated').mkdir()
+    (tmp_path / 'src').mkdir()
+    source = _InotifySource(str(tmp_path), FileDiscovery(str(tmp_path)))
+    assert source.open()
+    try:
+        assert sorted(source.directories.values()) == [str(tmp_path), str(tmp_path / 'src')]
+
+        (tmp_path / 'node_modules' / 'pkg').mkdir(parents=True)
+        (tmp_path / 'src' / 'generated').mkdir()
+        (tmp_path / 'src' / 'new').mkdir()
+        (tmp_path / 'src' / 'new' / 'c.py').write_text('class C:\n    pass\n')
+        changed = set()
+        while True:
+            events = source.read(timeout=0.2)
+            if not events:
+                break
+            changed |= events
+        assert str(tmp_path / 'src' / 'new' / 'c.py') in changed
+        assert sorted(source.directories.values()) == [str(tmp_path), str(tmp_path / 'src'),
+                                                       str(tmp_path / 'src' / 'new')]
+    finally:
+        source.close()
+
+
+def test_file_that_becomes_ignored_is_dropped(tmp_path):
+    (tmp_path / 'a.py').write_text('class A:\n    pass\n')
+    (tmp_path / 'b.py').write_text('class B:\n    pass\n')
+    watcher = CodebaseWatcher(str(tmp_path), use_inotify=False).start()
+    assert class_files(watcher, 'A') == [str(tmp_path / 'a.py')]
+
+    (tmp_path / '.gitignore').write_text('a.py\n')
+    watcher.apply_changes([str(tmp_path / '.gitignore')])
+    assert class_files(watcher, 'A') == []
+    assert class_files(watcher, 'B') == [str(tmp_path / 'b.py')]
+    assert watcher.structure['_meta']['files_processed'] == 1
+
+    (tmp_path / '.gitignore').write_text('')
+    watcher.apply_changes([str(tmp_path / '.gitignore')])
+    assert class_files(watcher, 'A') == [str(tmp_path / 'a.py')]
+
+
+def test_file_grown_past_the_size_limit_is_dropped(tmp_path):
+    (tmp_path / 'a.py').write_text('class A:\n    pass\n')
+    watcher = CodebaseWatcher(str(tmp_path), use_inotify=False).start()
+    watcher.discovery.max_size = 100
+    (tmp_path / 'a.py').write_text('class A:\n    pass\n' + '#' * 200)
+    watcher.apply_changes([str(tmp_path / 'a.py')])
+    assert class_files(watcher, 'A') == []
+    assert watcher.structure['_meta']['files_processed'] == 0
+
+
+def test_updates_replace_only_the_changed_files(tmp_path):
+    for name in 'abc':
+        (tmp_path / f'{name}.py').write_text(f'class {name.upper()}:\n    pass\n')
+    watcher = CodebaseWatcher(str(tmp_path), use_inotify=False).start()
+    before = watcher.structure
+
+    (tmp_path / 'b.py').write_text('class B2:\n    pass\n')
+    (tmp_path / 'c.py').unlink()
+    watcher.apply_changes([str(tmp_path / 'b.py'), str(tmp_path / 'c.py')])
+    after = watcher.structure
+
+    assert sorted(cls['name'] for cls in after['classes']) == ['A', 'B2']
+    assert [cls['name'] for cls in after['classes']] == [after['classes'][i]['name'] for i in range(2)]
+    assert after.partials[str(tmp_path / 'a.py')] is before.partials[str(tmp_path / 'a.py')]
+    # The published structure before the update is left as it was
+    assert sorted(cls['name'] for cls in before['classes']) == ['A', 'B', 'C']
+    assert after.to_dict()['classes'] == list(after['classes'])
+
+
+@pytest.mark.skipif(not sys.platform.startswith('linux'), reason="inotify is Linux only")
+def test_gitignore_edits_are_watched(tmp_path):
+    (tmp_path / 'pkg').mkdir()
+    (tmp_path / 'pkg' / 'a.py').write_text('class A:\n    pass\n')
+    watcher = CodebaseWatcher(str(tmp_path), debounce=0.1).start()
+    try:
+        (tmp_path / '.gitignore').write_text('pkg/\n')
+        assert wait_for(lambda: not class_files(watcher, 'A'))
+        assert str(tmp_path / 'pkg') not in watcher._source.directories.values()
+    finally:
+        watcher.stop()
+
+
+def test_start_takes_an_analysis_already_done(tmp_path, monkeypatch):
+    (tmp_path / 'a.py').write_text('class A:\n    pass\n')
+    discovery = FileDiscovery(str(tmp_path))
+    parsed = list(iter_codebase(str(tmp_path), discovery=discovery))
+
+    def analyze_again(*args, **kwargs):
+        raise AssertionError("the folder was analyzed again")
+
+    monkeypatch.setattr(watcher_module, 'iter_codebase', analyze_again)
+    watcher = CodebaseWatcher(str(tmp_path), use_inotify=False).start(parsed, discovery)
+    assert class_files(watcher, 'A') == [str(tmp_path / 'a.py')]
+    assert watcher.structure['_meta']['files_processed'] == 1
+
+    (tmp_path / 'b.py').write_text('class B:\n    pass\n')
+    watcher.apply_changes([str(tmp_path / 'b.py')])
+    assert class_files(watcher, 'B') == [str(tmp_path / 'b.py')]
+
+
+def test_polling_picks_up_edits_new_and_deleted_files(tmp_path):
+    (tmp_path / 'a.py').write_text('class A:\n    pass\n')
+    (tmp_path / 'b.py').write_text('class B:\n    pass\n')
+    watcher = CodebaseWatcher(str(tmp_path), debounce=0.05, poll_interval=0.05, use_inotify=False).start()
+    try:
+        assert watcher.backend == 'polling'
+        version = watcher.version
+        (tmp_path / 'a.py').write_text('class A2:\n    pass\n')
+        (tmp_path / 'b.py').unlink()
+        (tmp_path / 'c.py').write_text('class C:\n    pass\n')
+        assert wait_for(lambda: sorted(cls['name'] for cls in watcher.structure['classes']) == ['A2', 'C'])
+        assert watcher.version > version
+        assert watcher.structure['_meta']['files_processed'] == 2
+    finally:
+        watcher.stop()
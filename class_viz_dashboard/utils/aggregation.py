@@ -0,0 +1,207 @@
+import os
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from utils.visualization import EdgeBuilder
+
+# Levels of detail, coarsest first. A package is a top-level directory of the analysis root.
+LOD_LEVELS = ('package', 'directory', 'file', 'class')
+# Most nodes sent to a browser graph before classes are folded into groups
+DEFAULT_NODE_BUDGET = 1500
+
+_LEVEL_COLORS = {
+    'package': {'background': '#D1C4E9', 'border': '#7E57C2'},
+    'directory': {'background': '#C5CAE9', 'border': '#5C6BC0'},
+    'file': {'background': '#B2EBF2', 'border': '#26A69A'},
+}
+
+
+def group_id(node: Dict[str, Any], level: str, root_folder: Optional[str] = None) -> str:
+    """Id of the node that represents a class node at a level of detail
+
+    Group ids are ``level:key``, the key being the package, directory or
+    file relative to root_folder; class ids (``Name::file``) never look
+    like that. External classes form one ``level:external`` group.
+    """
+    if level == 'class':
+        return node['id']
+    filepath = node.get('file', 'external')
+    if filepath == 'external':
+        return f"{level}:external"
+    relative = os.path.relpath(filepath, root_folder).replace(os.sep, '/') if root_folder else filepath
+    if level == 'file':
+        return f"file:{relative}"
+    directory = relative.rpartition('/')[0] or '.'
+    if level == 'package':
+        return f"package:{directory.partition('/')[0]}"
+    return f"directory:{directory}"
+
+
+def group_level(node_id: str) -> str:
+    """Level of detail of a node id: a group level, or 'class'"""
+    level, separator, _ = node_id.partition(':')
+    return level if separator and level in LOD_LEVELS[:-1] else 'class'
+
+
+def choose_level(viz_data: Dict[str, Any], node_budget: int = DEFAULT_NODE_BUDGET,
+                 root_folder: Optional[str] = None) -> str:
+    """The most detailed level whose graph has at most node_budget nodes
+
+    Falls back to the coarsest level when even that is over budget.
+    """
+    nodes = viz_data['nodes']
+    if len(nodes) <= node_budget:
+        return 'class'
+    root_folder = root_folder or _root_of(nodes)
+    for level in reversed(LOD_LEVELS[:-1]):
+        if len({group_id(node, level, root_folder) for node in nodes}) <= node_budget:
+            return level
+    return LOD_LEVELS[0]
+
+
+def level_of_detail(viz_data: Dict[str, Any], node_budget: int = DEFAULT_NODE_BUDGET,
+                    root_folder: Optional[str] = None) -> Dict[str, Any]:
+    """viz_data as is when it fits node_budget, otherwise aggregated at choose_level()"""
+    root_folder = root_folder or _root_of(viz_data['nodes'])
+    level = choose_level(viz_data, node_budget, root_folder)
+    result = viz_data if level == 'class' else aggregate(viz_data, level, root_folder)
+    result['stats'] = dict(result['stats'], level=level, node_budget=node_budget,
+                           class_nodes=len(viz_data['nodes']))
+    return result
+
+
+def aggregate(viz_data: Dict[str, Any], level: str, root_folder: Optional[str] = None) -> Dict[str, Any]:
+    """Fold every class node into its group at level, with weighted aggregate edges"""
+    return collapse(viz_data, level, root_folder=root_folder)
+
+
+def collapse(viz_data: Dict[str, Any], level: str, expanded: Iterable[str] = (),
+             root_folder: Optional[str] = None) -> Dict[str, Any]:
+    """Graph with classes folded into groups at level, except that groups in expanded open one level down
+
+    Expansion repeats, so a package and one of its directories both in
+    ``expanded`` show that directory's files next to the package's other
+    directories.
+    """
+    root_folder = root_folder or _root_of(viz_data['nodes'])
+    expanded = set(expanded)
+    start = LOD_LEVELS.index(level)
+
+    def represent(node):
+        for finer in LOD_LEVELS[start:]:
+            representative = group_id(node, finer, root_folder)
+            if representative not in expanded:
+                return representative
+        return node['id']
+
+    return _fold(viz_data, represent, root_folder)
+
+
+def expand(viz_data: Dict[str, Any], node_id: str, visible: Iterable[str] = (),
+           root_folder: Optional[str] = None) -> Dict[str, Any]:
+    """Children of the group node_id, one level down, and their edges
+
+    Edges to classes outside the group go to whichever node in
+    ``visible`` (the ids currently drawn) holds that class, from the class
+    itself up to its package; edges to classes with no visible node are
+    left out. The client replaces node_id and its edges with the result.
+    """
+    level = group_level(node_id)
+    if level == 'class':
+        raise ValueError(f"{node_id} is a class, not a group")
+    root_folder = root_folder or _root_of(viz_data['nodes'])
+    child_level = LOD_LEVELS[LOD_LEVELS.index(level) + 1]
+    visible = set(visible)
+
+    def represent(node):
+        if group_id(node, level, root_folder) == node_id:
+            return group_id(node, child_level, root_folder)
+        for finer in reversed(LOD_LEVELS):
+            representative = group_id(node, finer, root_folder)
+            if representative in visible:
+                return representative
+        return None
+
+    children = {group_id(node, child_level, root_folder) for node in viz_data['nodes']
+                if group_id(node, level, root_folder) == node_id}
+    result = _fold(viz_data, represent, root_folder, keep=children)
+    result['links'] = [link for link in result['links'] if link['from'] in children or link['to'] in children]
+    result['stats'] = dict(result['stats'], expanded=node_id, level=child_level,
+                           total_relationships=len(result['links']))
+    return result
+
+
+def _fold(viz_data: Dict[str, Any], represent: Callable[[Dict[str, Any]], Optional[str]],
+          root_folder: Optional[str], keep: Optional[set] = None) -> Dict[str, Any]:
+    """Replace every node by its representative, merging groups and their edges
+
+    Edges inside one group are dropped and counted as the group's
+    ``internal_relationships``. With ``keep`` only those nodes are returned.
+    """
+    representatives = {}
+    members: Dict[str, List[Dict[str, Any]]] = {}
+    for node in viz_data['nodes']:
+        representative = represent(node)
+        representatives[node['id']] = representative
+        if representative is not None and (keep is None or representative in keep):
+            members.setdefault(representative, []).append(node)
+
+    internal = Counter()
+    edges = EdgeBuilder()
+    for link in viz_data['links']:
+        source, target = representatives.get(link['from']), representatives.get(link['to'])
+        if source is None or target is None:
+            continue
+        if source == target and group_level(source) != 'class':
+            internal[source] += link.get('count', 1)
+        else:
+            edges.add(source, target, link['label'], link.get('count', 1))
+
+    nodes = []
+    for representative, group in members.items():
+        if group_level(representative) == 'class':
+            nodes.append(group[0])
+        else:
+            nodes.append(_group_node(representative, group, internal[representative]))
+    links = edges.links()
+    return {
+        'nodes': nodes,
+        'links': links,
+        'stats': dict(viz_data.get('stats', {}), total_classes=len(nodes), total_relationships=len(links),
+                      root_folder=root_folder)
+    }
+
+
+def _group_node(node_id: str, members: List[Dict[str, Any]], internal_relationships: int) -> Dict[str, Any]:
+    """vis.js node of a package, directory or file group"""
+    level, _, key = node_id.partition(':')
+    languages = Counter(node.get('language', 'unknown') for node in members)
+    label = key if level == 'file' else key.rstrip('/') + '/'
+    return {
+        'id': node_id,
+        'label': f"{label} ({len(members)})",
+        'title': (
+            f"<b>{key}</b><br>"
+            f"<i>Level:</i> {level}<br>"
+            f"<i>Classes:</i> {len(members)}<br>"
+            f"<i>Languages:</i> {', '.join(f'{name} ({count})' for name, count in languages.most_common())}<br>"
+            f"<i>Internal relationships:</i> {internal_relationships}<br>"
+            f"Double-click to expand"
+        ),
+        'color': _LEVEL_COLORS[level],
+        'shape': 'box',
+        'borderWidth': 2,
+        'font': {'size': 14},
+        'value': len(members),
+        'lod': level,
+        'classes': len(members),
+        'internal_relationships': internal_relationships,
+        'type': level,
+        'language': languages.most_common(1)[0][0]
+    }
+
+
+def _root_of(nodes: List[Dict[str, Any]]) -> Optional[str]:
+    """Common directory of the class files, as utils.symbols.SymbolTable picks it without a root"""
+    directories = {os.path.dirname(node['file']) for node in nodes if node.get('file', 'external') != 'external'}
+    return os.path.commonpath(directories) if directories else None
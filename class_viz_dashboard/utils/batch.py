@@ -0,0 +1,191 @@
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+from utils.core_parser import EXTRACTOR_VERSION, analyze_codebase, new_structure
+from utils.parse_cache import ParseCache
+
+# Number of slowest repositories kept in the batch statistics
+BATCH_SLOWEST_REPOS = 10
+
+
+def analyze_many(roots: Iterable[str], workers: int = 0, cache: Optional[Any] = None,
+                 repos_in_flight: int = 2, stats: Optional[Dict[str, Any]] = None,
+                 profile: bool = False, **options: Any) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Analyze many codebases with one worker pool and one parse cache
+
+    Yields (root, structure) as each analysis finishes, which is not
+    necessarily the order of ``roots``. With ``workers`` > 1 (<= 0 uses
+    every CPU) one process pool serves every repository and up to
+    ``repos_in_flight`` repositories are analyzed at once, so the pool
+    stays busy while one repository is finishing. Remaining ``options``
+    are passed to analyze_codebase(). Per-file profiling is off unless
+    ``profile`` is set.
+
+    A repository that fails gets a structure holding only the error, with
+    ``_meta['failed']`` set; the batch carries on. Each structure has its
+    wall time in ``_meta['seconds']``.
+
+    ``stats``, when given, is updated after every repository with the
+    counts so far, the throughput in files per second, the
+    BATCH_SLOWEST_REPOS slowest repositories and, with a cache, its hits
+    and misses over the batch. With ``profile`` repositories are ranked by
+    the time spent prefiltering and parsing their files, since wall times
+    include waiting for the pool while other repositories are in flight;
+    without it they are ranked by wall time.
+    """
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    if stats is None:
+        stats = {}
+    stats.update({
+        'repos': 0,
+        'repos_failed': 0,
+        'files': 0,
+        'classes': 0,
+        'seconds': 0.0,
+        'files_per_second': 0.0,
+        'slowest': [],
+    })
+    started = time.perf_counter()
+    if cache is not None:
+        hits, misses = cache.hits, cache.misses
+    options['profile'] = profile
+    rank_by = 'parse_seconds' if profile else 'seconds'
+
+    def record(root: str, structure: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+        meta = structure['_meta']
+        stats['repos'] += 1
+        stats['repos_failed'] += bool(meta.get('failed'))
+        stats['files'] += meta['files_processed']
+        stats['classes'] += len(structure['classes'])
+        stats['seconds'] = time.perf_counter() - started
+        stats['files_per_second'] = stats['files'] / stats['seconds'] if stats['seconds'] else 0.0
+        prefilter = meta.get('prefilter', {})
+        stats['slowest'].append({
+            'root': root,
+            'seconds': meta['seconds'],
+            'parse_seconds': prefilter.get('parse_seconds', 0.0) + prefilter.get('filter_seconds', 0.0),
+            'files': meta['files_processed'],
+        })
+        stats['slowest'].sort(key=lambda repo: -repo[rank_by])
+        del stats['slowest'][BATCH_SLOWEST_REPOS:]
+        if cache is not None:
+            stats['cache'] = {'hits': cache.hits - hits, 'misses': cache.misses - misses}
+        return root, structure
+
+    if workers == 1:
+        for root in roots:
+            yield record(root, _analyze_one(root, 1, cache, None, options))
+        return
+
+    pool = _SharedPool(workers)
+    threads = ThreadPoolExecutor(max_workers=max(repos_in_flight, 1), thread_name_prefix='analyze_many')
+    pending = {}
+    roots = iter(roots)
+    try:
+        while True:
+            for root in roots:
+                pending[threads.submit(_analyze_one, root, workers, cache, pool, options)] = root
+                if len(pending) >= repos_in_flight:
+                    break
+            if not pending:
+                break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield record(pending.pop(future), future.result())
+    finally:
+        for future in pending:
+            future.cancel()
+        threads.shutdown(wait=True)
+        pool.shutdown()
+
+
+def _analyze_one(root: str, workers: int, cache: Optional[Any], pool: Optional['_SharedPool'],
+                 options: Dict[str, Any]) -> Dict[str, Any]:
+    started = time.perf_counter()
+    executor = pool.get() if pool is not None else None
+    try:
+        structure = analyze_codebase(root, workers=workers, cache=cache, pool=executor, **options)
+        # Cache counters are shared by the repositories in flight; see the batch statistics instead
+        structure['_meta'].pop('cache', None)
+    except Exception as e:
+        if isinstance(e, BrokenProcessPool):
+            pool.replace(executor)
+        structure = new_structure()
+        structure['errors'].append(f"Analysis of {root} failed: {str(e)}")
+        structure['_meta']['failed'] = True
+        structure['_meta']['root_folder'] = root
+    structure['_meta']['seconds'] = time.perf_counter() - started
+    return structure
+
+
+class _SharedPool:
+    """The batch's process pool, replaced if a worker dies and breaks it"""
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._lock = threading.Lock()
+        self._executor = ProcessPoolExecutor(max_workers=workers)
+
+    def get(self) -> ProcessPoolExecutor:
+        with self._lock:
+            return self._executor
+
+    def replace(self, broken: ProcessPoolExecutor) -> None:
+        with self._lock:
+            if self._executor is broken:
+                broken.shutdown(wait=False, cancel_futures=True)
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Analyze many codebases with one worker pool")
+    parser.add_argument('roots', nargs='+')
+    parser.add_argument('--workers', type=int, default=0)
+    parser.add_argument('--cache-dir', help="parse cache directory (no cache when omitted)")
+    parser.add_argument('--output', help="write every structure to this file as JSON lines")
+    parser.add_argument('--profile', action='store_true', help="time each file and rank repositories by parse time")
+    args = parser.parse_args()
+
+    cache = None
+    if args.cache_dir:
+        cache = ParseCache(args.cache_dir, version=EXTRACTOR_VERSION)
+
+    stats = {}
+    output = open(args.output, 'w', encoding='utf-8') if args.output else None
+    try:
+        for root, structure in analyze_many(args.roots, workers=args.workers, cache=cache, stats=stats,
+                                            profile=args.profile):
+            meta = structure['_meta']
+            status = 'FAILED' if meta.get('failed') else 'ok'
+            print(f"{status:6} {root}: {meta['files_processed']} files, {len(structure['classes'])} classes, "
+                  f"{meta['seconds']:.2f}s")
+            if output is not None:
+                output.write(json.dumps(dict(structure, root=root), default=list) + '\n')
+    finally:
+        if output is not None:
+            output.close()
+
+    print(f"{stats['repos']} repositories ({stats['repos_failed']} failed), {stats['files']} files "
+          f"in {stats['seconds']:.2f}s: {stats['files_per_second']:.0f} files/s")
+    for repo in stats['slowest']:
+        if args.profile:
+            print(f"  {repo['parse_seconds']:8.2f}s parsing  {repo['files']:7} files  {repo['root']}")
+        else:
+            print(f"  {repo['seconds']:8.2f}s  {repo['files']:7} files  {repo['root']}")
+    return 1 if stats['repos_failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,352 @@
+import os
+from array import array
+from collections.abc import Mapping, Sequence
+from typing import Any, Dict, Iterable, List, Optional
+
+from utils.symbols import SymbolTable
+
+# Keys stored in dedicated columns; anything else goes to the sparse extras
+_CLASS_KEYS = ('name', 'language', 'file', 'methods', 'attributes', 'type', 'docstring')
+_RELATIONSHIP_KEYS = ('source', 'target', 'type', 'context', 'file', 'source_ref', 'target_ref', 'count')
+
+# String id 0 stands for "key not present"
+_ABSENT = 0
+
+
+class StringTable:
+    """Interns strings to small integer ids
+
+    A table can start from an existing list of strings (id 0 being None),
+    as utils.snapshot does; the reverse index is then only built on the
+    first intern().
+    """
+
+    def __init__(self, strings: Optional[List[Optional[str]]] = None):
+        self.strings: List[Optional[str]] = strings if strings is not None else [None]
+        self._ids: Optional[Dict[Optional[str], int]] = None if strings is not None else {None: _ABSENT}
+
+    @property
+    def ids(self) -> Dict[Optional[str], int]:
+        if self._ids is None:
+            self._ids = {value: string_id for string_id, value in enumerate(self.strings)}
+        return self._ids
+
+    def intern(self, value: Optional[str]) -> int:
+        string_id = (self._ids if self._ids is not None else self.ids).get(value)
+        if string_id is None:
+            string_id = len(self.strings)
+            self.strings.append(value)
+            self._ids[value] = string_id
+        return string_id
+
+    def __getitem__(self, string_id: int) -> Optional[str]:
+        return self.strings[string_id]
+
+    def __len__(self) -> int:
+        return len(self.strings)
+
+
+class CompactStructure(Mapping):
+    """Memory-compact analysis result with a dict-compatible interface.
+
+    Every string (class names, file paths, relationship types, contexts) is
+    interned once; classes and relationships are stored as parallel integer
+    columns. ``structure['classes']`` and ``structure['relationships']``
+    are sequence views that build plain dicts on access, so code written
+    for the dict structure keeps working, while to_visualization_data()
+    builds the graph payload straight from the columns.
+    """
+
+    def __init__(self):
+        self.strings = StringTable()
+        self.file_ids: Dict[str, int] = {}
+        self.file_names = array('I')  # file id -> string id
+
+        self.class_name = array('I')
+        self.class_language = array('I')
+        self.class_file = array('I')
+        self.class_type = array('I')
+        self.class_docstring = array('I')
+        self.class_method_offsets = array('I', [0])
+        self.class_methods = array('I')
+        self.class_attribute_offsets = array('I', [0])
+        self.class_attributes = array('I')
+        self.class_has_attributes = bytearray()
+
+        self.edge_source = array('I')
+        self.edge_target = array('I')
+        self.edge_type = array('I')
+        self.edge_context = array('I')
+        self.edge_file = array('I')
+        self.edge_source_ref = array('I')
+        self.edge_target_ref = array('I')
+        self.edge_count = array('I')  # 0: the relationship had no count
+
+        self.class_extras: Dict[int, Dict[str, Any]] = {}
+        self.edge_extras: Dict[int, Dict[str, Any]] = {}
+        self.errors: List[str] = []
+        self.meta: Dict[str, Any] = {'files_processed': 0, 'languages': set()}
+
+        self._classes = _ClassesView(self)
+        self._relationships = _RelationshipsView(self)
+
+    @classmethod
+    def from_structure(cls, structure: Dict[str, Any]) -> 'CompactStructure':
+        compact = cls()
+        compact._classes.extend(structure.get('classes', []))
+        compact._relationships.extend(structure.get('relationships', []))
+        compact.errors.extend(structure.get('errors', []))
+        compact.meta.update(structure.get('_meta', {}))
+        return compact
+
+    # Mapping interface -------------------------------------------------
+
+    def __getitem__(self, key: str) -> Any:
+        if key == 'classes':
+            return self._classes
+        if key == 'relationships':
+            return self._relationships
+        if key == 'errors':
+            return self.errors
+        if key == '_meta':
+            return self.meta
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(('classes', 'relationships', 'errors', '_meta'))
+
+    def __len__(self) -> int:
+        return 4
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain dict structure, as returned by analyze_codebase()"""
+        return {
+            'classes': list(self._classes),
+            'relationships': list(self._relationships),
+            'errors': list(self.errors),
+            '_meta': dict(self.meta),
+        }
+
+    # Storage -----------------------------------------------------------
+
+    def file_id(self, filepath: str) -> int:
+        file_id = self.file_ids.get(filepath)
+        if file_id is None:
+            file_id = len(self.file_names)
+            self.file_ids[filepath] = file_id
+            self.file_names.append(self.strings.intern(filepath))
+        return file_id
+
+    def add_class(self, cls: Dict[str, Any]) -> None:
+        intern = self.strings.intern
+        index = len(self.class_name)
+        self.class_name.append(intern(cls['name']))
+        self.class_language.append(intern(cls.get('language')))
+        self.class_file.append(self.file_id(cls['file']))
+        self.class_type.append(intern(cls.get('type')))
+        self.class_docstring.append(intern(cls.get('docstring')))
+        self.class_methods.extend(intern(m) for m in cls.get('methods', ()))
+        self.class_method_offsets.append(len(self.class_methods))
+        self.class_has_attributes.append('attributes' in cls)
+        self.class_attributes.extend(intern(a) for a in cls.get('attributes', ()))
+        self.class_attribute_offsets.append(len(self.class_attributes))
+
+        extras = {k: v for k, v in cls.items() if k not in _CLASS_KEYS}
+        if extras:
+            self.class_extras[index] = extras
+
+    def add_relationship(self, rel: Dict[str, Any]) -> None:
+        intern = self.strings.intern
+        index = len(self.edge_source)
+        self.edge_source.append(intern(rel['source']))
+        self.edge_target.append(intern(rel['target']))
+        self.edge_type.append(intern(rel.get('type')))
+        self.edge_context.append(intern(rel.get('context')))
+        self.edge_file.append(self.file_id(rel['file']))
+        self.edge_source_ref.append(intern(rel.get('source_ref')))
+        self.edge_target_ref.append(intern(rel.get('target_ref')))
+        self.edge_count.append(rel.get('count', 0))
+
+        extras = {k: v for k, v in rel.items() if k not in _RELATIONSHIP_KEYS}
+        if extras:
+            self.edge_extras[index] = extras
+
+    def class_record(self, index: int) -> Dict[str, Any]:
+        strings = self.strings.strings
+        record = {
+            'name': strings[self.class_name[index]],
+            'language': strings[self.class_language[index]],
+            'file': strings[self.file_names[self.class_file[index]]],
+            'methods': [strings[m] for m in self._slice(self.class_methods, self.class_method_offsets, index)],
+        }
+        if self.class_has_attributes[index]:
+            record['attributes'] = [
+                strings[a] for a in self._slice(self.class_attributes, self.class_attribute_offsets, index)
+            ]
+        record['type'] = strings[self.class_type[index]]
+        record['docstring'] = strings[self.class_docstring[index]]
+        for key in ('language', 'type', 'docstring'):
+            if record[key] is None:
+                del record[key]
+        record.update(self.class_extras.get(index, {}))
+        return record
+
+    def relationship_record(self, index: int) -> Dict[str, Any]:
+        strings = self.strings.strings
+        record = {
+            'source': strings[self.edge_source[index]],
+            'target': strings[self.edge_target[index]],
+            'type': strings[self.edge_type[index]],
+        }
+        if self.edge_context[index] != _ABSENT:
+            record['context'] = strings[self.edge_context[index]]
+        record['file'] = strings[self.file_names[self.edge_file[index]]]
+        if record['type'] is None:
+            del record['type']
+        if self.edge_source_ref[index] != _ABSENT:
+            record['source_ref'] = strings[self.edge_source_ref[index]]
+        if self.edge_target_ref[index] != _ABSENT:
+            record['target_ref'] = strings[self.edge_target_ref[index]]
+        if self.edge_count[index]:
+            record['count'] = self.edge_count[index]
+        record.update(self.edge_extras.get(index, {}))
+        return record
+
+    def symbol_table(self) -> SymbolTable:
+        """utils.symbols.SymbolTable of the classes, built from the columns"""
+        strings = self.strings.strings
+        symbols = SymbolTable(self.meta.get('root_folder'))
+        if symbols.root_folder is None and self.file_names:
+            directories = {os.path.dirname(strings[self.file_names[f]]) for f in set(self.class_file)}
+            symbols.root_folder = os.path.commonpath(directories) if directories else None
+        for index, name_id in enumerate(self.class_name):
+            symbols.add(strings[name_id], strings[self.file_names[self.class_file[index]]])
+        return symbols
+
+    @staticmethod
+    def _slice(values: array, offsets: array, index: int) -> array:
+        return values[offsets[index]:offsets[index + 1]]
+
+    # Visualization -----------------------------------------------------
+
+    def to_visualization_data(self, details: bool = True) -> Dict[str, Any]:
+        """Same payload as generate_visualization_data(), built from the columns"""
+        # Imported here: utils.visualization dispatches back to this method
+        from utils.visualization import EdgeBuilder, format_tooltip, node_color, node_file_label
+
+        strings = self.strings.strings
+        nodes = []
+        created_nodes = set()
+        external_nodes: Dict[int, str] = {}
+        symbols = self.symbol_table()
+        file_labels = [node_file_label(strings[name_id], symbols.root_folder) for name_id in self.file_names]
+
+        def add_node(name_id, node_id, filepath, cls_type, language, methods, bases):
+            if node_id in created_nodes:
+                return
+            name = strings[name_id]
+            if not details:
+                nodes.append({'id': node_id, 'label': name, 'color': node_color(cls_type, language),
+                              'file': filepath, 'type': cls_type or 'class', 'language': language or 'unknown'})
+            else:
+                nodes.append({
+                    'id': node_id,
+                    'label': name,
+                    'title': format_tooltip(name, cls_type or 'class', language or 'unknown',
+                                            filepath, methods, bases),
+                    'color': node_color(cls_type, language),
+                    'shape': 'box',
+                    'borderWidth': 2,
+                    'font': {'size': 14},
+                    'file': filepath,
+                    'type': cls_type or 'class',
+                    'language': language or 'unknown'
+                })
+            created_nodes.add(node_id)
+
+        class_nodes = []
+        detected = set(self.class_name)
+        for index, name_id in enumerate(self.class_name):
+            file_id = self.class_file[index]
+            extras = self.class_extras.get(index, {})
+            class_nodes.append(f"{strings[name_id]}::{file_labels[file_id]}")
+            add_node(
+                name_id,
+                class_nodes[-1],
+                strings[self.file_names[file_id]],
+                strings[self.class_type[index]],
+                strings[self.class_language[index]],
+                [strings[m] for m in self._slice(self.class_methods, self.class_method_offsets, index)],
+                extras.get('bases', []),
+            )
+
+        # Parents that were referenced but never defined become external nodes
+        for source_id in self.edge_source:
+            if source_id not in detected and source_id not in external_nodes:
+                external_nodes[source_id] = f"{strings[source_id]}::external"
+                add_node(source_id, external_nodes[source_id], 'external', 'class', 'unknown', [], [])
+
+        edges = EdgeBuilder()
+        for index, source_id in enumerate(self.edge_source):
+            filepath = strings[self.file_names[self.edge_file[index]]]
+            source = symbols.resolve(strings[source_id], filepath, strings[self.edge_source_ref[index]])
+            target = symbols.resolve(strings[self.edge_target[index]], filepath,
+                                     strings[self.edge_target_ref[index]])
+            source_node = class_nodes[source] if source is not None else external_nodes.get(source_id)
+            target_node = class_nodes[target] if target is not None else None
+            if source_node and target_node:
+                edges.add(source_node, target_node, strings[self.edge_type[index]], self.edge_count[index] or 1)
+
+        links = edges.links()
+        return {
+            'nodes': nodes,
+            'links': links,
+            'stats': {
+                'total_classes': len(nodes),
+                'total_relationships': len(links),
+                'files_processed': self.get('_debug', {}).get('files_processed', 0)
+            }
+        }
+
+
+class _ColumnView(Sequence):
+    def __init__(self, compact: CompactStructure):
+        self.compact = compact
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._record(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return self._record(index)
+
+    def __iter__(self):
+        return (self._record(i) for i in range(len(self)))
+
+    def extend(self, items: Iterable[Dict[str, Any]]) -> None:
+        for item in items:
+            self.append(item)
+
+
+class _ClassesView(_ColumnView):
+    def __len__(self):
+        return len(self.compact.class_name)
+
+    def _record(self, index):
+        return self.compact.class_record(index)
+
+    def append(self, cls: Dict[str, Any]) -> None:
+        self.compact.add_class(cls)
+
+
+class _RelationshipsView(_ColumnView):
+    def __len__(self):
+        return len(self.compact.edge_source)
+
+    def _record(self, index):
+        return self.compact.relationship_record(index)
+
+    def append(self, rel: Dict[str, Any]) -> None:
+        self.compact.add_relationship(rel)
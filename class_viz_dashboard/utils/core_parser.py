@@ -1,27 +1,94 @@
 import os
-import ast
-from typing import Dict, List, Any, Tuple
-from javalang import parse
-from javalang.tree import ClassDeclaration, InterfaceDeclaration
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Iterable, Iterator, List, Any, Optional, Sequence, Tuple
 from abc import ABC, abstractmethod
+from utils.compact import CompactStructure
+from utils.discovery import (FileDiscovery, DEFAULT_EXCLUDES, DEFAULT_MAX_FILE_SIZE, is_excluded_dir,
+                             may_declare_types, read_source)
+from utils.frontends import FRONTENDS, frontend_for, register_frontend, supported_extensions
+from utils.profiling import AnalysisProfile, PhaseTimer, merge_file_stats, new_file_stats
+from utils.shards import ShardDiscovery
+from utils.spill import SpilledStructure
 
+# Bump whenever extraction rules change so cached parse results are discarded
+EXTRACTOR_VERSION = '10'
 
-def _get_imported_names(tree: ast.AST) -> Dict[str, str]:
-    """Extract imported class names and their origins"""
-    imports = {}
-    for node in ast.walk(tree):
-        if isinstance(node, ast.Import):
-            for alias in node.names:
-                imports[alias.name.split('.')[-1]] = alias.name
-        elif isinstance(node, ast.ImportFrom):
-            for alias in node.names:
-                imports[alias.name] = f"{node.module}.{alias.name}"
-    return imports
+# Parallel scheduling: aim for this many byte-balanced batches per worker,
+# and never put more than PARALLEL_MAX_BATCH_FILES files in one batch
+PARALLEL_BATCHES_PER_WORKER = 4
+PARALLEL_MAX_BATCH_FILES = 256
+# Files handed to the process pool at a time by iter_codebase
+STREAM_WINDOW_FILES = 2048
 
 
-def analyze_codebase(root_folder: str) -> Dict[str, Any]:
-    """Analyzes a codebase and extracts class relationships"""
-    structure = {
+def analyze_codebase(root_folder: str, workers: int = 1, cache: Optional[Any] = None,
+                     max_classes: Optional[int] = None, compact: bool = False,
+                     previous: Optional[Dict[str, Any]] = None, base_rev: Optional[str] = None,
+                     head_rev: str = 'HEAD', excludes: Sequence[str] = DEFAULT_EXCLUDES,
+                     max_file_size: Optional[int] = DEFAULT_MAX_FILE_SIZE,
+                     pool: Optional[ProcessPoolExecutor] = None, trace_memory: bool = False,
+                     shard: Optional[Tuple[int, int]] = None, shard_by: str = 'hash',
+                     memory_budget: Optional[int] = None, spill_dir: Optional[str] = None,
+                     profile: bool = False) -> Dict[str, Any]:
+    """Analyzes a codebase and extracts class relationships; iter_codebase() describes the options"""
+    if previous is not None and base_rev is not None:
+        # Imported here: utils.incremental builds on this module
+        from utils.incremental import update_from_git
+        return update_from_git(previous, root_folder, base_rev, head_rev, workers=workers, cache=cache,
+                               compact=compact, excludes=excludes, max_file_size=max_file_size, pool=pool,
+                               trace_memory=trace_memory, memory_budget=memory_budget, spill_dir=spill_dir,
+                               profile=profile)
+
+    if memory_budget is not None:
+        if compact:
+            raise ValueError("compact and memory_budget cannot be combined")
+        structure = SpilledStructure(memory_budget, spill_dir)
+    else:
+        structure = CompactStructure() if compact else new_structure()
+    discovery = FileDiscovery(root_folder, excludes=excludes, max_size=max_file_size)
+    structure['_meta']['discovery'] = discovery.stats
+    if shard is not None:
+        discovery = ShardDiscovery(discovery, *shard, by=shard_by)
+        # Classes, relationships and errors of each file, in the order of discovery.positions
+        file_sizes = []
+        structure['_meta']['shard'] = {'index': discovery.index, 'count': discovery.count, 'by': shard_by,
+                                       'positions': discovery.positions, 'sizes': file_sizes}
+    structure['_meta']['root_folder'] = root_folder
+
+    if cache is not None:
+        hits, misses = cache.hits, cache.misses
+    analysis_profile = AnalysisProfile(structure['_meta'], cache=cache, trace_memory=trace_memory) if profile else None
+    clock = time.perf_counter
+
+    for filepath, partial in iter_codebase(root_folder, workers=workers, cache=cache, discovery=discovery,
+                                           pool=pool, profile=profile):
+        if filepath is not None:
+            structure['_meta']['files_processed'] += 1
+            if shard is not None:
+                file_sizes.append((len(partial['classes']), len(partial['relationships']), len(partial['errors'])))
+        if analysis_profile is None:
+            merge_partial(structure, partial)
+        else:
+            started = clock()
+            merge_partial(structure, partial)
+            analysis_profile.merge_seconds += clock() - started
+        if max_classes is not None and len(structure['classes']) >= max_classes:
+            structure['_meta']['truncated'] = True
+            break
+
+    if cache is not None:
+        structure['_meta']['cache'] = {'hits': cache.hits - hits, 'misses': cache.misses - misses}
+    if analysis_profile is not None:
+        analysis_profile.finish(discovery.stats['seconds'])
+
+    return structure
+
+
+def new_structure() -> Dict[str, Any]:
+    """Empty analysis result, filled by merge_partial()"""
+    return {
         'classes': [],
         'relationships': [],
         'errors': [],
@@ -31,185 +98,247 @@ def analyze_codebase(root_folder: str) -> Dict[str, Any]:
         }
     }
 
+
+def iter_codebase(root_folder: str, workers: int = 1, cache: Optional[Any] = None,
+                  window: int = STREAM_WINDOW_FILES,
+                  discovery: Optional[FileDiscovery] = None,
+                  pool: Optional[ProcessPoolExecutor] = None,
+                  profile: bool = False) -> Iterator[Tuple[Optional[str], Dict[str, Any]]]:
+    """Yield (filepath, partial) for every source file under root_folder, in discovery order
+
+    Files are discovered lazily and yielded as soon as they are parsed, so
+    memory stays bounded by the current window. Options, which
+    analyze_codebase() shares:
+
+    - ``workers`` > 1 parses in a process pool (<= 0 uses every CPU),
+      ``window`` files at a time, the next window while the current one is
+      consumed; ``pool`` is an existing executor to use, left running
+    - ``cache`` is a utils.parse_cache.ParseCache; unchanged files are not
+      parsed again
+    - ``discovery`` defaults to a FileDiscovery of root_folder, which
+      analyze_codebase() builds from ``excludes``, .gitignore rules and
+      ``max_file_size``; traversal failures come last as (None, partial)
+    - ``profile`` times each phase into per-file ``stats``, which
+      analyze_codebase() sums into ``_meta['profile']`` and
+      ``_meta['prefilter']``; its ``trace_memory`` adds tracemalloc's top
+      allocation sites
+
+    analyze_codebase() also takes ``max_classes``, which stops early and
+    sets ``_meta['truncated']``; ``compact`` for a utils.compact
+    CompactStructure; ``memory_budget`` (bytes) for a utils.spill
+    SpilledStructure spilling to ``spill_dir`` (not with ``compact``);
+    ``previous`` and ``base_rev``/``head_rev`` to re-parse only the files
+    git reports as changed (utils.incremental.update_from_git); and
+    ``shard``, an (index, count) pair split ``shard_by`` 'hash' or
+    'directory', for utils.shards.merge_shards().
+    """
+    if discovery is None:
+        discovery = FileDiscovery(root_folder)
+    yield from iter_files(discovery, workers=workers, cache=cache, window=window, pool=pool, profile=profile)
+
+    for error in discovery.errors:
+        yield None, {'classes': [], 'relationships': [], 'errors': [error], 'language': None}
+
+
+def iter_files(filepaths: Iterable[str], workers: int = 1, cache: Optional[Any] = None,
+               window: int = STREAM_WINDOW_FILES,
+               pool: Optional[ProcessPoolExecutor] = None,
+               profile: bool = False) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Yield (filepath, partial) for the given files, in order; see iter_codebase()"""
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    requested: List[str] = []
+    if cache is not None:
+        # The cache may be shared with other analyses, so flush() only forgets this one's files
+        filepaths = _remember(filepaths, requested)
+
     try:
-        for root, dirs, files in os.walk(root_folder):
-            # Skip hidden and virtual env directories
-            dirs[:] = [d for d in dirs if not d.startswith('.') and d not in ('venv', '__pycache__')]
-
-            for file in files:
-                filepath = os.path.join(root, file)
-                structure['_meta']['files_processed'] += 1
-
-                try:
-                    if file.endswith('.py'):
-                        parse_python_file(filepath, structure)
-                        structure['_meta']['languages'].add('python')
-                    elif file.endswith('.java'):
-                        parse_java_file(filepath, structure)
-                except Exception as e:
-                    error_msg = f"Error processing {filepath}: {str(e)}"
-                    structure['errors'].append(error_msg)
+        if workers > 1 or pool is not None:
+            yield from _iter_parallel(iter(filepaths), workers, cache, window, pool, profile)
+        else:
+            for filepath in filepaths:
+                yield filepath, _parse_with_cache(filepath, cache, profile)
+    finally:
+        if cache is not None:
+            cache.flush(requested)
+
+
+def _remember(filepaths: Iterable[str], seen: List[str]) -> Iterator[str]:
+    for filepath in filepaths:
+        seen.append(filepath)
+        yield filepath
 
+
+def _parse_with_cache(filepath: str, cache: Optional[Any], profile: bool = False) -> Dict[str, Any]:
+    if cache is None or frontend_for(filepath) is None:
+        return parse_source_file(filepath, profile)
+    partial = cache.get(filepath)
+    if partial is None:
+        partial = parse_source_file(filepath, profile)
+        cache.put(filepath, partial)
+    return partial
+
+
+def parse_source_file(filepath: str, profile: bool = False) -> Dict[str, Any]:
+    """Parse one file into a partial structure (classes, relationships, errors)
+
+    The file's language frontend (see utils.frontends) does the parsing;
+    files of unsupported languages give an empty partial. Files that fail
+    the utils.discovery.may_declare_types() prefilter are not parsed.
+    With ``profile`` set, ``partial['stats']`` records the size and the
+    wall and CPU time of each phase (see utils.profiling); it is not kept
+    in the parse cache.
+    Errors that may not recur, such as running out of the parse time
+    budget, set ``partial['transient']`` and the partial is not cached.
+    """
+    partial = {'classes': [], 'relationships': [], 'errors': [], 'language': None}
+    frontend = frontend_for(filepath)
+    if frontend is None:
+        return partial
+    stats = new_file_stats(filepath) if profile else None
+    phases = PhaseTimer(stats)
+    try:
+        with phases('prefilter'):
+            prefiltered = not may_declare_types(filepath)
+        if stats is not None:
+            stats['bytes'] = os.path.getsize(filepath)
+            stats['prefiltered'] = prefiltered
+            partial['stats'] = stats
+        if not prefiltered:
+            frontend.parse(filepath, partial, phases)
+        partial['language'] = frontend.language
     except Exception as e:
-        structure['errors'].append(f"Directory traversal failed: {str(e)}")
+        error_msg = f"Error processing {filepath}: {str(e)}"
+        partial['errors'].append(error_msg)
+        if getattr(e, 'transient', False):
+            partial['transient'] = True
+    return partial
 
-    return structure
 
+def merge_partial(structure: Dict[str, Any], partial: Dict[str, Any]) -> None:
+    """Append a partial structure produced by parse_source_file"""
+    structure['classes'].extend(partial['classes'])
+    structure['relationships'].extend(partial['relationships'])
+    structure['errors'].extend(partial['errors'])
+    if partial.get('language'):
+        structure['_meta']['languages'].add(partial['language'])
+    if partial.get('stats'):
+        merge_file_stats(structure['_meta'], partial['stats'])
 
-def parse_python_file(filepath: str, structure: Dict[str, Any]) -> None:
-    """Parse Python files and extract OOP relationships"""
-    with open(filepath, 'r', encoding='utf-8') as f:
-        tree = ast.parse(f.read())
-
-    imported_names = _get_imported_names(tree)
-    classes = {node.name: node for node in ast.walk(tree) if isinstance(node, ast.ClassDef)}
-
-    for class_name, class_node in classes.items():
-        class_info = {
-            'name': class_name,
-            'language': 'python',
-            'file': filepath,
-            'methods': [node.name for node in class_node.body if isinstance(node, ast.FunctionDef)],
-            'attributes': [
-                node.target.attr
-                for node in class_node.body
-                if isinstance(node, ast.Assign)
-                   and len(node.targets) == 1
-                   and isinstance(node.targets[0], ast.Attribute)
-                   and isinstance(node.targets[0].value, ast.Name)
-                   and node.targets[0].value.id == 'self'
-            ],
-            'type': 'class',
-            'docstring': ast.get_docstring(class_node) or ''
-        }
 
-        # Check for abstract base class
-        bases = [base.id for base in class_node.bases]
+def _schedule_batches(filepaths: List[str], workers: int) -> List[List[Tuple[int, str]]]:
+    """Group files into batches of similar byte size, largest first.
+
+    Files bigger than the per-batch target get a batch of their own and are
+    submitted first, so a handful of huge files start early instead of
+    becoming the tail of the run.
+    """
+    sized = []
+    for index, filepath in enumerate(filepaths):
+        try:
+            size = os.path.getsize(filepath)
+        except OSError:
+            size = 0
+        sized.append((size, index, filepath))
+    sized.sort(key=lambda item: (-item[0], item[1]))
+
+    total = sum(size for size, _, _ in sized)
+    target = max(total // (workers * PARALLEL_BATCHES_PER_WORKER), 1)
 
-        if any(isinstance(b, ast.Name) and b.id == 'ABC' for b in class_node.bases):
-            class_info['type'] = 'interface'
+    batches = []
+    current, current_size = [], 0
+    for size, index, filepath in sized:
+        current.append((index, filepath))
+        current_size += size
+        if current_size >= target or len(current) >= PARALLEL_MAX_BATCH_FILES:
+            batches.append(current)
+            current, current_size = [], 0
+    if current:
+        batches.append(current)
+    return batches
 
-        structure['classes'].append(class_info)
 
-        # Add inheritance/implementation relationships
-        for base in class_node.bases:
-            if isinstance(base, ast.Name):
-                if base.id in imported_names and imported_names[base.id] == 'abc.ABC':
+def _parse_batch(batch: List[Tuple[int, str]], profile: bool = False) -> List[Tuple[int, Dict[str, Any]]]:
+    """Worker entry point: parse a batch of (index, filepath) pairs"""
+    return [(index, parse_source_file(filepath, profile)) for index, filepath in batch]
+
+
+class _ParseWindow:
+    """One window of files submitted to the process pool"""
+
+    def __init__(self, pool: ProcessPoolExecutor, filepaths: List[str], workers: int, cache: Optional[Any],
+                 profile: bool = False):
+        self.filepaths = filepaths
+        self.cache = cache
+        self.profile = profile
+        self.partials = [None] * len(filepaths)
+        self.duplicates = []
+        to_parse = []
+        seen_digests = set()
+        for index, filepath in enumerate(filepaths):
+            if frontend_for(filepath) is None:
+                self.partials[index] = parse_source_file(filepath, profile)
+                continue
+            if cache is not None:
+                self.partials[index] = cache.get(filepath)
+                if self.partials[index] is not None:
                     continue
+                # Identical copies are parsed once and then read back from the cache
+                digest = cache.pending_digest(filepath)
+                if digest is not None and digest in seen_digests:
+                    self.duplicates.append(index)
+                    continue
+                seen_digests.add(digest)
+            to_parse.append(index)
 
-                base_type = 'inheritance'
-                target_class = classes.get(base.id)  # Use .get() to avoid KeyError
-                if target_class and target_class.type == 'interface':  # check if target_class exists and then check its type
-                    base_type = 'implements'
-
-                structure['relationships'].append({
-                    'source': base.id,
-                    'target': class_name,
-                    'type': base_type,
-                    'file': filepath
-                })
-
-        # Process class body for relationships
-        for node in class_node.body:
-            if isinstance(node, ast.FunctionDef):
-                # Detect dependencies in method parameters
-                for arg in node.args.args:
-                    if arg.annotation and isinstance(arg.annotation, ast.Name):
-                        structure['relationships'].append({
-                            'source': class_name,
-                            'target': arg.annotation.id,
-                            'type': 'dependency',
-                            'context': f'Parameter in {node.name}()',
-                            'file': filepath
-                        })
-
-                # Detect method calls to other classes
-                for call in [n for n in ast.walk(node) if isinstance(n, ast.Call)]:
-                    if isinstance(call.func, ast.Attribute):
-                        var_name = call.func.value.id if isinstance(call.func.value, ast.Name) else None
-                        if var_name and var_name != 'self':
-                            # Check if the variable is in the imported names.
-                            if var_name in imported_names:
-                                target_class_name = imported_names[var_name].split('.')[-1]  # Get the class name
-                                structure['relationships'].append({
-                                    'source': class_name,
-                                    'target': target_class_name,
-                                    'type': 'association',
-                                    'context': f'Method call in {node.name}()',
-                                    'file': filepath
-                                })
-                            elif var_name in classes:
-                                structure['relationships'].append({
-                                    'source': class_name,
-                                    'target': var_name,
-                                    'type': 'association',
-                                    'context': f'Method call in {node.name}()',
-                                    'file': filepath
-                                })
-
-
-
-            elif isinstance(node, ast.Assign):
-                # Detect composition/aggregation
-                for target in node.targets:
-                    if (isinstance(target, ast.Attribute) and
-                            isinstance(target.value, ast.Name) and
-                            target.value.id == 'self'):
-
-                        attr_name = target.attr
-                        if isinstance(node.value, ast.Call) and isinstance(node.value.func, ast.Name):
-                            target_class = node.value.func.id
-                            structure['relationships'].append({
-                                'source': class_name,
-                                'target': target_class,
-                                'type': 'composition',
-                                'context': f'Attribute: {attr_name}',
-                                'file': filepath
-                            })
-                        elif isinstance(node.value, ast.Name):
-                            target_class = node.value.id
-                            structure['relationships'].append({
-                                'source': class_name,
-                                'target': target_class,
-                                'type': 'aggregation',
-                                'context': f'Attribute: {attr_name}',
-                                'file': filepath
-                            })
-    return structure
+        batches = _schedule_batches([filepaths[index] for index in to_parse], workers)
+        self.futures = [
+            pool.submit(_parse_batch, [(to_parse[position], filepath) for position, filepath in batch], profile)
+            for batch in batches
+        ]
+
+    def drain(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        for future in as_completed(self.futures):
+            for index, partial in future.result():
+                self.partials[index] = partial
+                if self.cache is not None:
+                    self.cache.put(self.filepaths[index], partial)
+        for index in self.duplicates:
+            self.partials[index] = _parse_with_cache(self.filepaths[index], self.cache, self.profile)
+        yield from zip(self.filepaths, self.partials)
+
+
+def _iter_parallel(filepaths: Iterator[str], workers: int, cache: Optional[Any], window: int,
+                   pool: Optional[ProcessPoolExecutor] = None,
+                   profile: bool = False) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Parse files in a process pool and yield partials in discovery order"""
+    own_pool = pool is None
+    if own_pool:
+        pool = ProcessPoolExecutor(max_workers=workers)
+    in_flight = deque()
+    try:
+        for chunk in _chunks(filepaths, window):
+            in_flight.append(_ParseWindow(pool, chunk, workers, cache, profile))
+            if len(in_flight) > 1:
+                yield from in_flight.popleft().drain()
+        while in_flight:
+            yield from in_flight.popleft().drain()
+    finally:
+        if own_pool:
+            pool.shutdown(wait=True, cancel_futures=True)
+        else:
+            # Leave a shared pool free for its next user
+            for parse_window in in_flight:
+                for future in parse_window.futures:
+                    future.cancel()
 
 
-def parse_java_file(filepath: str, structure: Dict[str, Any]) -> None:
-    """Parse Java files and extract OOP relationships"""
-    with open(filepath, 'r', encoding='utf-8') as f:
-        tree = parse.parse(f.read())
-
-    for path, node in tree:
-        if isinstance(node, (ClassDeclaration, InterfaceDeclaration)):
-            class_info = {
-                'name': node.name,
-                'language': 'java',
-                'file': filepath,
-                'methods': [m.name for m in node.methods] if hasattr(node, 'methods') else [],
-                'type': 'interface' if isinstance(node, InterfaceDeclaration) else 'class',
-                'docstring': node.documentation or ''
-            }
-
-            structure['classes'].append(class_info)
-
-            if isinstance(node, ClassDeclaration):
-                if node.extends:
-                    structure['relationships'].append({
-                        'source': node.extends.name,
-                        'target': node.name,
-                        'type': 'inheritance',
-                        'file': filepath
-                    })
-
-                if node.implements:
-                    for interface in node.implements:
-                        structure['relationships'].append({
-                            'source': interface.name,
-                            'target': node.name,
-                            'type': 'implements',
-                            'file': filepath
-                        })
+def _chunks(items: Iterator[str], size: int) -> Iterator[List[str]]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
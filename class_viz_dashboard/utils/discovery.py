@@ -0,0 +1,323 @@
+import codecs
+import mmap
+import os
+import re
+import time
+from typing import Dict, Iterator, List, Optional, Pattern, Sequence, Tuple
+
+from utils.frontends import frontend_for, supported_extensions
+
+# Larger files are almost always generated or vendored bundles
+DEFAULT_MAX_FILE_SIZE = 5 * 1024 * 1024
+# Applied at the root in addition to .gitignore files, in .gitignore syntax
+DEFAULT_EXCLUDES = ('node_modules/', 'build/', 'dist/', 'target/', 'site-packages/')
+
+_BOMS = (
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+_CODING_COOKIE = re.compile(rb'^[ \t\f]*#.*?coding[:=][ \t]*([-\w.]+)')
+
+# (regex, negated, directories only)
+Rule = Tuple[Pattern, bool, bool]
+
+
+def is_excluded_dir(name: str) -> bool:
+    """Skip hidden and virtual env directories"""
+    return name.startswith('.') or name in ('venv', '__pycache__')
+
+
+class FileDiscovery:
+    """Finds the source files to analyze under a root folder.
+
+    Directories are listed with os.scandir and pruned as early as possible:
+    hidden and virtual env directories, ``excludes`` and the rules of every
+    .gitignore on the way down. Files are then filtered by extension (by
+    default those of the languages in utils.frontends) and by size before
+    anything is read. Counters are kept in ``stats``.
+    """
+
+    def __init__(self, root_folder: str, extensions: Optional[Sequence[str]] = None,
+                 max_size: Optional[int] = DEFAULT_MAX_FILE_SIZE,
+                 excludes: Sequence[str] = DEFAULT_EXCLUDES, use_gitignore: bool = True):
+        self.root_folder = root_folder
+        self.extensions = tuple(extensions) if extensions is not None else supported_extensions()
+        self.max_size = max_size
+        self.use_gitignore = use_gitignore
+        self.root_rules = _parse_rules(excludes)
+        self.errors: List[str] = []
+        self.stats = {
+            'dirs_scanned': 0,
+            'dirs_pruned': 0,
+            'files_seen': 0,
+            'files_matched': 0,
+            'bytes_matched': 0,
+            'skipped_ignored': 0,
+            'skipped_extension': 0,
+            'skipped_size': 0,
+            'seconds': 0.0,
+        }
+        self._rules_cache: Dict[str, List[Tuple[str, List[Rule]]]] = {}
+
+    def __iter__(self) -> Iterator[str]:
+        """Yield matching file paths in the same top-down order as os.walk"""
+        for _, files in self.walk():
+            yield from files
+
+    def walk(self, top: Optional[str] = None) -> Iterator[Tuple[str, List[str]]]:
+        """Yield (directory, matching files) for every directory iteration enters, from top down
+
+        top defaults to the root; a top that iteration would prune yields nothing.
+        """
+        top = top or self.root_folder
+        if not self.is_included_dir(top):
+            return
+        stats = self.stats
+        started = time.perf_counter()
+        stack = [(top, self._rules_for(top))]
+        try:
+            while stack:
+                directory, rules = stack.pop()
+                stats['dirs_scanned'] += 1
+                try:
+                    with os.scandir(directory) as it:
+                        entries = list(it)
+                except OSError as e:
+                    self.errors.append(f"Directory traversal failed: {str(e)}")
+                    continue
+
+                subdirs = []
+                files = []
+                for entry in entries:
+                    try:
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                        # Symlinked directories are never entered, as by os.walk, so links cannot loop
+                        linked_dir = not is_dir and entry.is_symlink() and entry.is_dir()
+                    except OSError:
+                        continue
+                    if linked_dir:
+                        stats['dirs_pruned'] += 1
+                        continue
+
+                    if is_dir:
+                        if is_excluded_dir(entry.name) or _is_ignored(rules, entry.path, True):
+                            stats['dirs_pruned'] += 1
+                        else:
+                            subdirs.append(entry.path)
+                        continue
+
+                    stats['files_seen'] += 1
+                    if not entry.name.endswith(self.extensions):
+                        stats['skipped_extension'] += 1
+                        continue
+                    if _is_ignored(rules, entry.path, False):
+                        stats['skipped_ignored'] += 1
+                        continue
+                    try:
+                        size = entry.stat().st_size
+                    except OSError:
+                        size = 0
+                    if self.max_size is not None and size > self.max_size:
+                        stats['skipped_size'] += 1
+                        continue
+
+                    stats['files_matched'] += 1
+                    stats['bytes_matched'] += size
+                    files.append(entry.path)
+
+                # Only time spent here counts, not the consumer's work
+                elapsed = time.perf_counter() - started
+                yield directory, files
+                started = time.perf_counter() - elapsed
+
+                for subdir in reversed(subdirs):
+                    stack.append((subdir, self._own_rules(subdir, rules)))
+        finally:
+            stats['seconds'] += time.perf_counter() - started
+
+    def is_included(self, filepath: str) -> bool:
+        """Whether iterating would yield filepath; files that no longer exist pass the size check"""
+        if not filepath.endswith(self.extensions):
+            return False
+        directory = os.path.dirname(filepath)
+        if not self.is_included_dir(directory) or _is_ignored(self._rules_for(directory), filepath, False):
+            return False
+
+        try:
+            return self.max_size is None or os.path.getsize(filepath) <= self.max_size
+        except OSError:
+            return True
+
+    def is_included_dir(self, directory: str) -> bool:
+        """Whether iteration enters directory: it is the root, or below it and pruned on no level"""
+        relative = os.path.relpath(directory, self.root_folder)
+        if relative == os.curdir:
+            return True
+        if relative.startswith(os.pardir):
+            return False
+
+        parent = os.path.normpath(self.root_folder)
+        for name in relative.split(os.sep):
+            path = os.path.join(parent, name)
+            if is_excluded_dir(name) or os.path.islink(path) or _is_ignored(self._rules_for(parent), path, True):
+                return False
+            parent = path
+        return True
+
+    def _rules_for(self, directory: str) -> List[Tuple[str, List[Rule]]]:
+        rules = self._rules_cache.get(directory)
+        if rules is None:
+            if os.path.normpath(directory) == os.path.normpath(self.root_folder):
+                rules = self._own_rules(directory, [(os.path.join(directory, ''), self.root_rules)])
+            else:
+                rules = self._own_rules(directory, self._rules_for(os.path.dirname(directory)))
+            self._rules_cache[directory] = rules
+        return rules
+
+    def _own_rules(self, directory: str, inherited: List[Tuple[str, List[Rule]]]) -> List[Tuple[str, List[Rule]]]:
+        """Rules in effect inside directory: inherited ones plus its own .gitignore"""
+        if not self.use_gitignore:
+            return inherited
+        try:
+            with open(os.path.join(directory, '.gitignore'), 'r', encoding='utf-8', errors='replace') as f:
+                own = _parse_rules(f.read().splitlines())
+        except OSError:
+            return inherited
+        return inherited + [(os.path.join(directory, ''), own)] if own else inherited
+
+
+def _is_ignored(rules: List[Tuple[str, List[Rule]]], path: str, is_dir: bool) -> bool:
+    """Apply .gitignore semantics: the last matching pattern decides
+
+    Each rule set is relative to its base directory (with a trailing
+    separator), which is always a prefix of path.
+    """
+    ignored = False
+    for base, patterns in rules:
+        relative = path[len(base):].replace(os.sep, '/')
+        for regex, negated, dir_only in patterns:
+            if dir_only and not is_dir:
+                continue
+            if regex.match(relative):
+                ignored = not negated
+    return ignored
+
+
+def _parse_rules(lines: Sequence[str]) -> List[Rule]:
+    rules = []
+    for line in lines:
+        line = line.rstrip()
+        if not line or line.startswith('#'):
+            continue
+        negated = line.startswith('!')
+        if negated:
+            line = line[1:]
+        if line.startswith('\\'):
+            line = line[1:]
+        dir_only = line.endswith('/')
+        line = line.rstrip('/')
+        if not line:
+            continue
+        anchored = '/' in line
+        body = _glob_to_regex(line.lstrip('/'))
+        regex = re.compile(('^' if anchored else '^(?:.*/)?') + body + '$')
+        rules.append((regex, negated, dir_only))
+    return rules
+
+
+def _glob_to_regex(pattern: str) -> str:
+    out = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith('**/', i):
+            out.append('(?:.*/)?')
+            i += 3
+            continue
+        if pattern.startswith('**', i):
+            out.append('.*')
+            i += 2
+            continue
+        char = pattern[i]
+        if char == '*':
+            out.append('[^/]*')
+        elif char == '?':
+            out.append('[^/]')
+        elif char == '[':
+            end = pattern.find(']', i + 1)
+            if end == -1:
+                out.append(re.escape(char))
+            else:
+                chars = pattern[i + 1:end]
+                if chars.startswith('!'):
+                    chars = '^' + chars[1:]
+                out.append(f'[{chars}]')
+                i = end
+        else:
+            out.append(re.escape(char))
+        i += 1
+    return ''.join(out)
+
+
+def sniff_encoding(head: bytes) -> str:
+    """Guess a text encoding from the first bytes of a file
+
+    Checks for a byte order mark, then for BOM-less UTF-16 (NUL bytes in
+    every other position), then for a PEP 263 coding cookie in the first
+    two lines, and falls back to UTF-8.
+    """
+    for bom, encoding in _BOMS:
+        if head.startswith(bom):
+            return encoding
+
+    sample = head[:64]
+    if len(sample) >= 4:
+        if sample[1::2].count(0) > len(sample) // 4 and not sample[0::2].count(0):
+            return 'utf-16-le'
+        if sample[0::2].count(0) > len(sample) // 4 and not sample[1::2].count(0):
+            return 'utf-16-be'
+
+    for line in head.splitlines()[:2]:
+        match = _CODING_COOKIE.match(line)
+        if match:
+            name = match.group(1).decode('ascii', 'replace')
+            try:
+                return codecs.lookup(name).name
+            except LookupError:
+                break
+    return 'utf-8'
+
+
+def may_declare_types(filepath: str) -> bool:
+    """Cheap bytes-level check for a class, interface or enum keyword
+
+    The keywords are the ``type_keywords`` of the file's language frontend.
+    The file is memory-mapped and searched without decoding, so a False
+    answer lets the caller skip parsing entirely. Comments and strings are
+    not told apart, which can only cause a needless parse, never a missed
+    class. Files in encodings that are not ASCII-compatible are always
+    reported as candidates.
+    """
+    frontend = frontend_for(filepath)
+    pattern = frontend.type_keywords if frontend is not None else None
+    if pattern is None:
+        return True
+    with open(filepath, 'rb') as f:
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be mapped
+            return False
+        with data:
+            if sniff_encoding(data[:1024]).startswith(('utf-16', 'utf-32')):
+                return True
+            return pattern.search(data) is not None
+
+
+def read_source(filepath: str) -> str:
+    """Read a source file as text, decoding it with the sniffed encoding"""
+    with open(filepath, 'rb') as f:
+        data = f.read()
+    return data.decode(sniff_encoding(data[:1024]))
@@ -0,0 +1,75 @@
+import importlib
+import os
+import re
+from typing import Any, Callable, Dict, Optional, Pattern, Tuple
+
+
+class LanguageFrontend:
+    """A language the analyzer understands: its file extensions and its parser
+
+    ``parser`` is a ``'module:function'`` path that is only imported when
+    the first file of the language is parsed, so a language's dependencies
+    (javalang for Java) are never loaded for projects without such files.
+    The function is called as ``parser(filepath, structure, phases)`` and
+    appends to structure['classes'] and structure['relationships'].
+
+    ``type_keywords``, when given, is a bytes regex that every file
+    declaring a class must match; utils.discovery.may_declare_types() uses
+    it to skip the others without parsing them.
+    """
+
+    def __init__(self, language: str, extensions: Tuple[str, ...], parser: str,
+                 type_keywords: Optional[Pattern] = None):
+        self.language = language
+        self.extensions = extensions
+        self.parser = parser
+        self.type_keywords = type_keywords
+        self._parse: Optional[Callable[..., Any]] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._parse is not None
+
+    def parse(self, filepath: str, structure: Dict[str, Any], phases: Any) -> None:
+        if self._parse is None:
+            with phases('frontend_import'):
+                module, function = self.parser.split(':')
+                self._parse = getattr(importlib.import_module(module), function)
+        self._parse(filepath, structure, phases)
+
+
+# File extension -> frontend
+FRONTENDS: Dict[str, LanguageFrontend] = {}
+
+
+def register_frontend(language: str, extensions: Tuple[str, ...], parser: str,
+                      type_keywords: Optional[Pattern] = None) -> LanguageFrontend:
+    """Make a language available to discovery and parsing
+
+    A later registration for the same extension replaces the earlier one.
+    Registering in the parent process is enough for files parsed there;
+    parse workers re-import utils.frontends, so languages added at runtime
+    must be registered by an imported module to reach them.
+    """
+    frontend = LanguageFrontend(language, tuple(extensions), parser, type_keywords)
+    for extension in frontend.extensions:
+        FRONTENDS[extension] = frontend
+    return frontend
+
+
+def frontend_for(filepath: str) -> Optional[LanguageFrontend]:
+    """The frontend for a file, or None if its language is not supported"""
+    return FRONTENDS.get(os.path.splitext(filepath)[1])
+
+
+def supported_extensions() -> Tuple[str, ...]:
+    """Extensions of every registered language"""
+    return tuple(FRONTENDS)
+
+
+# Python also breaks lines at a lone CR and indents with form feeds; Java
+# unicode escapes can spell a keyword, so any file using them is a candidate
+register_frontend('python', ('.py',), 'utils.python_visitor:parse_python_file',
+                  re.compile(rb'(?:^|\r)[ \t\f]*class\b', re.MULTILINE))
+register_frontend('java', ('.java',), 'utils.java_visitor:parse_java_file',
+                  re.compile(rb'\b(?:class|interface|enum)\b|\\u'))
@@ -0,0 +1,101 @@
+import threading
+from typing import Any, Dict, List, Optional
+
+# Node keys a diff does not compare: the client keeps the positions it already shows
+POSITION_KEYS = ('x', 'y')
+
+
+def link_id(link: Dict[str, Any]) -> str:
+    """Stable id of a visualization edge; generate_visualization_data() has one edge per (from, to, label)"""
+    return f"{link['from']}->{link['to']}:{link['label']}"
+
+
+def with_link_ids(viz_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Give every link its link_id(), so clients can update and remove edges by id"""
+    for link in viz_data['links']:
+        link['id'] = link_id(link)
+    return viz_data
+
+
+def diff_payloads(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """Nodes and links added, removed and changed from one visualization payload to the next
+
+    Nodes are keyed by id and links by link_id(). Changed nodes are sent
+    without their x/y, so an update keeps them where they are drawn; a
+    node whose position alone changed is not changed. Added nodes keep
+    their coordinates.
+    """
+    nodes = _diff({node['id']: node for node in old['nodes']},
+                  {node['id']: node for node in new['nodes']}, POSITION_KEYS)
+    links = _diff({link_id(link): link for link in old['links']},
+                  {link_id(link): link for link in new['links']}, ())
+    return {'nodes': nodes, 'links': links}
+
+
+def _diff(old: Dict[str, Dict[str, Any]], new: Dict[str, Dict[str, Any]], ignored) -> Dict[str, List[Any]]:
+    added, changed = [], []
+    for key, item in new.items():
+        previous = old.get(key)
+        if previous is None:
+            added.append(item)
+        elif item != previous:
+            stripped = {name: value for name, value in item.items() if name not in ignored}
+            if stripped != {name: value for name, value in previous.items() if name not in ignored}:
+                changed.append(stripped)
+    removed = [key for key in old if key not in new]
+    return {'added': added, 'removed': removed, 'changed': changed}
+
+
+def is_empty(diff: Dict[str, Any]) -> bool:
+    return not any(diff[part][kind] for part in ('nodes', 'links') for kind in ('added', 'removed', 'changed'))
+
+
+def apply_diff(viz_data: Dict[str, Any], diff: Dict[str, Any]) -> Dict[str, Any]:
+    """The payload a diff leads to from viz_data, as the browser applies it (viz_data is not modified)"""
+    nodes = {node['id']: node for node in viz_data['nodes']}
+    links = {link_id(link): link for link in viz_data['links']}
+    for items, part, key in ((nodes, diff['nodes'], lambda node: node['id']), (links, diff['links'], link_id)):
+        for removed in part['removed']:
+            items.pop(removed, None)
+        for item in part['added']:
+            items[key(item)] = item
+        for item in part['changed']:
+            items[key(item)] = dict(items.get(key(item), {}), **item)
+    return dict(viz_data, nodes=list(nodes.values()), links=list(links.values()))
+
+
+class PayloadHistory:
+    """Last visualization payload sent for each folder, to answer the next analysis with a diff
+
+    Every payload gets a ``version``, which only changes with the graph.
+    A client that sends back the version it shows (``since``) receives
+    ``{'delta': True, 'base': since, 'version', 'nodes', 'links', ...}``
+    with diff_payloads() parts instead of the whole graph; any other
+    client receives the full payload.
+    """
+
+    def __init__(self):
+        self._payloads: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def respond(self, key: str, viz_data: Dict[str, Any], since: Optional[int] = None) -> Dict[str, Any]:
+        with_link_ids(viz_data)
+        with self._lock:
+            previous = self._payloads.get(key)
+            diff = diff_payloads(previous, viz_data) if previous is not None else None
+            if diff is None:
+                version = 1
+            elif is_empty(diff):
+                version = previous['version']
+            else:
+                version = previous['version'] + 1
+            viz_data['version'] = version
+            self._payloads[key] = viz_data
+
+        if diff is None or since is None or int(since) != previous['version']:
+            return viz_data
+        delta = {'delta': True, 'base': previous['version'], 'version': version,
+                 'nodes': diff['nodes'], 'links': diff['links'], 'stats': viz_data.get('stats', {})}
+        if 'layout' in viz_data:
+            delta['layout'] = viz_data['layout']
+        return delta
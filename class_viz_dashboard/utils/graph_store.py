@@ -0,0 +1,447 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from utils.core_parser import iter_codebase
+from utils.parse_cache import DEFAULT_CACHE_DIR
+from utils.relationships import relationship_count
+from utils.symbols import SymbolTable
+from utils.visualization import EdgeBuilder, class_node, node_file_label
+
+DEFAULT_STORE_DIR = os.path.join(DEFAULT_CACHE_DIR, 'graphs')
+# Rows per executemany() while writing
+STORE_BATCH_ROWS = 5000
+# Default page size of the query methods
+DEFAULT_PAGE_SIZE = 200
+
+INHERITANCE_TYPES = ('inheritance', 'implements')
+
+# Tables of one analysis; analyze() and write() fill copies prefixed 'staging_' first
+_TABLES = """
+CREATE TABLE IF NOT EXISTS {prefix}classes (
+    id INTEGER PRIMARY KEY,
+    name TEXT,
+    qualname TEXT,
+    language TEXT,
+    file TEXT,
+    type TEXT,
+    docstring TEXT,
+    methods TEXT,
+    attributes TEXT,
+    extras TEXT
+);
+CREATE TABLE IF NOT EXISTS {prefix}relationships (
+    id INTEGER PRIMARY KEY,
+    source TEXT,
+    target TEXT,
+    type TEXT,
+    context TEXT,
+    file TEXT,
+    source_ref TEXT,
+    target_ref TEXT,
+    count INTEGER,
+    extras TEXT,
+    source_id INTEGER,
+    target_id INTEGER
+);
+CREATE TABLE IF NOT EXISTS {prefix}errors (id INTEGER PRIMARY KEY, message TEXT);
+"""
+_SCHEMA = "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);" + _TABLES.format(prefix='')
+_STAGING = 'staging_'
+
+# Created after bulk loading, which is faster than maintaining them row by row
+_INDEXES = """
+CREATE INDEX IF NOT EXISTS classes_name ON classes (name);
+CREATE INDEX IF NOT EXISTS classes_qualname ON classes (qualname);
+CREATE INDEX IF NOT EXISTS classes_file ON classes (file);
+CREATE INDEX IF NOT EXISTS relationships_source ON relationships (source, type);
+CREATE INDEX IF NOT EXISTS relationships_target ON relationships (target, type);
+CREATE INDEX IF NOT EXISTS relationships_type ON relationships (type);
+CREATE INDEX IF NOT EXISTS relationships_file ON relationships (file);
+CREATE INDEX IF NOT EXISTS relationships_source_id ON relationships (source_id);
+CREATE INDEX IF NOT EXISTS relationships_target_id ON relationships (target_id);
+"""
+
+_CLASS_COLUMNS = ('name', 'language', 'file', 'type', 'docstring', 'methods', 'attributes')
+_RELATIONSHIP_COLUMNS = ('source', 'target', 'type', 'context', 'file', 'source_ref', 'target_ref', 'count')
+
+
+class GraphStore:
+    """Classes and relationships of one analysis in an SQLite database.
+
+    Rows are written in batches while the analysis streams in, so the
+    whole graph never has to be in memory, and are indexed by name, file,
+    source, target and type once loaded. Relationship endpoints are
+    resolved to class ids with utils.symbols.SymbolTable (NULL for
+    classes outside the analysis).
+
+    The query methods return plain dicts shaped like the analysis
+    structure's and take ``limit``/``offset`` for paging; the matching
+    count_* methods give the totals. A new analysis is written and
+    resolved in staging tables through a second connection, so queries
+    keep answering from the previous one until it is copied over.
+    """
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        # Held by analyze() and write() from start to end, so only one fills the staging tables
+        self._write_lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        # Readers are not blocked while the staging tables are written
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    @classmethod
+    def for_root(cls, root_folder: str, store_dir: str = DEFAULT_STORE_DIR) -> 'GraphStore':
+        """The store of an analysis root, kept under store_dir"""
+        digest = hashlib.sha256(os.path.abspath(root_folder).encode('utf-8')).hexdigest()[:16]
+        return cls(os.path.join(store_dir, f"{digest}.sqlite3"))
+
+    # Writing -----------------------------------------------------------
+
+    def analyze(self, root_folder: str, workers: int = 1, cache: Optional[Any] = None) -> Dict[str, Any]:
+        """Replace the contents with a fresh analysis of root_folder, streamed into the store"""
+        meta = {'root_folder': root_folder, 'files_processed': 0, 'languages': set()}
+
+        def fill(writer: _BatchWriter) -> None:
+            for filepath, partial in iter_codebase(root_folder, workers=workers, cache=cache):
+                if filepath is not None:
+                    meta['files_processed'] += 1
+                if partial.get('language'):
+                    meta['languages'].add(partial['language'])
+                writer.add(partial)
+
+        self._replace(meta, fill)
+        return meta
+
+    def write(self, structure: Mapping[str, Any]) -> None:
+        """Replace the contents with an analysis structure (dict or CompactStructure)"""
+        self._replace(dict(structure.get('_meta', {})), lambda writer: writer.add(structure))
+
+    def _replace(self, meta: Dict[str, Any], fill: Callable[['_BatchWriter'], None]) -> None:
+        """Fill and resolve the staging tables, then copy them over the live ones under the lock"""
+        with self._write_lock:
+            staging = sqlite3.connect(self.path)
+            try:
+                for table in ('classes', 'relationships', 'errors'):
+                    staging.execute(f"DROP TABLE IF EXISTS {_STAGING}{table}")
+                staging.executescript(_TABLES.format(prefix=_STAGING))
+                writer = _BatchWriter(staging, _STAGING)
+                fill(writer)
+                writer.flush()
+                _resolve(staging, meta, _STAGING)
+                staging.commit()
+            finally:
+                staging.close()
+
+            with self._lock:
+                conn = self._conn
+                self._clear()
+                for table in ('classes', 'relationships', 'errors'):
+                    conn.execute(f"INSERT INTO {table} SELECT * FROM {_STAGING}{table}")
+                    conn.execute(f"DROP TABLE {_STAGING}{table}")
+                conn.executescript(_INDEXES)
+                conn.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)",
+                                 [(key, json.dumps(value, default=list)) for key, value in meta.items()])
+                conn.commit()
+
+    def _clear(self) -> None:
+        for table in ('meta', 'classes', 'relationships', 'errors'):
+            self._conn.execute(f"DELETE FROM {table}")
+        for name, in self._conn.execute("SELECT name FROM sqlite_master WHERE type = 'index' "
+                                        "AND sql IS NOT NULL").fetchall():
+            self._conn.execute(f"DROP INDEX {name}")
+
+    # Queries -----------------------------------------------------------
+
+    def meta(self) -> Dict[str, Any]:
+        with self._lock:
+            return {key: json.loads(value) for key, value in self._conn.execute("SELECT key, value FROM meta")}
+
+    def classes(self, name: Optional[str] = None, file: Optional[str] = None, language: Optional[str] = None,
+                limit: int = DEFAULT_PAGE_SIZE, offset: int = 0) -> List[Dict[str, Any]]:
+        """Classes matching every given filter, in analysis order"""
+        where, params = _where(name=name, file=file, language=language)
+        rows = self._query(f"SELECT * FROM classes{where} ORDER BY id LIMIT ? OFFSET ?", params + [limit, offset])
+        return [_class_record(row) for row in rows]
+
+    def count_classes(self, name: Optional[str] = None, file: Optional[str] = None,
+                      language: Optional[str] = None) -> int:
+        where, params = _where(name=name, file=file, language=language)
+        return self._query(f"SELECT COUNT(*) FROM classes{where}", params)[0][0]
+
+    def relationships(self, source: Optional[str] = None, target: Optional[str] = None,
+                      types: Optional[Sequence[str]] = None, file: Optional[str] = None,
+                      limit: int = DEFAULT_PAGE_SIZE, offset: int = 0) -> List[Dict[str, Any]]:
+        """Relationships matching every given filter, in analysis order"""
+        where, params = _where(source=source, target=target, type=types, file=file)
+        rows = self._query(f"SELECT * FROM relationships{where} ORDER BY id LIMIT ? OFFSET ?",
+                           params + [limit, offset])
+        return [_relationship_record(row) for row in rows]
+
+    def count_relationships(self, source: Optional[str] = None, target: Optional[str] = None,
+                            types: Optional[Sequence[str]] = None, file: Optional[str] = None) -> int:
+        where, params = _where(source=source, target=target, type=types, file=file)
+        return self._query(f"SELECT COUNT(*) FROM relationships{where}", params)[0][0]
+
+    def relationship_types(self) -> Dict[str, int]:
+        """Number of relationships of each type"""
+        return {rel_type: count for rel_type, count in
+                self._query("SELECT type, COUNT(*) FROM relationships GROUP BY type ORDER BY type")}
+
+    def inheritors(self, name: str, transitive: bool = False, limit: int = DEFAULT_PAGE_SIZE,
+                   offset: int = 0) -> List[Dict[str, Any]]:
+        """Classes that extend or implement the class called name
+
+        With ``transitive`` their inheritors are included too, following
+        resolved relationships only.
+        """
+        if not transitive:
+            return [self._class_by_id(rel['target_id']) or {'name': rel['target'], 'file': rel['file']}
+                    for rel in self.relationships(source=name, types=INHERITANCE_TYPES, limit=limit, offset=offset)]
+
+        placeholders = ', '.join('?' * len(INHERITANCE_TYPES))
+        rows = self._query(f"""
+            WITH RECURSIVE inheritors(id) AS (
+                SELECT target_id FROM relationships
+                WHERE source = ? AND type IN ({placeholders}) AND target_id IS NOT NULL
+                UNION
+                SELECT r.target_id FROM relationships r JOIN inheritors i ON r.source_id = i.id
+                WHERE r.type IN ({placeholders}) AND r.target_id IS NOT NULL
+            )
+            SELECT classes.* FROM classes JOIN inheritors ON classes.id = inheritors.id
+            ORDER BY classes.id LIMIT ? OFFSET ?""",
+                           [name, *INHERITANCE_TYPES, *INHERITANCE_TYPES, limit, offset])
+        return [_class_record(row) for row in rows]
+
+    def dependencies(self, name: str, types: Sequence[str] = ('dependency',), limit: int = DEFAULT_PAGE_SIZE,
+                     offset: int = 0) -> List[Dict[str, Any]]:
+        """Relationships from the class called name to the classes it depends on"""
+        return self.relationships(source=name, types=types, limit=limit, offset=offset)
+
+    def dependents(self, name: str, types: Sequence[str] = ('dependency',), limit: int = DEFAULT_PAGE_SIZE,
+                   offset: int = 0) -> List[Dict[str, Any]]:
+        """Relationships from other classes to the class called name"""
+        return self.relationships(target=name, types=types, limit=limit, offset=offset)
+
+    def edges_in_file(self, filepath: str, limit: int = DEFAULT_PAGE_SIZE, offset: int = 0) -> List[Dict[str, Any]]:
+        """Relationships found in one file"""
+        return self.relationships(file=filepath, limit=limit, offset=offset)
+
+    def errors(self, limit: int = DEFAULT_PAGE_SIZE, offset: int = 0) -> List[str]:
+        return [row[0] for row in self._query("SELECT message FROM errors ORDER BY id LIMIT ? OFFSET ?",
+                                              [limit, offset])]
+
+    def visualization_page(self, offset: int = 0, limit: int = DEFAULT_PAGE_SIZE) -> Dict[str, Any]:
+        """generate_visualization_data() payload for one page of classes
+
+        The page holds ``limit`` classes from ``offset`` on, the edges that
+        start or end at them and the classes at the other end of those
+        edges, so every edge can be drawn.
+        """
+        root_folder = self.meta().get('root_folder')
+        page = self._query("SELECT * FROM classes ORDER BY id LIMIT ? OFFSET ?", [limit, offset])
+        if not page:
+            return {'nodes': [], 'links': [], 'stats': self._page_stats(0, 0, offset, limit)}
+
+        low, high = page[0]['id'], page[-1]['id']
+        edges = self._query("SELECT * FROM relationships WHERE source_id BETWEEN ? AND ? "
+                            "UNION SELECT * FROM relationships WHERE target_id BETWEEN ? AND ? ORDER BY id",
+                            [low, high, low, high])
+        classes = {row['id']: row for row in page}
+        missing = sorted({row[key] for row in edges for key in ('source_id', 'target_id')
+                          if row[key] is not None and row[key] not in classes})
+        for chunk in _chunks(missing, 500):
+            rows = self._query(f"SELECT * FROM classes WHERE id IN ({', '.join('?' * len(chunk))})", chunk)
+            classes.update((row['id'], row) for row in rows)
+        # Unresolved sources named like a class of the analysis were ambiguous, not external
+        unresolved = sorted({row['source'] for row in edges if row['source_id'] is None})
+        defined = set()
+        for chunk in _chunks(unresolved, 500):
+            rows = self._query(f"SELECT DISTINCT name FROM classes WHERE name IN ({', '.join('?' * len(chunk))})",
+                               chunk)
+            defined.update(row[0] for row in rows)
+
+        nodes = []
+        node_ids: Dict[Any, str] = {}
+        created_nodes = set()
+        for class_id, row in sorted(classes.items()):
+            cls = _class_record(row)
+            node_id = node_ids[class_id] = f"{cls['name']}::{node_file_label(cls['file'], root_folder)}"
+            if node_id not in created_nodes:
+                nodes.append(class_node(node_id, cls))
+                created_nodes.add(node_id)
+
+        # Like generate_visualization_data(), sources that are not classes of the analysis become external nodes
+        edge_builder = EdgeBuilder()
+        for row in edges:
+            source_node = node_ids.get(row['source_id'])
+            if row['source_id'] is None and row['source'] not in defined:
+                source_node = f"{row['source']}::external"
+                if source_node not in created_nodes:
+                    nodes.append(class_node(source_node, {'name': row['source'], 'type': 'class',
+                                                          'language': 'unknown', 'file': 'external',
+                                                          'methods': [], 'bases': []}))
+                    created_nodes.add(source_node)
+            target_node = node_ids.get(row['target_id'])
+            if source_node and target_node:
+                edge_builder.add(source_node, target_node, row['type'], row['count'] or 1)
+        links = edge_builder.links()
+        return {'nodes': nodes, 'links': links, 'stats': self._page_stats(len(nodes), len(links), offset, limit)}
+
+    def _page_stats(self, nodes: int, links: int, offset: int, limit: int) -> Dict[str, Any]:
+        return {
+            'total_classes': nodes,
+            'total_relationships': links,
+            'files_processed': self.meta().get('files_processed', 0),
+            'offset': offset,
+            'limit': limit,
+            'classes_in_store': self.count_classes(),
+        }
+
+    def _class_by_id(self, class_id: Optional[int]) -> Optional[Dict[str, Any]]:
+        if class_id is None:
+            return None
+        rows = self._query("SELECT * FROM classes WHERE id = ?", [class_id])
+        return _class_record(rows[0]) if rows else None
+
+    def _query(self, sql: str, params: Sequence[Any] = ()) -> List[sqlite3.Row]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class _BatchWriter:
+    """Inserts classes, relationships and errors in batches of STORE_BATCH_ROWS"""
+
+    def __init__(self, conn: sqlite3.Connection, prefix: str = ''):
+        self.conn = conn
+        self.prefix = prefix
+        self.classes: List[Tuple[Any, ...]] = []
+        self.relationships: List[Tuple[Any, ...]] = []
+        self.errors: List[Tuple[str]] = []
+
+    def add(self, structure: Mapping[str, Any]) -> None:
+        for cls in structure['classes']:
+            self.classes.append((
+                cls['name'], cls.get('language'), cls['file'], cls.get('type'), cls.get('docstring'),
+                json.dumps(cls.get('methods', [])),
+                json.dumps(cls['attributes']) if 'attributes' in cls else None,
+                _extras(cls, _CLASS_COLUMNS),
+            ))
+        for rel in structure['relationships']:
+            self.relationships.append((
+                rel['source'], rel['target'], rel.get('type'), rel.get('context'), rel['file'],
+                rel.get('source_ref'), rel.get('target_ref'), relationship_count(rel),
+                _extras(rel, _RELATIONSHIP_COLUMNS),
+            ))
+        self.errors.extend((error,) for error in structure['errors'])
+        if len(self.classes) + len(self.relationships) >= STORE_BATCH_ROWS:
+            self.flush()
+
+    def flush(self) -> None:
+        prefix = self.prefix
+        self.conn.executemany(f"INSERT INTO {prefix}classes (name, language, file, type, docstring, methods, "
+                              "attributes, extras) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", self.classes)
+        self.conn.executemany(f"INSERT INTO {prefix}relationships (source, target, type, context, file, "
+                              "source_ref, target_ref, count, extras) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                              self.relationships)
+        self.conn.executemany(f"INSERT INTO {prefix}errors (message) VALUES (?)", self.errors)
+        self.classes, self.relationships, self.errors = [], [], []
+
+
+def _resolve(conn: sqlite3.Connection, meta: Dict[str, Any], prefix: str = '') -> None:
+    """Fill in the qualified names and the endpoint class ids of the written rows"""
+    classes, relationships = f"{prefix}classes", f"{prefix}relationships"
+    symbols = SymbolTable(meta.get('root_folder'))
+    if symbols.root_folder is None:
+        directories = {os.path.dirname(f) for f, in conn.execute(f"SELECT DISTINCT file FROM {classes}")}
+        symbols.root_folder = os.path.commonpath(directories) if directories else None
+    meta['root_folder'] = symbols.root_folder
+
+    # Class ids are 1-based row ids in insertion order, symbol table indexes 0-based
+    rows = conn.execute(f"SELECT id, name, file FROM {classes} ORDER BY id").fetchall()
+    qualnames = [(symbols.add(name, filepath), class_id) for class_id, name, filepath in rows]
+    conn.executemany(f"UPDATE {classes} SET qualname = ? WHERE id = ?", qualnames)
+
+    update = f"UPDATE {relationships} SET source_id = ?, target_id = ? WHERE id = ?"
+    updates = []
+    cursor = conn.execute(f"SELECT id, source, target, file, source_ref, target_ref FROM {relationships}")
+    for rel_id, source, target, filepath, source_ref, target_ref in cursor:
+        source_index = symbols.resolve(source, filepath, source_ref)
+        target_index = symbols.resolve(target, filepath, target_ref)
+        updates.append((rows[source_index][0] if source_index is not None else None,
+                        rows[target_index][0] if target_index is not None else None, rel_id))
+        if len(updates) >= STORE_BATCH_ROWS:
+            conn.executemany(update, updates)
+            updates = []
+    conn.executemany(update, updates)
+
+
+def _extras(record: Mapping[str, Any], columns: Tuple[str, ...]) -> Optional[str]:
+    extras = {k: v for k, v in record.items() if k not in columns}
+    return json.dumps(extras) if extras else None
+
+
+def _class_record(row: sqlite3.Row) -> Dict[str, Any]:
+    record = {
+        'name': row['name'],
+        'qualname': row['qualname'],
+        'language': row['language'],
+        'file': row['file'],
+        'methods': json.loads(row['methods']),
+    }
+    if row['attributes'] is not None:
+        record['attributes'] = json.loads(row['attributes'])
+    record['type'] = row['type']
+    record['docstring'] = row['docstring']
+    if row['extras']:
+        record.update(json.loads(row['extras']))
+    return record
+
+
+def _relationship_record(row: sqlite3.Row) -> Dict[str, Any]:
+    record = {'source': row['source'], 'target': row['target'], 'type': row['type']}
+    if row['context'] is not None:
+        record['context'] = row['context']
+    record['file'] = row['file']
+    for key in ('source_ref', 'target_ref'):
+        if row[key] is not None:
+            record[key] = row[key]
+    record['count'] = row['count']
+    if row['extras']:
+        record.update(json.loads(row['extras']))
+    record['source_id'] = row['source_id']
+    record['target_id'] = row['target_id']
+    return record
+
+
+def _where(**filters: Any) -> Tuple[str, List[Any]]:
+    """WHERE clause for the filters that are set; a sequence matches any of its values"""
+    clauses, params = [], []
+    for column, value in filters.items():
+        if value is None:
+            continue
+        if isinstance(value, (list, tuple)):
+            clauses.append(f"{column} IN ({', '.join('?' * len(value))})")
+            params.extend(value)
+        else:
+            clauses.append(f"{column} = ?")
+            params.append(value)
+    return (' WHERE ' + ' AND '.join(clauses) if clauses else ''), params
+
+
+def _chunks(items: List[Any], size: int) -> Iterable[List[Any]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
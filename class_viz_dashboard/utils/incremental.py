@@ -0,0 +1,134 @@
+import os
+import subprocess
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from utils.compact import CompactStructure
+from utils.core_parser import analyze_codebase, iter_files, merge_partial
+from utils.discovery import DEFAULT_EXCLUDES, DEFAULT_MAX_FILE_SIZE, FileDiscovery
+from utils.spill import SpilledStructure
+
+
+def git_changed_files(root_folder: str, base_rev: str, head_rev: str = 'HEAD',
+                      discovery: Optional[FileDiscovery] = None) -> Dict[str, List[str]]:
+    """Files under root_folder that were added, modified or deleted between two revisions
+
+    Paths are joined onto root_folder the same way analyze_codebase() builds
+    them. A rename counts as deleting the old path and adding the new one.
+    Only files ``discovery`` would find are reported; it defaults to a
+    FileDiscovery of root_folder with default settings.
+    """
+    output = subprocess.run(
+        ['git', '-C', root_folder, 'diff', '--name-status', '-z', '-M', '--relative', base_rev, head_rev],
+        capture_output=True, text=True, check=True
+    ).stdout
+
+    changes = {'added': [], 'modified': [], 'deleted': []}
+    fields = output.split('\0')
+    position = 0
+    while position < len(fields) and fields[position]:
+        status = fields[position][0]
+        if status in ('R', 'C'):
+            old_path, new_path = fields[position + 1], fields[position + 2]
+            position += 3
+            if status == 'R':
+                changes['deleted'].append(old_path)
+            changes['added'].append(new_path)
+            continue
+
+        path = fields[position + 1]
+        position += 2
+        if status == 'A':
+            changes['added'].append(path)
+        elif status == 'D':
+            changes['deleted'].append(path)
+        else:
+            changes['modified'].append(path)
+
+    if discovery is None:
+        discovery = FileDiscovery(root_folder)
+    changed_files = {}
+    for kind, paths in changes.items():
+        filepaths = [os.path.join(root_folder, os.path.normpath(path)) for path in paths]
+        changed_files[kind] = [filepath for filepath in filepaths if discovery.is_included(filepath)]
+    return changed_files
+
+
+def update_structure(structure: Dict[str, Any], changed: Iterable[str], deleted: Iterable[str],
+                     workers: int = 1, cache: Optional[Any] = None, profile: bool = False,
+                     pool: Optional[Any] = None) -> Dict[str, Any]:
+    """Patch an analysis result for changed and deleted files and return it
+
+    Classes, relationships and errors coming from any of the files are
+    dropped, then the changed files that still exist are parsed again
+    (with per-file stats if ``profile`` is set). A dict is patched
+    in place; a CompactStructure or SpilledStructure, whose records cannot
+    be replaced, is rebuilt as a new structure of the same type.
+    """
+    changed = list(changed)
+    affected = set(changed) | set(deleted)
+    error_prefixes = tuple(f"Error processing {filepath}: " for filepath in affected)
+
+    if isinstance(structure, dict):
+        structure['classes'][:] = [cls for cls in structure['classes'] if cls['file'] not in affected]
+        structure['relationships'][:] = [
+            rel for rel in structure['relationships'] if rel.get('file') not in affected
+        ]
+        structure['errors'][:] = [error for error in structure['errors'] if not error.startswith(error_prefixes)]
+    else:
+        structure = _without_files(structure, affected, error_prefixes)
+
+    existing = [filepath for filepath in changed if os.path.isfile(filepath)]
+    for _, partial in iter_files(existing, workers=workers, cache=cache, pool=pool, profile=profile):
+        merge_partial(structure, partial)
+    return structure
+
+
+def _without_files(structure: Any, affected: Set[str], error_prefixes: Tuple[str, ...]) -> Any:
+    """Copy of a CompactStructure or SpilledStructure without the records of the affected files"""
+    if isinstance(structure, SpilledStructure):
+        kept = SpilledStructure(structure.memory_budget, structure.spill_dir)
+    else:
+        kept = type(structure)()
+    kept['_meta'].update(structure['_meta'], languages=set(structure['_meta'].get('languages', ())))
+    kept['_meta'].pop('spill', None)
+    kept['classes'].extend(cls for cls in structure['classes'] if cls['file'] not in affected)
+    kept['relationships'].extend(rel for rel in structure['relationships'] if rel.get('file') not in affected)
+    kept['errors'].extend(error for error in structure['errors'] if not error.startswith(error_prefixes))
+    return kept
+
+
+def update_from_git(previous: Dict[str, Any], root_folder: str, base_rev: str, head_rev: str = 'HEAD',
+                    workers: int = 1, cache: Optional[Any] = None, **options: Any) -> Dict[str, Any]:
+    """Bring the analysis of base_rev up to date with head_rev
+
+    ``options`` are those of analyze_codebase(): ``excludes`` and
+    ``max_file_size`` select the changed files, ``pool`` and ``profile``
+    apply to parsing them and ``compact`` turns a dict result into a
+    CompactStructure. Falls back to a full analysis with every option
+    when git cannot produce the diff.
+    """
+    discovery = FileDiscovery(root_folder, excludes=options.get('excludes', DEFAULT_EXCLUDES),
+                              max_size=options.get('max_file_size', DEFAULT_MAX_FILE_SIZE))
+    try:
+        changes = git_changed_files(root_folder, base_rev, head_rev, discovery=discovery)
+    except (OSError, subprocess.CalledProcessError) as e:
+        structure = analyze_codebase(root_folder, workers=workers, cache=cache, **options)
+        structure['errors'].append(f"Git diff {base_rev}..{head_rev} failed, ran a full analysis: {str(e)}")
+        return structure
+
+    structure = update_structure(previous, changes['added'] + changes['modified'], changes['deleted'],
+                                 workers=workers, cache=cache, profile=options.get('profile', False),
+                                 pool=options.get('pool'))
+    if options.get('compact') and not isinstance(structure, CompactStructure):
+        structure = CompactStructure.from_structure(structure)
+
+    meta = structure['_meta']
+    meta['files_processed'] = meta.get('files_processed', 0) + len(changes['added']) - len(changes['deleted'])
+    meta['incremental'] = {
+        'base_rev': base_rev,
+        'head_rev': head_rev,
+        'added': len(changes['added']),
+        'modified': len(changes['modified']),
+        'deleted': len(changes['deleted']),
+    }
+    return structure
@@ -0,0 +1,213 @@
+import os
+import time
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from javalang.parser import Parser
+from javalang.tokenizer import tokenize
+from javalang.tree import (ClassCreator, ClassDeclaration, CompilationUnit, ConstructorDeclaration,
+                           EnumDeclaration, FieldDeclaration, InterfaceDeclaration, MethodDeclaration,
+                           ReferenceType, TypeDeclaration)
+from javalang.util import LookAheadListIterator
+
+from utils.discovery import read_source
+from utils.profiling import PhaseTimer
+from utils.relationships import RelationshipCollector
+from utils.symbols import with_ref
+
+# Per-file limits for javalang, which is pure Python and can take minutes on huge generated sources
+JAVA_PARSE_SIZE_BUDGET = 1024 * 1024
+JAVA_PARSE_TIME_BUDGET = 10.0
+
+
+class ParseBudgetExceeded(Exception):
+    """A source file was too large or took too long to parse
+
+    ``transient`` is set for the time budget: a parse that ran out of time
+    may succeed on a less loaded machine, so its result is not cached.
+    """
+
+    def __init__(self, message: str, transient: bool = False):
+        super().__init__(message)
+        self.transient = transient
+
+
+def parse_java_file(filepath: str, structure: Dict[str, Any], phases: Optional[PhaseTimer] = None) -> None:
+    """Parse Java files and extract OOP relationships"""
+    phases = phases or PhaseTimer()
+    size = os.path.getsize(filepath)
+    if size > JAVA_PARSE_SIZE_BUDGET:
+        raise ParseBudgetExceeded(f"{size} bytes exceeds the {JAVA_PARSE_SIZE_BUDGET} byte budget")
+    with phases('read'):
+        source = read_source(filepath)
+    with phases('java_parse'):
+        tree = parse_java_source(source, time_budget=JAVA_PARSE_TIME_BUDGET)
+
+    with phases('extract'):
+        JavaStructureVisitor(filepath).visit(tree).emit(structure)
+    return structure
+
+
+class JavaStructureVisitor:
+    """Collects classes and OOP relationships from a Java compilation unit.
+
+    Only type declarations and their members are visited; method bodies and
+    expressions are never entered, unlike iterating the whole javalang tree.
+    Classes and interfaces come out in the same pre-order as that iteration,
+    except for local classes declared inside method bodies, which are not
+    reached.
+
+    Besides inheritance and implements edges, field types give composition
+    (field initialized with ``new``) or aggregation edges and constructor and
+    method parameter types give dependency edges, mirroring the Python
+    extractor.
+    """
+
+    def __init__(self, filepath: str):
+        self.filepath = filepath
+        self.types: List[TypeDeclaration] = []
+        # Simple name -> qualified name of single-type imports, for utils.symbols
+        self.imports: Dict[str, str] = {}
+
+    def visit(self, tree: CompilationUnit) -> 'JavaStructureVisitor':
+        """Record every class and interface declaration, nested ones included"""
+        for declaration in tree.imports:
+            if not declaration.static and not declaration.wildcard:
+                self.imports[declaration.path.rsplit('.', 1)[-1]] = declaration.path
+
+        stack = list(reversed(tree.types))
+        while stack:
+            node = stack.pop()
+            if isinstance(node, (ClassDeclaration, InterfaceDeclaration)):
+                self.types.append(node)
+            members = node.body.declarations if isinstance(node, EnumDeclaration) else node.body
+            stack.extend(reversed([m for m in members or () if isinstance(m, TypeDeclaration)]))
+        return self
+
+    def emit(self, structure: Dict[str, Any]) -> None:
+        """Append the collected classes and relationships to structure"""
+        filepath = self.filepath
+        relationships = RelationshipCollector(structure['relationships'])
+        imports = self.imports
+
+        for node in self.types:
+            fields = [m for m in node.body if isinstance(m, FieldDeclaration)]
+            structure['classes'].append({
+                'name': node.name,
+                'language': 'java',
+                'file': filepath,
+                'methods': [m.name for m in node.methods],
+                'attributes': [d.name for field in fields for d in field.declarators],
+                'type': 'interface' if isinstance(node, InterfaceDeclaration) else 'class',
+                'docstring': node.documentation or ''
+            })
+
+            if isinstance(node, ClassDeclaration):
+                if node.extends:
+                    relationships.add(with_ref({
+                        'source': node.extends.name,
+                        'target': node.name,
+                        'type': 'inheritance',
+                        'file': filepath
+                    }, 'source_ref', _reference(node.extends, imports)))
+
+                for interface in node.implements or ():
+                    relationships.add(with_ref({
+                        'source': interface.name,
+                        'target': node.name,
+                        'type': 'implements',
+                        'file': filepath
+                    }, 'source_ref', _reference(interface, imports)))
+
+            type_parameters = {p.name for p in node.type_parameters or ()}
+            for member in node.body:
+                if isinstance(member, FieldDeclaration):
+                    for declarator in member.declarators:
+                        rel_type = 'composition' if isinstance(declarator.initializer, ClassCreator) else 'aggregation'
+                        for target, ref in _type_names(member.type, type_parameters, imports):
+                            relationships.add(with_ref({
+                                'source': node.name,
+                                'target': target,
+                                'type': rel_type,
+                                'context': f'Attribute: {declarator.name}',
+                                'file': filepath
+                            }, 'target_ref', ref))
+
+                elif isinstance(member, (ConstructorDeclaration, MethodDeclaration)):
+                    scope = type_parameters | {p.name for p in member.type_parameters or ()}
+                    for parameter in member.parameters:
+                        for target, ref in _type_names(parameter.type, scope, imports):
+                            relationships.add(with_ref({
+                                'source': node.name,
+                                'target': target,
+                                'type': 'dependency',
+                                'context': f'Parameter in {member.name}()',
+                                'file': filepath
+                            }, 'target_ref', ref))
+
+
+def _type_names(type_node: Any, type_parameters: Set[str],
+                imports: Dict[str, str]) -> Iterator[Tuple[str, Optional[str]]]:
+    """(name, reference) of the classes a declared type refers to: the type itself, then its type arguments
+
+    Primitive types and the enclosing type parameters are skipped; for a
+    qualified name like java.util.List only the last part is the name.
+    """
+    if not isinstance(type_node, ReferenceType):
+        return
+    ref = _reference(type_node, imports)
+    while type_node.sub_type is not None:
+        type_node = type_node.sub_type
+    if type_node.name not in type_parameters:
+        yield type_node.name, ref
+    for argument in type_node.arguments or ():
+        yield from _type_names(argument.type, type_parameters, imports)
+
+
+def _reference(type_node: ReferenceType, imports: Dict[str, str]) -> Optional[str]:
+    """Qualified name of a type as written (a.b.C) or as imported, if known"""
+    if type_node.sub_type is None:
+        return imports.get(type_node.name)
+    names = [type_node.name]
+    while type_node.sub_type is not None:
+        type_node = type_node.sub_type
+        names.append(type_node.name)
+    return '.'.join(names)
+
+
+class _BudgetedTokens(LookAheadListIterator):
+    """Token stream that aborts the parse once the deadline has passed"""
+
+    def __init__(self, tokens: LookAheadListIterator, deadline: float, time_budget: float):
+        super().__init__(tokens.list)
+        self.set_default(tokens.default)
+        self.deadline = deadline
+        self.time_budget = time_budget
+
+    def __next__(self):
+        if time.perf_counter() > self.deadline:
+            raise ParseBudgetExceeded(f"parsing took longer than the {self.time_budget:g}s budget",
+                                      transient=True)
+        return super().__next__()
+
+
+def parse_java_source(source: str, time_budget: Optional[float] = None) -> CompilationUnit:
+    """Parse Java source with javalang, giving up after time_budget seconds
+
+    The budget is checked while tokens are consumed, so it works in any
+    thread and in worker processes alike.
+    """
+    if time_budget is None:
+        return Parser(tokenize(source)).parse()
+
+    deadline = time.perf_counter() + time_budget
+    parser = Parser(_tokenize_until(source, deadline, time_budget))
+    parser.tokens = _BudgetedTokens(parser.tokens, deadline, time_budget)
+    return parser.parse()
+
+
+def _tokenize_until(source: str, deadline: float, time_budget: float) -> Iterator[Any]:
+    for count, token in enumerate(tokenize(source)):
+        if not count % 256 and time.perf_counter() > deadline:
+            raise ParseBudgetExceeded(f"tokenizing took longer than the {time_budget:g}s budget",
+                                      transient=True)
+        yield token
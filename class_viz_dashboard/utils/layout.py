@@ -0,0 +1,367 @@
+import hashlib
+import json
+import math
+import os
+import threading
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # Clients fall back to their own physics
+    np = None
+
+from utils.parse_cache import DEFAULT_CACHE_DIR
+
+LAYOUT_MODES = ('force', 'hierarchical')
+DEFAULT_LAYOUT_DIR = os.path.join(DEFAULT_CACHE_DIR, 'layouts')
+DEFAULT_LAYOUT_MAX_BYTES = 64 * 1024 * 1024
+# Ideal edge length and the gap between nodes of a layer, in vis.js pixels
+LAYOUT_NODE_SPACING = 150.0
+LAYOUT_LAYER_SPACING = 200.0
+# Force-directed iterations from scratch and from cached positions
+LAYOUT_ITERATIONS = 100
+LAYOUT_WARM_ITERATIONS = 30
+# Above this many nodes repulsion is computed against a LAYOUT_GRID_CELLS^2 grid of cell centroids
+LAYOUT_EXACT_NODES = 2500
+LAYOUT_GRID_CELLS = 32
+# Node rows handled at once by the exact repulsion, bounding its memory to rows x nodes
+LAYOUT_CHUNK_ROWS = 512
+# Pull towards the origin that keeps disconnected components together
+LAYOUT_GRAVITY = 0.05
+# Barycenter ordering sweeps of the hierarchical layout
+LAYOUT_SWEEPS = 8
+# Relationship types that place a node below another in the hierarchical layout
+HIERARCHY_TYPES = ('inheritance', 'implements')
+
+Positions = Dict[str, Tuple[float, float]]
+
+
+def compute_layout(node_ids: Sequence[str], links: Iterable[Tuple[str, str, str]], mode: str = 'force',
+                   initial: Optional[Positions] = None, seed: int = 0) -> Positions:
+    """x/y coordinates of every node, computed with NumPy
+
+    ``links`` are (from, to, type) triples. ``mode`` 'force' runs a
+    Fruchterman-Reingold layout; 'hierarchical' puts each class one layer
+    below its parents (HIERARCHY_TYPES edges) and orders every layer by
+    the barycenters of the layer above, with the classes that take part
+    in no hierarchy in a grid underneath. Positions in ``initial`` are
+    the starting point: a warm force layout runs LAYOUT_WARM_ITERATIONS
+    iterations at a low temperature, and a warm hierarchical layout keeps
+    the previous order within each layer.
+    """
+    if mode not in LAYOUT_MODES:
+        raise ValueError(f"Unknown layout mode {mode!r}, expected one of {', '.join(LAYOUT_MODES)}")
+    index = {node_id: position for position, node_id in enumerate(node_ids)}
+    edges = [(index[source], index[target], rel_type) for source, target, rel_type in links
+             if source in index and target in index and source != target]
+    n = len(node_ids)
+    if not n:
+        return {}
+    rng = np.random.default_rng(seed)
+    known = np.zeros(n, dtype=bool)
+    start = np.zeros((n, 2))
+    for node_id, position in (initial or {}).items():
+        if node_id in index:
+            start[index[node_id]] = position
+            known[index[node_id]] = True
+
+    if mode == 'force':
+        src = np.array([edge[0] for edge in edges], dtype=np.int64)
+        dst = np.array([edge[1] for edge in edges], dtype=np.int64)
+        coordinates = _force_layout(start, known, src, dst, rng)
+    else:
+        hierarchy = [edge for edge in edges if edge[2] in HIERARCHY_TYPES]
+        src = np.array([edge[0] for edge in hierarchy], dtype=np.int64)
+        dst = np.array([edge[1] for edge in hierarchy], dtype=np.int64)
+        coordinates = _layered_layout(n, src, dst, start[:, 0] if known.any() else None)
+    return {node_id: (round(float(x), 1), round(float(y), 1)) for node_id, (x, y) in zip(node_ids, coordinates)}
+
+
+def _force_layout(start: 'np.ndarray', known: 'np.ndarray', src: 'np.ndarray', dst: 'np.ndarray',
+                  rng: 'np.random.Generator') -> 'np.ndarray':
+    n = len(start)
+    k = LAYOUT_NODE_SPACING
+    radius = k * np.sqrt(n)
+    pos = start.copy()
+    warm = known.any()
+
+    # New nodes start next to their placed neighbours, or anywhere in the disc
+    unknown = ~known
+    if warm and unknown.any() and len(src):
+        sums = np.zeros((n, 2))
+        counts = np.zeros(n)
+        for a, b in ((src, dst), (dst, src)):
+            placed = known[b]
+            np.add.at(sums, a[placed], pos[b[placed]])
+            counts += np.bincount(a[placed], minlength=n)
+        near = unknown & (counts > 0)
+        pos[near] = sums[near] / counts[near, None] + rng.normal(0, k / 2, (near.sum(), 2))
+        unknown &= ~near
+    angles = rng.uniform(0, 2 * np.pi, unknown.sum())
+    radii = radius * np.sqrt(rng.uniform(0, 1, unknown.sum()))
+    pos[unknown] = np.column_stack((radii * np.cos(angles), radii * np.sin(angles)))
+
+    iterations = LAYOUT_WARM_ITERATIONS if warm else LAYOUT_ITERATIONS
+    temperature = k if warm else radius / 10
+    for step in range(iterations):
+        disp = _repulsion(pos, k)
+
+        # Attraction along edges: d^2 / k, applied to both ends
+        delta = pos[src] - pos[dst]
+        distance = np.sqrt((delta ** 2).sum(1)) + 1e-9
+        force = delta * (distance / k)[:, None]
+        for axis in (0, 1):
+            disp[:, axis] -= np.bincount(src, weights=force[:, axis], minlength=n)
+            disp[:, axis] += np.bincount(dst, weights=force[:, axis], minlength=n)
+        disp -= LAYOUT_GRAVITY * pos
+
+        # Move at most the current temperature, which cools linearly
+        length = np.sqrt((disp ** 2).sum(1)) + 1e-9
+        limit = temperature * (1 - step / iterations)
+        pos += disp * (np.minimum(length, limit) / length)[:, None]
+    return pos - pos.mean(0)
+
+
+def _repulsion(pos: 'np.ndarray', k: float) -> 'np.ndarray':
+    """Fruchterman-Reingold repulsion k^2 / d from every other node, or from grid cells for large graphs"""
+    n = len(pos)
+    if n <= LAYOUT_EXACT_NODES:
+        others, weights = pos, None
+    else:
+        cells = LAYOUT_GRID_CELLS
+        low = pos.min(0)
+        span = (pos.max(0) - low).max() + 1e-9
+        cell_xy = np.minimum(((pos - low) / span * cells).astype(np.int64), cells - 1)
+        cell = cell_xy[:, 0] * cells + cell_xy[:, 1]
+        counts = np.bincount(cell, minlength=cells * cells)
+        occupied = counts > 0
+        others = np.column_stack([np.bincount(cell, weights=pos[:, axis], minlength=cells * cells)[occupied]
+                                  for axis in (0, 1)]) / counts[occupied, None]
+        weights = counts[occupied].astype(float)
+
+    # Separate x and y planes, updated in place, keep the temporaries to two rows x others arrays
+    disp = np.zeros_like(pos)
+    for row in range(0, n, LAYOUT_CHUNK_ROWS):
+        rows = slice(row, row + LAYOUT_CHUNK_ROWS)
+        dx = pos[rows, 0, None] - others[None, :, 0]
+        dy = pos[rows, 1, None] - others[None, :, 1]
+        strength = dx * dx
+        strength += dy * dy
+        np.maximum(strength, 1.0, out=strength)
+        np.divide(k * k, strength, out=strength)
+        if weights is not None:
+            strength *= weights
+        disp[rows, 0] = np.einsum('ij,ij->i', dx, strength)
+        disp[rows, 1] = np.einsum('ij,ij->i', dy, strength)
+    return disp
+
+
+def _layered_layout(n: int, src: 'np.ndarray', dst: 'np.ndarray',
+                    previous_x: Optional['np.ndarray']) -> 'np.ndarray':
+    layer = _layers(n, src, dst)
+    in_hierarchy = np.zeros(n, dtype=bool)
+    in_hierarchy[src] = True
+    in_hierarchy[dst] = True
+
+    # Order every layer by the mean position of the node's parents, all layers at once
+    x = previous_x.copy() if previous_x is not None else np.arange(n, dtype=float)
+    down = layer[dst] > layer[src]
+    parents, children = src[down], dst[down]
+    for _ in range(LAYOUT_SWEEPS):
+        sums = np.bincount(children, weights=x[parents], minlength=n)
+        counts = np.bincount(children, minlength=n)
+        barycenter = np.where(counts > 0, sums / np.maximum(counts, 1), x)
+        x = _ranks(layer, barycenter)
+
+    coordinates = np.zeros((n, 2))
+    coordinates[:, 0] = x * LAYOUT_NODE_SPACING
+    coordinates[:, 1] = layer * LAYOUT_LAYER_SPACING
+
+    # Classes outside every hierarchy go in a grid below the layers
+    loose = np.flatnonzero(~in_hierarchy)
+    if len(loose):
+        columns = max(int(np.ceil(np.sqrt(len(loose)))), 1)
+        top = (layer[in_hierarchy].max() + 2) * LAYOUT_LAYER_SPACING if in_hierarchy.any() else 0.0
+        order = loose[np.argsort(x[loose], kind='stable')]
+        grid = np.arange(len(order))
+        coordinates[order, 0] = (grid % columns - (columns - 1) / 2) * LAYOUT_NODE_SPACING
+        coordinates[order, 1] = top + grid // columns * LAYOUT_LAYER_SPACING / 2
+    return coordinates
+
+
+def _layers(n: int, src: 'np.ndarray', dst: 'np.ndarray') -> 'np.ndarray':
+    """Longest-path layer of every node; cycles are broken at the node with the fewest unplaced parents"""
+    order = np.argsort(src, kind='stable')
+    targets = dst[order]
+    starts = np.searchsorted(src[order], np.arange(n + 1))
+    indegree = np.bincount(dst, minlength=n)
+    layer = np.zeros(n, dtype=np.int64)
+    placed = np.zeros(n, dtype=bool)
+    queue = deque(np.flatnonzero(indegree == 0).tolist())
+    remaining = n
+    while remaining:
+        if not queue:
+            candidates = np.flatnonzero(~placed)
+            queue.append(int(candidates[np.argmin(indegree[candidates])]))
+        node = queue.popleft()
+        if placed[node]:
+            continue
+        placed[node] = True
+        remaining -= 1
+        for child in targets[starts[node]:starts[node + 1]].tolist():
+            if not placed[child]:
+                layer[child] = max(layer[child], layer[node] + 1)
+                indegree[child] -= 1
+                if indegree[child] == 0:
+                    queue.append(child)
+    return layer
+
+
+def _ranks(layer: 'np.ndarray', key: 'np.ndarray') -> 'np.ndarray':
+    """Position of every node within its layer when sorted by key, centred on 0"""
+    order = np.lexsort((key, layer))
+    sorted_layers = layer[order]
+    first = np.searchsorted(sorted_layers, sorted_layers, side='left')
+    last = np.searchsorted(sorted_layers, sorted_layers, side='right')
+    ranks = np.empty(len(layer))
+    ranks[order] = np.arange(len(layer)) - first - (last - first - 1) / 2
+    return ranks
+
+
+class LayoutCache:
+    """Node positions of earlier layouts, one JSON file per analysis root and layout mode
+
+    Each file keeps the signature of the graph last laid out, so an
+    unchanged graph is served without computing anything, and the
+    positions of its nodes (and of children expanded since), which the
+    next layout starts from. Nodes gone from the graph are dropped then.
+    Files are evicted least-recently-used (by mtime, which load() bumps)
+    once the cache grows past ``max_bytes``.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_LAYOUT_DIR, max_bytes: int = DEFAULT_LAYOUT_MAX_BYTES):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total_bytes = sum(size for _, _, size in self._entries())
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, hashlib.sha256(key.encode('utf-8')).hexdigest()[:16] + '.json')
+
+    def _entries(self) -> List[Tuple[float, str, int]]:
+        entries = []
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if entry.name.endswith('.json'):
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, entry.path, stat.st_size))
+        return entries
+
+    def load(self, key: str) -> Dict[str, Any]:
+        path = self._path(key)
+        try:
+            with open(path, encoding='utf-8') as f:
+                cached = json.load(f)
+            os.utime(path)
+            return cached
+        except (OSError, ValueError):
+            return {'signature': None, 'positions': {}}
+
+    def save(self, key: str, signature: str, positions: Dict[str, Any]) -> None:
+        path = self._path(key)
+        tmp_path = f"{path}.tmp{os.getpid()}.{threading.get_ident()}"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'signature': signature, 'positions': positions}, f)
+        with self._lock:
+            try:
+                self._total_bytes -= os.path.getsize(path)
+            except OSError:
+                pass
+            os.replace(tmp_path, path)
+            self._total_bytes += os.path.getsize(path)
+            if self._total_bytes > self.max_bytes:
+                self._evict(keep=path)
+
+    def _evict(self, keep: str) -> None:
+        # Drop the least recently used files until we are back under 90% of the budget
+        budget = int(self.max_bytes * 0.9)
+        for _, path, size in sorted(self._entries()):
+            if self._total_bytes <= budget:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self._total_bytes -= size
+
+
+def layout_payload(viz_data: Dict[str, Any], mode: str = 'force', cache: Optional[LayoutCache] = None,
+                   key: Optional[str] = None) -> Dict[str, Any]:
+    """Give the nodes of a visualization payload fixed x/y coordinates
+
+    The layout is looked up in ``cache`` under ``key`` (an analysis root)
+    and ``mode`` first and computed, starting from the cached positions,
+    when the graph changed. ``viz_data['layout']`` tells clients to turn
+    their physics off. Without NumPy the payload is returned unchanged.
+    """
+    if np is None:
+        return viz_data
+    node_ids = [node['id'] for node in viz_data['nodes']]
+    links = [(link['from'], link['to'], link.get('label')) for link in viz_data['links']]
+    signature = hashlib.sha256(json.dumps([node_ids, links]).encode('utf-8')).hexdigest()
+
+    cache_key = f"{key}\0{mode}"
+    cached = cache.load(cache_key) if cache is not None and key is not None else {'signature': None,
+                                                                                  'positions': {}}
+    if cached['signature'] == signature:
+        positions = cached['positions']
+        computed = False
+    else:
+        positions = compute_layout(node_ids, links, mode, initial=cached['positions'])
+        computed = True
+        if cache is not None and key is not None:
+            cache.save(cache_key, signature, positions)
+    place_nodes(viz_data['nodes'], positions)
+    viz_data['layout'] = {'mode': mode, 'physics': False, 'cached': not computed}
+    return viz_data
+
+
+def place_nodes(nodes: List[Dict[str, Any]], positions: Dict[str, Any],
+                around: Optional[Tuple[float, float]] = None) -> None:
+    """Set x/y of the nodes that have a position; with ``around``, put the others on a circle about it"""
+    missing = [node for node in nodes if node['id'] not in positions]
+    for node in nodes:
+        if node['id'] in positions:
+            node['x'], node['y'] = positions[node['id']]
+    if around is not None and missing:
+        radius = LAYOUT_NODE_SPACING * max(1.0, len(missing) / 6)
+        for number, node in enumerate(missing):
+            angle = 2 * math.pi * number / len(missing)
+            node['x'] = round(around[0] + radius * math.cos(angle), 1)
+            node['y'] = round(around[1] + radius * math.sin(angle), 1)
+
+
+def layout_expansion(viz_data: Dict[str, Any], parent_id: str, mode: str = 'force',
+                     cache: Optional[LayoutCache] = None, key: Optional[str] = None) -> Dict[str, Any]:
+    """Give the children of an expanded group cached positions, or places on a circle around the group
+
+    The new positions are added to the cache, so the children keep their
+    places the next time they are drawn.
+    """
+    if np is None or cache is None or key is None:
+        return viz_data
+    cache_key = f"{key}\0{mode}"
+    cached = cache.load(cache_key)
+    positions = cached['positions']
+    place_nodes(viz_data['nodes'], positions, around=positions.get(parent_id, (0.0, 0.0)))
+    cache.save(cache_key, cached['signature'],
+               dict(positions, **{node['id']: (node['x'], node['y']) for node in viz_data['nodes']}))
+    viz_data['layout'] = {'mode': mode, 'physics': False, 'cached': True}
+    return viz_data
@@ -0,0 +1,224 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from utils.core_parser import EXTRACTOR_VERSION
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'class_viz_dashboard')
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER,
+    size INTEGER,
+    digest TEXT
+);
+CREATE TABLE IF NOT EXISTS entries (
+    digest TEXT PRIMARY KEY,
+    payload BLOB,
+    nbytes INTEGER,
+    last_used REAL
+);
+CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used);
+"""
+
+
+class ParseCache:
+    """On-disk cache of per-file parse results.
+
+    Files are looked up by (path, mtime, size) first and by the SHA-256 of
+    their content second, so an unchanged file is never re-read and
+    identical files in different places share one entry. Entries are
+    stored path-independent and evicted least-recently-used once the cache
+    grows past ``max_bytes``. A different ``version`` (by default the
+    extractor's EXTRACTOR_VERSION) clears the cache.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES,
+                 version: str = EXTRACTOR_VERSION):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, 'parse_cache.sqlite3')
+        self.max_bytes = max_bytes
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+        # Time spent in get(), put() and flush(), for the analysis profile
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Tuple[int, int, str]] = {}
+        self._touched: Dict[str, float] = {}
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        self._check_version()
+        self._total_bytes = self._conn.execute(
+            "SELECT COALESCE(SUM(nbytes), 0) FROM entries").fetchone()[0]
+
+    def _check_version(self) -> None:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        if row is None or row[0] != self.version:
+            self._conn.execute("DELETE FROM files")
+            self._conn.execute("DELETE FROM entries")
+            self._conn.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (self.version,))
+            self._conn.commit()
+
+    def get(self, filepath: str) -> Optional[Dict[str, Any]]:
+        """Return the cached partial for filepath, or None if it must be parsed"""
+        started = time.perf_counter()
+        try:
+            return self._get(filepath)
+        finally:
+            self._add_seconds(started)
+
+    def _add_seconds(self, started: float) -> None:
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.seconds += elapsed
+
+    def _get(self, filepath: str) -> Optional[Dict[str, Any]]:
+        try:
+            stat = os.stat(filepath)
+        except OSError:
+            return None
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT mtime_ns, size, digest FROM files WHERE path = ?", (filepath,)).fetchone()
+        known = row is not None and row[0] == stat.st_mtime_ns and row[1] == stat.st_size
+        if known:
+            digest = row[2]
+        else:
+            # Hashing reads the whole file, so other threads keep using the cache meanwhile
+            digest = _file_digest(filepath)
+            if digest is None:
+                return None
+
+        with self._lock:
+            if not known:
+                self._conn.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)",
+                                   (filepath, stat.st_mtime_ns, stat.st_size, digest))
+            entry = self._conn.execute(
+                "SELECT payload FROM entries WHERE digest = ?", (digest,)).fetchone()
+            if entry is None:
+                self._pending[filepath] = (stat.st_mtime_ns, stat.st_size, digest)
+                self.misses += 1
+                return None
+
+            self._touched[digest] = time.time()
+            self.hits += 1
+        return _restore(json.loads(entry[0]), filepath)
+
+    def pending_digest(self, filepath: str) -> Optional[str]:
+        """Content hash of a file that missed in get(), used to parse duplicates once"""
+        with self._lock:
+            pending = self._pending.get(filepath)
+        return pending[2] if pending else None
+
+    def put(self, filepath: str, partial: Dict[str, Any]) -> None:
+        """Store the partial produced by parsing filepath, unless it failed transiently (``partial['transient']``)"""
+        started = time.perf_counter()
+        try:
+            self._put(filepath, partial)
+        finally:
+            self._add_seconds(started)
+
+    def _put(self, filepath: str, partial: Dict[str, Any]) -> None:
+        with self._lock:
+            pending = self._pending.pop(filepath, None)
+            if pending is None or partial.get('transient'):
+                return
+            payload = json.dumps(_strip(partial, filepath)).encode('utf-8')
+            # Two files with the same content can both miss before either is stored
+            replaced = self._conn.execute("SELECT nbytes FROM entries WHERE digest = ?", (pending[2],)).fetchone()
+            if replaced is not None:
+                self._total_bytes -= replaced[0]
+            self._conn.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)",
+                               (pending[2], payload, len(payload), time.time()))
+            self._total_bytes += len(payload)
+
+    def flush(self, done: Iterable[str] = ()) -> None:
+        """Write pending LRU timestamps, evict over-budget entries and commit
+
+        Misses of the ``done`` files that were never put() are forgotten.
+        Only the caller that looked those files up passes them, so other
+        analyses sharing the cache keep their own pending misses.
+        """
+        started = time.perf_counter()
+        try:
+            self._flush(done)
+        finally:
+            self._add_seconds(started)
+
+    def _flush(self, done: Iterable[str]) -> None:
+        with self._lock:
+            for filepath in done:
+                self._pending.pop(filepath, None)
+            if self._touched:
+                self._conn.executemany("UPDATE entries SET last_used = ? WHERE digest = ?",
+                                       [(used, digest) for digest, used in self._touched.items()])
+                self._touched.clear()
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        # Drop oldest entries until we are back under 90% of the budget
+        budget = int(self.max_bytes * 0.9)
+        evicted = []
+        for digest, nbytes in self._conn.execute(
+                "SELECT digest, nbytes FROM entries ORDER BY last_used"):
+            if self._total_bytes <= budget:
+                break
+            evicted.append((digest,))
+            self._total_bytes -= nbytes
+        self._conn.executemany("DELETE FROM entries WHERE digest = ?", evicted)
+        self._conn.execute("DELETE FROM files WHERE digest NOT IN (SELECT digest FROM entries)")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM files")
+            self._conn.execute("DELETE FROM entries")
+            self._conn.commit()
+            self._total_bytes = 0
+
+    def close(self) -> None:
+        self.flush()
+        self._conn.close()
+
+
+def _file_digest(filepath: str) -> Optional[str]:
+    try:
+        with open(filepath, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def _strip(partial: Dict[str, Any], filepath: str) -> Dict[str, Any]:
+    """Remove the file path so the entry can be shared by identical files
+
+    Errors are kept as (message, prefixed) pairs: the "Error processing
+    <path>: " prefix is cut off and put back by _restore(), any other error
+    is stored as it is.
+    """
+    prefix = f"Error processing {filepath}: "
+    return {
+        'classes': [dict(cls, file=None) for cls in partial['classes']],
+        'relationships': [dict(rel, file=None) for rel in partial['relationships']],
+        'errors': [[e[len(prefix):], True] if e.startswith(prefix) else [e, False] for e in partial['errors']],
+        'language': partial.get('language'),
+    }
+
+
+def _restore(entry: Dict[str, Any], filepath: str) -> Dict[str, Any]:
+    for item in entry['classes']:
+        item['file'] = filepath
+    for item in entry['relationships']:
+        item['file'] = filepath
+    entry['errors'] = [f"Error processing {filepath}: {e}" if prefixed else e for e, prefixed in entry['errors']]
+    return entry
@@ -0,0 +1,157 @@
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Files kept in _meta['profile']['slowest_files']
+PROFILE_SLOWEST_FILES = 10
+# Allocation sites kept in _meta['profile']['top_allocations'] when tracing memory
+PROFILE_TOP_ALLOCATIONS = 10
+
+
+class PhaseTimer:
+    """Adds the wall and CPU seconds of ``with timer('phase'):`` blocks to a file's stats
+
+    CPU time is the calling thread's, so it is right inside worker
+    processes too. A timer without stats does nothing.
+    """
+
+    __slots__ = ('seconds', 'cpu_seconds', 'phase', 'started', 'cpu_started')
+
+    def __init__(self, stats: Optional[Dict[str, Any]] = None):
+        self.seconds = stats['seconds'] if stats is not None else None
+        self.cpu_seconds = stats['cpu_seconds'] if stats is not None else None
+
+    def __call__(self, phase: str) -> 'PhaseTimer':
+        self.phase = phase
+        return self
+
+    def __enter__(self) -> 'PhaseTimer':
+        if self.seconds is not None:
+            self.started = time.perf_counter()
+            self.cpu_started = time.thread_time()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self.seconds is not None:
+            phase = self.phase
+            self.seconds[phase] = self.seconds.get(phase, 0.0) + time.perf_counter() - self.started
+            self.cpu_seconds[phase] = self.cpu_seconds.get(phase, 0.0) + time.thread_time() - self.cpu_started
+
+
+def new_file_stats(filepath: str) -> Dict[str, Any]:
+    """Per-file stats filled in by parse_source_file() and a PhaseTimer"""
+    return {'file': filepath, 'bytes': 0, 'prefiltered': False, 'seconds': {}, 'cpu_seconds': {}}
+
+
+def merge_file_stats(meta: Dict[str, Any], stats: Dict[str, Any]) -> None:
+    """Add one file's stats to _meta['prefilter'] and _meta['profile']"""
+    seconds = stats['seconds']
+    filter_seconds = seconds.get('prefilter', 0.0)
+    file_seconds = sum(seconds.values())
+
+    totals = meta.get('prefilter')
+    if totals is None:
+        totals = meta['prefilter'] = {
+            'files_skipped': 0,
+            'bytes_skipped': 0,
+            'files_parsed': 0,
+            'bytes_parsed': 0,
+            'parse_seconds': 0.0,
+            'filter_seconds': 0.0,
+            'seconds_saved': 0.0,
+        }
+    if stats['prefiltered']:
+        totals['files_skipped'] += 1
+        totals['bytes_skipped'] += stats['bytes']
+    else:
+        totals['files_parsed'] += 1
+        totals['bytes_parsed'] += stats['bytes']
+        totals['parse_seconds'] += file_seconds - filter_seconds
+    totals['filter_seconds'] += filter_seconds
+
+    # Skipped files would have parsed at the average speed of the parsed ones
+    if totals['bytes_parsed']:
+        estimated = totals['bytes_skipped'] * totals['parse_seconds'] / totals['bytes_parsed']
+        totals['seconds_saved'] = estimated - totals['filter_seconds']
+
+    profile = _profile(meta)
+    profile['bytes_read'] += stats['bytes']
+    phases = profile['phases']
+    for phase, value in seconds.items():
+        totals = phases.get(phase)
+        if totals is None:
+            totals = phases[phase] = {'seconds': 0.0, 'cpu_seconds': 0.0}
+        totals['seconds'] += value
+        totals['cpu_seconds'] += stats['cpu_seconds'][phase]
+
+    slowest = profile['slowest_files']
+    if len(slowest) < PROFILE_SLOWEST_FILES or file_seconds > slowest[-1]['seconds']:
+        slowest.append({'file': stats['file'], 'seconds': file_seconds, 'bytes': stats['bytes'],
+                        'phases': dict(seconds)})
+        slowest.sort(key=lambda entry: -entry['seconds'])
+        del slowest[PROFILE_SLOWEST_FILES:]
+
+
+class AnalysisProfile:
+    """Whole-analysis measurements, completed into _meta['profile'] by finish()
+
+    Per-file phases (prefilter, read, python_parse, java_parse, extract)
+    are merged by merge_partial(); this adds the analysis wall and CPU
+    time, the phases that run in the calling process (walk, cache,
+    merge), peak RSS and, with ``trace_memory``, the top allocation sites
+    from tracemalloc. Peak RSS is the process high-water mark, and
+    tracemalloc only sees the calling process, not parse workers.
+    """
+
+    def __init__(self, meta: Dict[str, Any], cache: Optional[Any] = None, trace_memory: bool = False):
+        self.meta = meta
+        self.cache = cache
+        self.merge_seconds = 0.0
+        self.started = time.perf_counter()
+        self.cpu_started = time.process_time()
+        self.cache_started = getattr(cache, 'seconds', 0.0)
+        self.trace_memory = trace_memory and not tracemalloc.is_tracing()
+        if self.trace_memory:
+            tracemalloc.start()
+
+    def finish(self, discovery_seconds: float = 0.0) -> Dict[str, Any]:
+        profile = _profile(self.meta)
+        profile['wall_seconds'] = time.perf_counter() - self.started
+        profile['cpu_seconds'] = time.process_time() - self.cpu_started
+        phases = profile['phases']
+        phases['walk'] = {'seconds': discovery_seconds}
+        phases['merge'] = {'seconds': self.merge_seconds}
+        if self.cache is not None:
+            phases['cache'] = {'seconds': self.cache.seconds - self.cache_started}
+
+        if resource is not None:
+            # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+            scale = 1 if sys.platform == 'darwin' else 1024
+            profile['peak_rss_bytes'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+            workers_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale
+            if workers_rss:
+                profile['peak_worker_rss_bytes'] = workers_rss
+
+        if self.trace_memory:
+            snapshot = tracemalloc.take_snapshot()
+            profile['traced_peak_bytes'] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            profile['top_allocations'] = [
+                {'where': f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                 'bytes': stat.size, 'count': stat.count}
+                for stat in snapshot.statistics('lineno')[:PROFILE_TOP_ALLOCATIONS]
+            ]
+        return profile
+
+
+def _profile(meta: Dict[str, Any]) -> Dict[str, Any]:
+    profile = meta.get('profile')
+    if profile is None:
+        profile = meta['profile'] = {'bytes_read': 0, 'phases': {}, 'slowest_files': []}
+    return profile
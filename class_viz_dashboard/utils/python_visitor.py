@@ -0,0 +1,194 @@
+import ast
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+from utils.discovery import read_source
+from utils.profiling import PhaseTimer
+from utils.relationships import RelationshipCollector
+from utils.symbols import with_ref
+
+
+def parse_python_file(filepath: str, structure: Dict[str, Any], phases: Optional[PhaseTimer] = None) -> None:
+    """Parse Python files and extract OOP relationships"""
+    phases = phases or PhaseTimer()
+    with phases('read'):
+        source = read_source(filepath)
+    with phases('python_parse'):
+        tree = ast.parse(source)
+
+    with phases('extract'):
+        PythonStructureVisitor(filepath).visit(tree).emit(structure)
+    return structure
+
+
+class PythonStructureVisitor:
+    """Collects classes and OOP relationships from a module in one AST pass.
+
+    The tree is traversed once, breadth-first, dispatching on node type.
+    Breadth-first order is the order ``ast.walk`` uses, so imports, class
+    definitions and method calls are seen in the same order as the earlier
+    walk-per-concern implementation and the emitted structure is identical.
+    """
+
+    def __init__(self, filepath: str):
+        self.filepath = filepath
+        self.imports: Dict[str, str] = {}
+        # Name bound by a from-import -> dotted reference, for utils.symbols
+        self.refs: Dict[str, str] = {}
+        self.classes: Dict[str, ast.ClassDef] = {}
+        self.method_calls: Dict[int, List[str]] = {}
+        self._dispatch = {
+            ast.Import: self._visit_import,
+            ast.ImportFrom: self._visit_import_from,
+            ast.ClassDef: self._visit_class,
+            ast.Call: self._visit_call,
+        }
+
+    def visit(self, tree: ast.AST) -> 'PythonStructureVisitor':
+        """Traverse the tree once and record everything emit() needs"""
+        dispatch = self._dispatch
+        iter_children = ast.iter_child_nodes
+        # Each entry carries the call lists of the class methods enclosing it
+        queue = deque([(tree, ())])
+        while queue:
+            node, owners = queue.popleft()
+            handler = dispatch.get(type(node))
+            if handler is not None:
+                handler(node, owners)
+
+            if type(node) is ast.ClassDef:
+                methods = {id(item) for item in node.body if type(item) is ast.FunctionDef}
+                for child in iter_children(node):
+                    if id(child) in methods:
+                        calls = self.method_calls.setdefault(id(child), [])
+                        queue.append((child, owners + (calls,)))
+                    else:
+                        queue.append((child, owners))
+            else:
+                for child in iter_children(node):
+                    queue.append((child, owners))
+        return self
+
+    def _visit_import(self, node: ast.Import, owners) -> None:
+        for alias in node.names:
+            self.imports[alias.asname or alias.name.split('.')[-1]] = alias.name
+
+    def _visit_import_from(self, node: ast.ImportFrom, owners) -> None:
+        prefix = '.' * node.level + (f"{node.module}." if node.module else '')
+        for alias in node.names:
+            self.imports[alias.asname or alias.name] = f"{node.module}.{alias.name}"
+            self.refs[alias.asname or alias.name] = prefix + alias.name
+
+    def _visit_class(self, node: ast.ClassDef, owners) -> None:
+        # Later definitions win but keep the position of the first one
+        self.classes[node.name] = node
+
+    def _visit_call(self, node: ast.Call, owners) -> None:
+        if owners and isinstance(node.func, ast.Attribute) and isinstance(node.func.value, ast.Name):
+            var_name = node.func.value.id
+            if var_name != 'self':
+                for calls in owners:
+                    calls.append(var_name)
+
+    def emit(self, structure: Dict[str, Any]) -> None:
+        """Append the collected classes and relationships to structure"""
+        filepath = self.filepath
+        imported_names = self.imports
+        classes = self.classes
+        relationships = RelationshipCollector(structure['relationships'])
+        refs = self.refs
+
+        for class_name, class_node in classes.items():
+            class_info = {
+                'name': class_name,
+                'language': 'python',
+                'file': filepath,
+                'methods': [node.name for node in class_node.body if isinstance(node, ast.FunctionDef)],
+                'attributes': [
+                    node.targets[0].attr
+                    for node in class_node.body
+                    if isinstance(node, ast.Assign)
+                       and len(node.targets) == 1
+                       and isinstance(node.targets[0], ast.Attribute)
+                       and isinstance(node.targets[0].value, ast.Name)
+                       and node.targets[0].value.id == 'self'
+                ],
+                'type': 'interface' if _is_abstract(class_node) else 'class',
+                'docstring': ast.get_docstring(class_node) or ''
+            }
+            structure['classes'].append(class_info)
+
+            # Add inheritance/implementation relationships
+            for base in class_node.bases:
+                if isinstance(base, ast.Name):
+                    if imported_names.get(base.id) == 'abc.ABC':
+                        continue
+
+                    target_class = classes.get(base.id)
+                    base_type = 'implements' if target_class and _is_abstract(target_class) else 'inheritance'
+                    relationships.add(with_ref({
+                        'source': base.id,
+                        'target': class_name,
+                        'type': base_type,
+                        'file': filepath
+                    }, 'source_ref', refs.get(base.id)))
+
+            # Process class body for relationships
+            for node in class_node.body:
+                if isinstance(node, ast.FunctionDef):
+                    # Detect dependencies in method parameters
+                    for arg in node.args.args:
+                        if arg.annotation and isinstance(arg.annotation, ast.Name):
+                            relationships.add(with_ref({
+                                'source': class_name,
+                                'target': arg.annotation.id,
+                                'type': 'dependency',
+                                'context': f'Parameter in {node.name}()',
+                                'file': filepath
+                            }, 'target_ref', refs.get(arg.annotation.id)))
+
+                    # Detect method calls to other classes
+                    for var_name in self.method_calls.get(id(node), ()):
+                        if var_name in imported_names:
+                            target_class_name = imported_names[var_name].split('.')[-1]
+                        elif var_name in classes:
+                            target_class_name = var_name
+                        else:
+                            continue
+                        relationships.add(with_ref({
+                            'source': class_name,
+                            'target': target_class_name,
+                            'type': 'association',
+                            'context': f'Method call in {node.name}()',
+                            'file': filepath
+                        }, 'target_ref', refs.get(var_name)))
+
+                elif isinstance(node, ast.Assign):
+                    # Detect composition/aggregation
+                    for target in node.targets:
+                        if (isinstance(target, ast.Attribute) and
+                                isinstance(target.value, ast.Name) and
+                                target.value.id == 'self'):
+
+                            attr_name = target.attr
+                            if isinstance(node.value, ast.Call) and isinstance(node.value.func, ast.Name):
+                                relationships.add(with_ref({
+                                    'source': class_name,
+                                    'target': node.value.func.id,
+                                    'type': 'composition',
+                                    'context': f'Attribute: {attr_name}',
+                                    'file': filepath
+                                }, 'target_ref', refs.get(node.value.func.id)))
+                            elif isinstance(node.value, ast.Name):
+                                relationships.add({
+                                    'source': class_name,
+                                    'target': node.value.id,
+                                    'type': 'aggregation',
+                                    'context': f'Attribute: {attr_name}',
+                                    'file': filepath
+                                })
+
+
+def _is_abstract(class_node: ast.ClassDef) -> bool:
+    """A class deriving directly from ABC is treated as an interface"""
+    return any(isinstance(b, ast.Name) and b.id == 'ABC' for b in class_node.bases)
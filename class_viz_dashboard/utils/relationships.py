@@ -0,0 +1,54 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+# Distinct contexts kept on a de-duplicated relationship
+MAX_RELATIONSHIP_CONTEXTS = 5
+
+
+class RelationshipCollector:
+    """Appends relationships to a list, collapsing repeats of the same edge
+
+    Relationships with the same source, target, type and import references
+    are one edge: the first one is kept, in its original position, with
+    ``count`` set to the number of times the edge was found. When the
+    repeats had different contexts, ``contexts`` lists up to
+    MAX_RELATIONSHIP_CONTEXTS of them; ``context`` stays the first one.
+
+    Only relationships added through the collector are de-duplicated, so
+    one collector per file keeps edges from different files apart.
+    """
+
+    def __init__(self, relationships: List[Dict[str, Any]]):
+        self.relationships = relationships
+        self._edges: Dict[Tuple[Any, ...], Dict[str, Any]] = {}
+
+    def add(self, rel: Dict[str, Any]) -> Dict[str, Any]:
+        key = (rel['source'], rel['target'], rel['type'], rel.get('source_ref'), rel.get('target_ref'))
+        edge = self._edges.get(key)
+        if edge is None:
+            rel['count'] = 1
+            self._edges[key] = rel
+            self.relationships.append(rel)
+            return rel
+
+        edge['count'] += 1
+        context = rel.get('context')
+        if context is not None and context != edge.get('context'):
+            contexts = edge.get('contexts')
+            if contexts is None:
+                contexts = edge['contexts'] = [edge['context']] if 'context' in edge else []
+            if context not in contexts and len(contexts) < MAX_RELATIONSHIP_CONTEXTS:
+                contexts.append(context)
+        return edge
+
+
+def relationship_count(rel: Dict[str, Any]) -> int:
+    """How many times a relationship was found; 1 for results without counts"""
+    return rel.get('count', 1)
+
+
+def relationship_contexts(rel: Dict[str, Any]) -> List[str]:
+    """The distinct contexts of a relationship, first one first"""
+    contexts: Optional[List[str]] = rel.get('contexts')
+    if contexts is not None:
+        return contexts
+    return [rel['context']] if rel.get('context') else []
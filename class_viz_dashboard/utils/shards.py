@@ -0,0 +1,190 @@
+import argparse
+import os
+import sys
+import time
+import zlib
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from utils.compact import CompactStructure
+
+SHARD_MODES = ('hash', 'directory')
+
+
+class ShardDiscovery:
+    """The files of one shard of a FileDiscovery
+
+    Every file gets a shard from a CRC32 of its path relative to the root
+    (``by='hash'``) or of its directory's (``by='directory'``, which keeps
+    the files of a package together), so every machine splits the tree the
+    same way whatever its checkout path. Only files of shard ``index`` are
+    yielded; ``positions`` records where each one stands in the full
+    discovery order, which merge_shards() uses to restore that order.
+    Directory traversal errors are reported by shard 0 only.
+    """
+
+    def __init__(self, discovery: Any, index: int, count: int, by: str = 'hash'):
+        if not 0 <= index < count:
+            raise ValueError(f"Shard {index} out of range for {count} shards")
+        if by not in SHARD_MODES:
+            raise ValueError(f"Unknown shard mode {by!r}, expected one of {', '.join(SHARD_MODES)}")
+        self.discovery = discovery
+        self.index = index
+        self.count = count
+        self.by = by
+        self.positions: List[int] = []
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        return self.discovery.stats
+
+    @property
+    def errors(self) -> List[str]:
+        return self.discovery.errors if self.index == 0 else []
+
+    def __iter__(self) -> Iterator[str]:
+        for position, filepath in enumerate(self.discovery):
+            if shard_of(filepath, self.discovery.root_folder, self.count, self.by) == self.index:
+                self.positions.append(position)
+                yield filepath
+
+
+def shard_of(filepath: str, root_folder: str, count: int, by: str = 'hash') -> int:
+    """Shard of a file, stable across machines and processes"""
+    relative = os.path.relpath(filepath, root_folder).replace(os.sep, '/')
+    key = relative if by == 'hash' else relative.rpartition('/')[0]
+    return zlib.crc32(key.encode('utf-8')) % count
+
+
+def parse_shard(spec: str) -> Tuple[int, int]:
+    """(index, count) from an ``INDEX/COUNT`` shard spec such as ``0/4``"""
+    index, _, count = spec.partition('/')
+    try:
+        return int(index), int(count)
+    except ValueError:
+        raise ValueError(f"Invalid shard {spec!r}, expected INDEX/COUNT") from None
+
+
+def merge_shards(shards: Sequence[Any], compact: bool = False) -> Dict[str, Any]:
+    """Combine the results of analyze_codebase(shard=...) for every shard into one
+
+    Classes, relationships and errors are put back in discovery order, so
+    the result equals a single analyze_codebase() run. Relationships are
+    stored unresolved (names and import references), so resolving them
+    with utils.symbols.SymbolTable, as the visualizations do, works
+    against the classes of every shard, including across shards. Shards
+    analyzed under another checkout path have their file paths moved to
+    the root of shard 0.
+
+    ``_meta['shards']`` keeps each shard's file and class counts and
+    profile; the file-level counters are summed.
+    """
+    if not shards:
+        raise ValueError("No shards to merge")
+    if any(structure['_meta'].get('shard') is None for structure in shards):
+        raise ValueError("Not a shard result: _meta['shard'] is missing")
+    shards = sorted(shards, key=lambda structure: structure['_meta']['shard']['index'])
+    infos = [structure['_meta']['shard'] for structure in shards]
+    count, by = infos[0]['count'], infos[0]['by']
+    if any((info['count'], info['by']) != (count, by) for info in infos):
+        raise ValueError("Shards were split differently")
+    indexes = sorted(info['index'] for info in infos)
+    if indexes != list(range(count)):
+        raise ValueError(f"Expected shards 0 to {count - 1}, got {indexes}")
+
+    first_meta = shards[0]['_meta']
+    root_folder = first_meta.get('root_folder')
+    merged = CompactStructure() if compact else _new_structure()
+    meta = merged['_meta']
+    meta['root_folder'] = root_folder
+    meta['discovery'] = first_meta.get('discovery')
+    meta['shards'] = []
+
+    # (position, shard, classes start, relationships start, errors start, file sizes)
+    files = []
+    for number, (structure, info) in enumerate(zip(shards, infos)):
+        starts = [0, 0, 0]
+        for position, sizes in zip(info['positions'], info['sizes']):
+            files.append((position, number, tuple(starts), sizes))
+            starts = [start + size for start, size in zip(starts, sizes)]
+        infos[number] = dict(info, tail_errors=starts[2])
+
+    relocate = [_relocator(structure['_meta'].get('root_folder'), root_folder) for structure in shards]
+    for position, number, (classes, relationships, errors), sizes in sorted(files):
+        structure = shards[number]
+        merged['classes'].extend(relocate[number](cls) for cls in
+                                 structure['classes'][classes:classes + sizes[0]])
+        merged['relationships'].extend(relocate[number](rel) for rel in
+                                       structure['relationships'][relationships:relationships + sizes[1]])
+        merged['errors'].extend(structure['errors'][errors:errors + sizes[2]])
+    for structure, info in zip(shards, infos):
+        merged['errors'].extend(structure['errors'][info['tail_errors']:])
+
+        shard_meta = structure['_meta']
+        meta['files_processed'] += shard_meta['files_processed']
+        meta['languages'].update(shard_meta.get('languages', ()))
+        for key in ('prefilter', 'cache'):
+            if shard_meta.get(key):
+                totals = meta.setdefault(key, {})
+                for name, value in shard_meta[key].items():
+                    totals[name] = totals.get(name, 0) + value
+        meta['shards'].append({
+            'index': info['index'],
+            'root_folder': shard_meta.get('root_folder'),
+            'files_processed': shard_meta['files_processed'],
+            'classes': len(structure['classes']),
+            'relationships': len(structure['relationships']),
+            'profile': shard_meta.get('profile'),
+        })
+    return merged
+
+
+def _new_structure() -> Dict[str, Any]:
+    # Imported here: utils.core_parser imports this module
+    from utils.core_parser import new_structure
+    return new_structure()
+
+
+def _relocator(from_root: Optional[str], to_root: Optional[str]):
+    """Function moving the 'file' of a record from one checkout path to another"""
+    if not from_root or not to_root or os.path.normpath(from_root) == os.path.normpath(to_root):
+        return lambda record: record
+
+    def relocate(record: Dict[str, Any]) -> Dict[str, Any]:
+        if record['file'] != 'external':
+            record = dict(record, file=os.path.join(to_root, os.path.relpath(record['file'], from_root)))
+        return record
+    return relocate
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Analyze a codebase in shards and merge the results")
+    commands = parser.add_subparsers(dest='command', required=True)
+    analyze = commands.add_parser('analyze', help="analyze one shard and save it as a snapshot")
+    analyze.add_argument('root')
+    analyze.add_argument('--shard', required=True, help="INDEX/COUNT, for example 0/4")
+    analyze.add_argument('--by', choices=SHARD_MODES, default='hash')
+    analyze.add_argument('--workers', type=int, default=1)
+    analyze.add_argument('--output', required=True)
+    merge = commands.add_parser('merge', help="merge shard snapshots into one snapshot")
+    merge.add_argument('shards', nargs='+')
+    merge.add_argument('--output', required=True)
+    args = parser.parse_args()
+
+    # Imported here: utils.core_parser imports this module
+    from utils.core_parser import analyze_codebase
+    from utils.snapshot import load_snapshot, save_snapshot
+
+    started = time.perf_counter()
+    if args.command == 'analyze':
+        structure = analyze_codebase(args.root, workers=args.workers, compact=True,
+                                     shard=parse_shard(args.shard), shard_by=args.by)
+    else:
+        structure = merge_shards([load_snapshot(path) for path in args.shards], compact=True)
+    save_snapshot(structure, args.output)
+    print(f"{args.output}: {structure['_meta']['files_processed']} files, {len(structure['classes'])} classes, "
+          f"{len(structure['relationships'])} relationships in {time.perf_counter() - started:.2f}s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
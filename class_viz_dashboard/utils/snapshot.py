@@ -0,0 +1,188 @@
+import argparse
+import json
+import mmap
+import os
+import sys
+import time
+from array import array
+from typing import Any, Dict, Mapping, Optional
+
+from utils.compact import CompactStructure, StringTable
+
+SNAPSHOT_EXTENSION = '.cvz'
+SNAPSHOT_MAGIC = b'CVZSNAP\0'
+SNAPSHOT_FORMAT_VERSION = 1
+# Column data starts on multiples of this many bytes
+_ALIGNMENT = 8
+
+
+class SnapshotError(Exception):
+    """A file is not a snapshot or was written by an incompatible version"""
+
+
+def save_snapshot(structure: Mapping[str, Any], path: str) -> Dict[str, Any]:
+    """Write an analysis result to path in the binary snapshot format
+
+    A dict structure is converted to a utils.compact.CompactStructure
+    first. The file holds a JSON header (meta, errors, the sparse extras
+    and where each column is) followed by the string table and every
+    integer column as raw native arrays, so load_snapshot() only copies
+    memory. The file is written to a temporary name and renamed, so a
+    reader never sees a partial snapshot. Returns the header.
+    """
+    compact = structure if isinstance(structure, CompactStructure) else CompactStructure.from_structure(structure)
+    strings = compact.strings.strings
+    text = ''.join(strings[1:])
+    offsets = array('Q', [0])
+    position = 0
+    for value in strings[1:]:
+        position += len(value)
+        offsets.append(position)
+
+    blobs = {'strings': text.encode('utf-8', errors='surrogateescape'), 'string_offsets': offsets}
+    typecodes = {'string_offsets': offsets.typecode}
+    for name, column in vars(compact).items():
+        if isinstance(column, array):
+            blobs[name], typecodes[name] = column, column.typecode
+        elif isinstance(column, bytearray):
+            blobs[name], typecodes[name] = column, 'bytearray'
+
+    header = {
+        'format_version': SNAPSHOT_FORMAT_VERSION,
+        'byteorder': sys.byteorder,
+        'created': time.time(),
+        'meta': compact.meta,
+        'errors': compact.errors,
+        'class_extras': compact.class_extras,
+        'edge_extras': compact.edge_extras,
+        'columns': {},
+    }
+    position = 0
+    for name, blob in blobs.items():
+        nbytes = len(blob) * (blob.itemsize if isinstance(blob, array) else 1)
+        header['columns'][name] = [typecodes.get(name, 'bytes'), position, nbytes]
+        position += _padded(nbytes)
+
+    # Offsets in the header are relative to the end of the header
+    encoded = json.dumps(header, default=list).encode('utf-8')
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, 'wb') as f:
+        f.write(SNAPSHOT_MAGIC)
+        f.write(len(encoded).to_bytes(8, 'little'))
+        f.write(encoded)
+        f.write(b'\0' * (_padded(f.tell()) - f.tell()))
+        for blob in blobs.values():
+            data = blob.tobytes() if isinstance(blob, array) else bytes(blob)
+            f.write(data)
+            f.write(b'\0' * (_padded(len(data)) - len(data)))
+    os.replace(tmp_path, path)
+    return header
+
+
+def load_snapshot(path: str) -> CompactStructure:
+    """Read a snapshot written by save_snapshot()
+
+    The file is memory-mapped and each column is copied straight into an
+    array; strings are decoded in one pass. ``_meta['snapshot']`` records
+    where and when the snapshot was made.
+    """
+    with open(path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            header, start = _read_header(data, path)
+            view = memoryview(data)
+            try:
+                return _build(header, view, start, path)
+            finally:
+                view.release()
+
+
+def is_snapshot(path: str) -> bool:
+    """Whether path is a snapshot file, judged by its magic bytes"""
+    try:
+        with open(path, 'rb') as f:
+            return f.read(len(SNAPSHOT_MAGIC)) == SNAPSHOT_MAGIC
+    except OSError:
+        return False
+
+
+def _read_header(data: mmap.mmap, path: str):
+    if data[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+        raise SnapshotError(f"{path} is not an analysis snapshot")
+    length = int.from_bytes(data[len(SNAPSHOT_MAGIC):len(SNAPSHOT_MAGIC) + 8], 'little')
+    end = len(SNAPSHOT_MAGIC) + 8 + length
+    header = json.loads(data[len(SNAPSHOT_MAGIC) + 8:end])
+    if header['format_version'] != SNAPSHOT_FORMAT_VERSION:
+        raise SnapshotError(f"{path} has snapshot format {header['format_version']}, "
+                            f"expected {SNAPSHOT_FORMAT_VERSION}")
+    return header, _padded(end)
+
+
+def _build(header: Dict[str, Any], view: memoryview, start: int, path: str) -> CompactStructure:
+    swap = header['byteorder'] != sys.byteorder
+    columns = {}
+    for name, (typecode, offset, nbytes) in header['columns'].items():
+        chunk = view[start + offset:start + offset + nbytes]
+        if typecode == 'bytes':
+            columns[name] = bytes(chunk)
+        elif typecode == 'bytearray':
+            columns[name] = bytearray(chunk)
+        else:
+            column = array(typecode)
+            if nbytes % column.itemsize:
+                raise SnapshotError(f"{path}: column {name} does not fit {typecode} items")
+            column.frombytes(chunk)
+            if swap:
+                column.byteswap()
+            columns[name] = column
+        chunk.release()
+
+    text = columns.pop('strings').decode('utf-8', errors='surrogateescape')
+    offsets = columns.pop('string_offsets')
+    strings = [None]
+    strings.extend(text[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1))
+
+    compact = CompactStructure()
+    compact.strings = StringTable(strings)
+    for name, column in columns.items():
+        setattr(compact, name, column)
+    compact.file_ids = {strings[string_id]: file_id for file_id, string_id in enumerate(compact.file_names)}
+    compact.class_extras = {int(index): extras for index, extras in header['class_extras'].items()}
+    compact.edge_extras = {int(index): extras for index, extras in header['edge_extras'].items()}
+    compact.errors = header['errors']
+    compact.meta = header['meta']
+    compact.meta['languages'] = set(compact.meta.get('languages', ()))
+    compact.meta['snapshot'] = {'path': path, 'created': header['created']}
+    return compact
+
+
+def _padded(size: int) -> int:
+    return -(-size // _ALIGNMENT) * _ALIGNMENT
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Analyze a codebase and save the result as a snapshot")
+    parser.add_argument('root')
+    parser.add_argument('output', nargs='?', help=f"snapshot file (default: ROOT{SNAPSHOT_EXTENSION})")
+    parser.add_argument('--workers', type=int, default=1)
+    args = parser.parse_args()
+
+    # Imported here: the loader does not need the parsers
+    from utils.core_parser import analyze_codebase
+
+    output = args.output or os.path.normpath(args.root) + SNAPSHOT_EXTENSION
+    started = time.perf_counter()
+    structure = analyze_codebase(args.root, workers=args.workers, compact=True)
+    analyzed = time.perf_counter() - started
+    save_snapshot(structure, output)
+    saved = time.perf_counter() - started - analyzed
+    started = time.perf_counter()
+    load_snapshot(output)
+    loaded = time.perf_counter() - started
+    print(f"{len(structure['classes'])} classes, {len(structure['relationships'])} relationships: "
+          f"analyzed in {analyzed:.2f}s, saved in {saved * 1000:.0f} ms, loaded in {loaded * 1000:.0f} ms")
+    print(f"{output}: {os.path.getsize(output) / 2**20:.1f} MB")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
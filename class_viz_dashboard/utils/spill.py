@@ -0,0 +1,191 @@
+import bisect
+import pickle
+import tempfile
+import threading
+from collections.abc import Mapping, Sequence
+from itertools import islice
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+# Records pickled together; a chunk is the unit kept in memory, spilled and read back
+SPILL_CHUNK_RECORDS = 1024
+
+
+class SpilledStructure(Mapping):
+    """Analysis result that keeps at most ``memory_budget`` bytes of records in memory
+
+    ``structure['classes']`` and ``structure['relationships']`` are
+    SpillSequence objects sharing one budget: records are pickled in
+    chunks of SPILL_CHUNK_RECORDS and, once the chunks held in memory
+    exceed the budget, both sequences write theirs to their temporary
+    file as one more run. Records arrive in discovery order, so every run
+    is already sorted and reading the runs back one after another is the
+    merge; it happens lazily, a chunk at a time, whenever a sequence is
+    iterated or indexed.
+
+    Errors and ``_meta`` stay in memory. The temporary files are created
+    in ``spill_dir`` (default: the system temporary directory) and deleted
+    by close() or when the structure is garbage collected.
+    """
+
+    def __init__(self, memory_budget: int, spill_dir: Optional[str] = None):
+        self.memory_budget = memory_budget
+        self.spill_dir = spill_dir
+        self.spills = 0
+        self._classes = SpillSequence(self)
+        self._relationships = SpillSequence(self)
+        self.errors: List[str] = []
+        self.meta: Dict[str, Any] = {'files_processed': 0, 'languages': set()}
+
+    # Mapping interface -------------------------------------------------
+
+    def __getitem__(self, key: str) -> Any:
+        if key == 'classes':
+            return self._classes
+        if key == 'relationships':
+            return self._relationships
+        if key == 'errors':
+            return self.errors
+        if key == '_meta':
+            return self.meta
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(('classes', 'relationships', 'errors', '_meta'))
+
+    def __len__(self) -> int:
+        return 4
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain dict structure, as returned by analyze_codebase(), loaded into memory"""
+        return {
+            'classes': list(self._classes),
+            'relationships': list(self._relationships),
+            'errors': list(self.errors),
+            '_meta': dict(self.meta),
+        }
+
+    # Budget ------------------------------------------------------------
+
+    @property
+    def memory_bytes(self) -> int:
+        """Bytes of pickled chunks currently held in memory"""
+        return self._classes.memory_bytes + self._relationships.memory_bytes
+
+    @property
+    def spilled_bytes(self) -> int:
+        return self._classes.spilled_bytes + self._relationships.spilled_bytes
+
+    def _check_budget(self) -> None:
+        if self.memory_bytes > self.memory_budget:
+            self._classes.spill()
+            self._relationships.spill()
+            self.spills += 1
+            self.meta['spill'] = {'runs': self.spills, 'bytes': self.spilled_bytes,
+                                  'memory_budget': self.memory_budget}
+
+    def close(self) -> None:
+        self._classes.close()
+        self._relationships.close()
+
+
+class SpillSequence(Sequence):
+    """Append-only sequence of records stored as pickled chunks in memory or on disk
+
+    New records collect in a plain list and are pickled as a chunk every
+    SPILL_CHUNK_RECORDS records. Each chunk is either bytes in memory or
+    an (offset, length) in the temporary file, so indexing finds its chunk
+    by bisection and unpickles only that one.
+    """
+
+    def __init__(self, owner: SpilledStructure):
+        self.owner = owner
+        self.memory_bytes = 0
+        self.spilled_bytes = 0
+        self._starts: List[int] = []  # index of the first record of each chunk
+        self._chunks: List[Union[bytes, Tuple[int, int]]] = []
+        self._tail: List[Dict[str, Any]] = []
+        self._length = 0
+        self._file: Optional[BinaryIO] = None
+        self._lock = threading.Lock()
+
+    def append(self, record: Dict[str, Any]) -> None:
+        self._tail.append(record)
+        self._length += 1
+        if len(self._tail) >= SPILL_CHUNK_RECORDS:
+            self._seal()
+
+    def extend(self, records: Iterable[Dict[str, Any]]) -> None:
+        for record in records:
+            self.append(record)
+
+    def _seal(self) -> None:
+        """Pickle the tail into an in-memory chunk"""
+        chunk = pickle.dumps(self._tail, pickle.HIGHEST_PROTOCOL)
+        self._starts.append(self._length - len(self._tail))
+        self._chunks.append(chunk)
+        self._tail = []
+        self.memory_bytes += len(chunk)
+        self.owner._check_budget()
+
+    def spill(self) -> None:
+        """Write the in-memory chunks to the temporary file as one run"""
+        with self._lock:
+            if self._file is None:
+                self._file = tempfile.TemporaryFile(prefix='class_viz_spill_', dir=self.owner.spill_dir)
+            f = self._file
+            f.seek(0, 2)
+            for number, chunk in enumerate(self._chunks):
+                if isinstance(chunk, bytes):
+                    self._chunks[number] = (f.tell(), len(chunk))
+                    f.write(chunk)
+                    self.spilled_bytes += len(chunk)
+            f.flush()
+            self.memory_bytes = 0
+
+    def _load(self, number: int) -> List[Dict[str, Any]]:
+        chunk = self._chunks[number]
+        if not isinstance(chunk, bytes):
+            offset, length = chunk
+            with self._lock:
+                self._file.seek(offset)
+                chunk = self._file.read(length)
+        return pickle.loads(chunk)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        number = 0
+        while number < len(self._chunks):
+            yield from self._load(number)
+            number += 1
+        yield from self._tail
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._length)
+            if step < 0:
+                return [self[i] for i in range(start, stop, step)]
+            return list(islice(self._iter_from(start), 0, max(0, stop - start), step))
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError(index)
+        return next(self._iter_from(index))
+
+    def _iter_from(self, index: int) -> Iterator[Dict[str, Any]]:
+        sealed = self._length - len(self._tail)
+        if index >= sealed:
+            yield from self._tail[index - sealed:]
+            return
+        number = bisect.bisect_right(self._starts, index) - 1
+        yield from self._load(number)[index - self._starts[number]:]
+        for number in range(number + 1, len(self._chunks)):
+            yield from self._load(number)
+        yield from self._tail
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -0,0 +1,135 @@
+import os
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+# Index value for a dotted name that more than one class answers to
+_AMBIGUOUS = -1
+
+
+class SymbolTable:
+    """Project-wide index of the classes of an analysis by qualified name.
+
+    A class's qualified name is its module path relative to the analysis
+    root followed by the class name: directories and file name for Python
+    (``pkg.models.User``), directories only for Java, where they follow
+    the package (``src.main.java.com.acme.User``).
+
+    Besides the exact qualified names, every dotted suffix of them is
+    indexed, so an import of ``com.acme.User`` finds the Java class above
+    and a bare ``User`` is found without scanning. A suffix shared by
+    several classes is marked ambiguous and never resolves.
+    """
+
+    def __init__(self, root_folder: Optional[str] = None):
+        self.root_folder = root_folder
+        self.qualnames: List[Optional[str]] = []  # class index -> qualified name
+        self.by_qualname: Dict[str, int] = {}
+        self.index: Dict[str, int] = {}
+        self._modules: Dict[str, Tuple[str, str]] = {}
+
+    @classmethod
+    def from_structure(cls, structure: Mapping[str, Any], root_folder: Optional[str] = None) -> 'SymbolTable':
+        """Index structure['classes']; the root defaults to _meta['root_folder']"""
+        classes = structure['classes']
+        if root_folder is None:
+            root_folder = structure.get('_meta', {}).get('root_folder')
+        if root_folder is None:
+            directories = {os.path.dirname(c['file']) for c in classes if c['file'] != 'external'}
+            root_folder = os.path.commonpath(directories) if directories else None
+
+        table = cls(root_folder)
+        for cls_record in classes:
+            table.add(cls_record['name'], cls_record['file'])
+        return table
+
+    def add(self, name: str, filepath: str) -> Optional[str]:
+        """Register the next class index; external placeholders get no qualified name"""
+        index = len(self.qualnames)
+        if filepath == 'external':
+            self.qualnames.append(None)
+            return None
+
+        module = self.module_of(filepath)[0]
+        qualname = f"{module}.{name}" if module else name
+        self.qualnames.append(qualname)
+        if qualname in self.by_qualname:
+            # A redefinition; the first definition keeps the name
+            return qualname
+        self.by_qualname[qualname] = index
+
+        parts = qualname.split('.')
+        for start in range(len(parts)):
+            suffix = '.'.join(parts[start:])
+            found = self.index.get(suffix)
+            if found is None:
+                self.index[suffix] = index
+            elif found != index:
+                self.index[suffix] = _AMBIGUOUS
+        return qualname
+
+    def module_of(self, filepath: str) -> Tuple[str, str]:
+        """(module, package) of a file as dotted names relative to the root
+
+        For Java files both are the package directory.
+        """
+        names = self._modules.get(filepath)
+        if names is None:
+            relative = os.path.relpath(filepath, self.root_folder) if self.root_folder else filepath
+            parts = [p for p in os.path.splitext(relative)[0].split(os.sep) if p not in ('', os.curdir, os.pardir)]
+            if filepath.endswith('.java'):
+                module = package = '.'.join(parts[:-1])
+            elif parts and parts[-1] == '__init__':
+                module = package = '.'.join(parts[:-1])
+            else:
+                module, package = '.'.join(parts), '.'.join(parts[:-1])
+            names = self._modules[filepath] = (module, package)
+        return names
+
+    def lookup(self, dotted: str) -> Optional[int]:
+        """Class index for a qualified name or an unambiguous dotted suffix of one"""
+        found = self.by_qualname.get(dotted)
+        if found is None:
+            found = self.index.get(dotted)
+        return None if found == _AMBIGUOUS else found
+
+    def resolve(self, name: str, filepath: str, ref: Optional[str] = None) -> Optional[int]:
+        """Class index that ``name``, as written in filepath, refers to
+
+        ``ref`` is the dotted name the file imported it as (leading dots for
+        Python relative imports). It is tried first, then a class of the
+        same module (for Java, the same package), then the bare name if it
+        is unique in the project.
+        """
+        module, package = self.module_of(filepath)
+        if ref:
+            found = self.lookup(_absolute(ref, package))
+            if found is not None:
+                return found
+        found = self.by_qualname.get(f"{module}.{name}" if module else name)
+        if found is not None:
+            return found
+        return self.lookup(name)
+
+    def resolve_relationship(self, rel: Mapping[str, Any]) -> Tuple[Optional[int], Optional[int]]:
+        """Class indexes of the source and target of a relationship"""
+        filepath = rel['file']
+        return (self.resolve(rel['source'], filepath, rel.get('source_ref')),
+                self.resolve(rel['target'], filepath, rel.get('target_ref')))
+
+
+def with_ref(rel: Dict[str, Any], key: str, ref: Optional[str]) -> Dict[str, Any]:
+    """Add the import reference of a relationship endpoint (source_ref/target_ref), when known"""
+    if ref is not None:
+        rel[key] = ref
+    return rel
+
+
+def _absolute(ref: str, package: str) -> str:
+    """Resolve a Python relative reference like ``..models.User`` against a package"""
+    level = len(ref) - len(ref.lstrip('.'))
+    if not level:
+        return ref
+    base = package.split('.') if package else []
+    if level > 1:
+        base = base[:max(len(base) - (level - 1), 0)]
+    rest = ref[level:]
+    return '.'.join(base + [rest] if rest else base)
@@ -1,26 +1,63 @@
+import math
 import os
 
+from utils.relationships import relationship_count
+from utils.symbols import SymbolTable
 
-def generate_visualization_data(class_structure):
+# Widest an edge gets on top of its base width, reached at 2**EDGE_MAX_EXTRA_WIDTH occurrences
+EDGE_MAX_EXTRA_WIDTH = 6
+# Class node keys sent in bulk graph payloads; NodeDetails serves the rest on demand
+SUMMARY_NODE_KEYS = ('id', 'label', 'type', 'language', 'color', 'x', 'y')
+
+
+def generate_visualization_data(class_structure, details=True):
     """
     Convert parsed class structure into visualization-ready format
     Handles:
     - Missing parent classes
-    - Duplicate class names
+    - Duplicate class names, resolved through utils.symbols.SymbolTable
     - Relationship validation
+
+    Runs in O(classes + relationships): every class index maps to the
+    integer position of its node and every relationship is resolved to
+    class indexes by the symbol table, so no node list is ever scanned.
+    class_structure is not modified; referenced parents that are not
+    classes of the analysis become external nodes of the result only.
+
+    A utils.compact.CompactStructure is exported directly from its columns.
+    With details=False class nodes get no tooltip or styling, only what
+    summary_payload() keeps plus their file, which utils.aggregation folds by.
     """
+    if hasattr(class_structure, 'to_visualization_data'):
+        return class_structure.to_visualization_data(details)
+
+    classes = class_structure['classes']
+    relationships = class_structure.get('relationships', [])
+    symbols = SymbolTable.from_structure(class_structure)
     nodes = []
-    edges = []
-    created_nodes = set()
+    node_positions = {}  # node id -> position in nodes
+    class_nodes = []  # class index -> position of its node
+    detected_classes = set()
+
+    def add_node(node_id, cls):
+        position = node_positions.get(node_id)
+        if position is None:
+            position = node_positions[node_id] = len(nodes)
+            nodes.append(class_node(node_id, cls, details))
+        return position
 
-    # 1. First collect all class names we've found
-    detected_classes = {cls['name'] for cls in class_structure['classes']}
+    # 1. One node per class, with a file-based ID
+    for cls in classes:
+        class_nodes.append(add_node(class_node_id(cls, symbols.root_folder), cls))
+        detected_classes.add(cls['name'])
 
-    # 2. Add missing parent classes from relationships
-    for rel in class_structure.get('relationships', []):
-        if rel['source'] not in detected_classes:
-            class_structure['classes'].append({
-                'name': rel['source'],
+    # 2. Parents that were referenced but never defined become external nodes
+    external_nodes = {}
+    for rel in relationships:
+        name = rel['source']
+        if name not in detected_classes and name not in external_nodes:
+            external_nodes[name] = add_node(f"{name}::external", {
+                'name': name,
                 'type': 'class',
                 'language': 'unknown',
                 'file': 'external',
@@ -28,42 +65,15 @@ def generate_visualization_data(class_structure):
                 'bases': []
             })
 
-    # 3. Create unique nodes with file-based IDs
-    for cls in class_structure['classes']:
-        # Create unique ID using filename and classname
-        node_id = f"{cls['name']}::{os.path.basename(cls['file'])}"
-
-        if node_id not in created_nodes:
-            nodes.append({
-                'id': node_id,
-                'label': cls['name'],
-                'title': generate_tooltip(cls),
-                'color': get_node_color(cls),
-                'shape': 'box',
-                'borderWidth': 2,
-                'font': {'size': 14},
-                'file': cls['file'],
-                'type': cls.get('type', 'class'),
-                'language': cls.get('language', 'unknown')
-            })
-            created_nodes.add(node_id)
-
-    # 4. Create edges with validated references
-    for rel in class_structure.get('relationships', []):
-        # Find source node (could be in multiple files)
-        source_nodes = [n for n in nodes if n['label'] == rel['source']]
-        target_nodes = [n for n in nodes if n['label'] == rel['target']]
-
-        if source_nodes and target_nodes:
-            # Connect first matching pair
-            edges.append({
-                'from': source_nodes[0]['id'],
-                'to': target_nodes[0]['id'],
-                'label': rel.get('type', 'relation'),
-                'arrows': 'to',
-                'color': get_edge_color(rel.get('type')),
-                'smooth': {'type': 'curvedCW', 'roundness': 0.2}
-            })
+    # 3. Create edges between the classes the symbol table resolves, one per (from, to, type)
+    edge_builder = EdgeBuilder()
+    for rel in relationships:
+        source, target = symbols.resolve_relationship(rel)
+        source_node = class_nodes[source] if source is not None else external_nodes.get(rel['source'])
+        if source_node is not None and target is not None:
+            edge_builder.add(nodes[source_node]['id'], nodes[class_nodes[target]]['id'], rel.get('type'),
+                             relationship_count(rel))
+    edges = edge_builder.links()
 
     return {
         'nodes': nodes,
@@ -76,28 +86,181 @@ def generate_visualization_data(class_structure):
     }
 
 
+def class_node(node_id, cls, details=True):
+    """vis.js node of a class record; without details only its id, label, color, file, type and language"""
+    if not details:
+        return {
+            'id': node_id,
+            'label': cls['name'],
+            'color': get_node_color(cls),
+            'file': cls['file'],
+            'type': cls.get('type', 'class'),
+            'language': cls.get('language', 'unknown')
+        }
+    return {
+        'id': node_id,
+        'label': cls['name'],
+        'title': generate_tooltip(cls),
+        'color': get_node_color(cls),
+        'shape': 'box',
+        'borderWidth': 2,
+        'font': {'size': 14},
+        'file': cls['file'],
+        'type': cls.get('type', 'class'),
+        'language': cls.get('language', 'unknown')
+    }
+
+
+def summary_payload(viz_data):
+    """viz_data with every class node cut down to SUMMARY_NODE_KEYS
+
+    Group nodes of utils.aggregation (the ones with 'lod') are kept whole.
+    """
+    viz_data['nodes'] = [node if 'lod' in node else {key: node[key] for key in SUMMARY_NODE_KEYS if key in node}
+                         for node in viz_data['nodes']]
+    return viz_data
+
+
+class NodeDetails:
+    """Per-class details of one analysis, looked up by node id
+
+    The id index is built on the first lookup, with the ids and the
+    external nodes generate_visualization_data() creates, and every answer
+    is kept, so repeated hovers over a node cost one dict lookup.
+    """
+
+    def __init__(self, class_structure):
+        self.structure = class_structure
+        self._index = None
+        self._cache = {}
+
+    def _build_index(self):
+        classes = self.structure['classes']
+        root_folder = SymbolTable.from_structure(self.structure).root_folder
+        index = {}
+        names = set()
+        for position, cls in enumerate(classes):
+            index.setdefault(class_node_id(cls, root_folder), position)
+            names.add(cls['name'])
+        for rel in self.structure.get('relationships', []):
+            if rel['source'] not in names:
+                index.setdefault(f"{rel['source']}::external", None)
+        return index
+
+    def get(self, node_id):
+        """Name, type, language, file, methods, attributes, bases, docstring and HTML tooltip of a node, or None"""
+        if node_id in self._cache:
+            return self._cache[node_id]
+        if self._index is None:
+            self._index = self._build_index()
+        if node_id not in self._index:
+            return None
+        position = self._index[node_id]
+        if position is None:
+            cls = {'name': node_id.rpartition('::')[0], 'type': 'class', 'language': 'unknown', 'file': 'external'}
+        else:
+            cls = self.structure['classes'][position]
+        details = {
+            'id': node_id,
+            'name': cls['name'],
+            'type': cls.get('type', 'class'),
+            'language': cls.get('language', 'unknown'),
+            'file': cls['file'],
+            'methods': list(cls.get('methods', [])),
+            'attributes': list(cls.get('attributes', [])),
+            'bases': list(cls.get('bases', [])),
+            'docstring': cls.get('docstring', ''),
+            'title': generate_tooltip(cls)
+        }
+        self._cache[node_id] = details
+        return details
+
+
+def class_node_id(cls, root_folder=None):
+    """Node id of a class: its name plus its file, relative to root_folder when given
+
+    Without a root only the base name of the file is used.
+    """
+    return f"{cls['name']}::{node_file_label(cls['file'], root_folder)}"
+
+
+def node_file_label(filepath, root_folder=None):
+    """File part of a node id"""
+    if root_folder and filepath != 'external':
+        return os.path.relpath(filepath, root_folder)
+    return os.path.basename(filepath)
+
+
 def generate_tooltip(cls):
     """Generate HTML tooltip content"""
+    return format_tooltip(cls['name'], cls.get('type', 'class'), cls.get('language', 'unknown'),
+                          cls['file'], cls.get('methods', []), cls.get('bases', []))
+
+
+def format_tooltip(name, cls_type, language, filepath, methods, bases):
+    """HTML tooltip from individual class fields"""
     return (
-        f"<b>{cls['name']}</b><br>"
-        f"<i>Type:</i> {cls.get('type', 'class')}<br>"
-        f"<i>Language:</i> {cls.get('language', 'unknown')}<br>"
-        f"<i>File:</i> {cls['file']}<br>"
-        f"<i>Methods:</i> {', '.join(cls.get('methods', [])) or 'None'}<br>"
-        f"<i>Inherits:</i> {', '.join(cls.get('bases', [])) or 'None'}"
+        f"<b>{name}</b><br>"
+        f"<i>Type:</i> {cls_type}<br>"
+        f"<i>Language:</i> {language}<br>"
+        f"<i>File:</i> {filepath}<br>"
+        f"<i>Methods:</i> {', '.join(methods) or 'None'}<br>"
+        f"<i>Inherits:</i> {', '.join(bases) or 'None'}"
     )
 
 
 def get_node_color(cls):
     """Determine node color based on language and type"""
-    if cls.get('type') == 'interface':
+    return node_color(cls.get('type'), cls.get('language'))
+
+
+def node_color(cls_type, language):
+    """Node color from a class type and language"""
+    if cls_type == 'interface':
         return {'background': '#FFF9C4', 'border': '#FFEE58'}
-    elif cls.get('language') == 'python':
+    elif language == 'python':
         return {'background': '#E3F2FD', 'border': '#64B5F6'}
     else:  # Java or unknown
         return {'background': '#E8F5E9', 'border': '#81C784'}
 
 
+class EdgeBuilder:
+    """Collects graph edges, merging repeats of the same (from, to, type) into one weighted edge"""
+
+    def __init__(self):
+        self.edges = {}
+
+    def add(self, source_node, target_node, rel_type, count=1):
+        key = (source_node, target_node, rel_type)
+        edge = self.edges.get(key)
+        if edge is None:
+            self.edges[key] = {
+                'from': source_node,
+                'to': target_node,
+                'label': rel_type or 'relation',
+                'arrows': 'to',
+                'color': get_edge_color(rel_type),
+                'smooth': {'type': 'curvedCW', 'roundness': 0.2},
+                'count': count
+            }
+        else:
+            edge['count'] += count
+
+    def links(self):
+        """The edges, in first-seen order, with their width scaled by count"""
+        links = list(self.edges.values())
+        for edge in links:
+            edge['width'] = edge_width(edge['count'])
+            if edge['count'] > 1:
+                edge['title'] = f"{edge['label']} \u00d7{edge['count']}"
+        return links
+
+
+def edge_width(count, base=1):
+    """Line width of an edge found count times: base, growing logarithmically"""
+    return base + min(math.log2(max(count, 1)), EDGE_MAX_EXTRA_WIDTH)
+
+
 def get_edge_color(rel_type):
     """Determine edge color based on relationship type"""
     return {
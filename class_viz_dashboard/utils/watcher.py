@@ -0,0 +1,389 @@
+import bisect
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from collections.abc import Mapping, Sequence
+from itertools import accumulate, chain
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from utils.core_parser import iter_codebase, iter_files
+from utils.discovery import FileDiscovery
+
+# inotify(7) event masks
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_ISDIR = 0x40000000
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = 0o4000
+_WATCH_MASK = (IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+               | IN_CREATE | IN_DELETE | IN_DELETE_SELF)
+_EVENT_HEADER = struct.Struct('iIII')
+# Files whose changes make the watcher reload the discovery rules
+_RULES_FILE = '.gitignore'
+
+
+class CodebaseWatcher:
+    """Keeps the analysis of a folder current while its files change.
+
+    The folder is analyzed once; after that a background thread receives
+    file change notifications (inotify on Linux, periodic mtime/size
+    polling elsewhere or when inotify is unavailable), waits until no
+    change arrived for ``debounce`` seconds and re-parses only the files
+    touched in that burst. Files are parsed without per-file profiling.
+    A file that stops being included, because it grew past the size limit
+    or a .gitignore now matches it, is dropped like a deleted one, and an
+    edited .gitignore reloads the rules.
+
+    ``structure`` always refers to a complete WatchedStructure. Updates
+    build a new one that is swapped in afterwards, so readers never see a
+    half-applied change; ``version`` increases with every swap.
+    """
+
+    def __init__(self, root_folder: str, debounce: float = 0.5, poll_interval: float = 2.0,
+                 workers: int = 1, cache: Optional[Any] = None, use_inotify: bool = True):
+        self.root_folder = root_folder
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.workers = workers
+        self.cache = cache
+        self.use_inotify = use_inotify and sys.platform.startswith('linux')
+        self.discovery = FileDiscovery(root_folder)
+        self.structure = WatchedStructure({}, {'files_processed': 0, 'languages': set()})
+        self.version = 0
+        self.backend = None
+        self._last_scan: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._source = None
+
+    def start(self, parsed: Optional[Iterable[Tuple[Optional[str], Dict[str, Any]]]] = None,
+              discovery: Optional[FileDiscovery] = None) -> 'CodebaseWatcher':
+        """Run the initial analysis and start watching
+
+        ``parsed`` takes the place of the initial analysis: the (filepath,
+        partial) pairs of a complete iter_codebase() run over the folder
+        with ``discovery``, for callers that just analyzed it themselves.
+        """
+        partials: Dict[Optional[str], Dict[str, Any]] = {}
+        discovery = discovery or FileDiscovery(self.root_folder)
+        meta = {'files_processed': 0, 'languages': set(), 'discovery': discovery.stats,
+                'root_folder': self.root_folder}
+        if parsed is None:
+            parsed = iter_codebase(self.root_folder, workers=self.workers, cache=self.cache,
+                                   discovery=discovery, profile=False)
+        for filepath, partial in parsed:
+            _add_partial(partials, meta, filepath, partial)
+        self._publish(WatchedStructure(partials, meta))
+        self._last_scan = self._scan()
+
+        source = _InotifySource(self.root_folder, self.discovery) if self.use_inotify else None
+        if source is not None and not source.open():
+            source = None
+        self._source = source
+        self.backend = 'inotify' if source else 'polling'
+        self._thread = threading.Thread(target=self._run, args=(source,), daemon=True,
+                                        name=f"watch:{self.root_folder}")
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self, source: Optional['_InotifySource']) -> None:
+        pending: Set[str] = set()
+        last_event = 0.0
+        try:
+            while not self._stop.is_set():
+                if source is not None:
+                    changed = source.read(timeout=self.debounce / 2)
+                    if changed is None:
+                        # The kernel queue overflowed and events were lost
+                        changed = self._poll()
+                else:
+                    self._stop.wait(self.poll_interval)
+                    changed = self._poll()
+
+                if changed:
+                    pending.update(changed)
+                    last_event = time.monotonic()
+                elif pending and time.monotonic() - last_event >= self.debounce:
+                    self.apply_changes(pending)
+                    pending = set()
+        finally:
+            if source is not None:
+                source.close()
+
+    def _poll(self) -> Set[str]:
+        """Paths whose mtime/size differ from the previous scan"""
+        current = self._scan()
+        changed = {path for path, key in current.items() if self._last_scan.get(path) != key}
+        changed.update(path for path in self._last_scan if path not in current)
+        self._last_scan = current
+        return changed
+
+    def _scan(self) -> Dict[str, tuple]:
+        """mtime/size of every file a fresh discovery finds, and of the .gitignore files on the way"""
+        scan = {}
+        for directory, files in FileDiscovery(self.root_folder).walk():
+            for filepath in files:
+                scan[filepath] = _stat_key(filepath)
+            rules_file = os.path.join(directory, _RULES_FILE)
+            key = _stat_key(rules_file)
+            if key:
+                scan[rules_file] = key
+        return scan
+
+    def apply_changes(self, paths: Iterable[str]) -> None:
+        """Re-parse the given paths and publish the updated structure
+
+        Only the partials of the affected files are replaced; the other
+        files' partials are shared with the previous structure.
+        """
+        with self._lock:
+            current = self.structure
+        partials = dict(current.partials)
+        paths = set(paths)
+        if any(os.path.basename(path) == _RULES_FILE for path in paths):
+            # Files the new rules include or exclude are added or dropped below
+            self.discovery = FileDiscovery(self.root_folder)
+            if self._source is not None:
+                self._source.rewatch(self.discovery)
+            found = set(self.discovery)
+            known = {filepath for filepath in partials if filepath is not None}
+            paths |= (found - known) | (known - found)
+
+        changed = []
+        for filepath in sorted(paths):
+            if os.path.isfile(filepath) and self.discovery.is_included(filepath):
+                changed.append(filepath)
+            elif filepath in partials:
+                del partials[filepath]
+            elif not os.path.isfile(filepath):
+                # A removed or moved-away directory takes its files with it
+                prefix = filepath + os.sep
+                for known in [known for known in partials if known is not None and known.startswith(prefix)]:
+                    del partials[known]
+
+        meta = dict(current['_meta'], languages=set(current['_meta']['languages']))
+        for filepath, partial in iter_files(changed, workers=self.workers, cache=self.cache, profile=False):
+            partials.pop(filepath, None)
+            _add_partial(partials, meta, filepath, partial)
+        meta['files_processed'] = len(partials) - (None in partials)
+        self._publish(WatchedStructure(partials, meta))
+
+    def _publish(self, structure: 'WatchedStructure') -> None:
+        with self._lock:
+            self.version += 1
+            structure['_meta']['watch'] = {'version': self.version, 'updated_at': time.time()}
+            self.structure = structure
+
+
+class WatchedStructure(Mapping):
+    """Analysis result of a CodebaseWatcher, kept as one partial per file
+
+    ``partials`` maps each file (None for discovery errors) to the partial
+    parse_source_file() gave for it, in the order files were added.
+    ``structure['classes']``, ``['relationships']`` and ``['errors']`` are
+    read-only sequences over the records of every partial in that order,
+    so code written for the dict structure keeps working. A structure is
+    never modified once published; the next one shares the partials of
+    the files that did not change.
+    """
+
+    def __init__(self, partials: Dict[Optional[str], Dict[str, Any]], meta: Dict[str, Any]):
+        self.partials = partials
+        self.meta = meta
+        parts = list(partials.values())
+        self._records = {key: _ChainedRecords([partial[key] for partial in parts])
+                         for key in ('classes', 'relationships', 'errors')}
+
+    def __getitem__(self, key: str) -> Any:
+        if key == '_meta':
+            return self.meta
+        return self._records[key]
+
+    def __iter__(self):
+        return iter(('classes', 'relationships', 'errors', '_meta'))
+
+    def __len__(self) -> int:
+        return 4
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain dict structure, as returned by analyze_codebase()"""
+        return {
+            'classes': list(self['classes']),
+            'relationships': list(self['relationships']),
+            'errors': list(self['errors']),
+            '_meta': dict(self.meta),
+        }
+
+
+class _ChainedRecords(Sequence):
+    """The records of several lists as one sequence; indexing bisects the running lengths"""
+
+    def __init__(self, parts: List[List[Any]]):
+        self.parts = parts
+        self.ends = list(accumulate(len(part) for part in parts))
+
+    def __len__(self) -> int:
+        return self.ends[-1] if self.ends else 0
+
+    def __iter__(self):
+        return chain.from_iterable(self.parts)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        number = bisect.bisect_right(self.ends, index)
+        return self.parts[number][index - (self.ends[number - 1] if number else 0)]
+
+
+def _add_partial(partials: Dict[Optional[str], Dict[str, Any]], meta: Dict[str, Any], filepath: Optional[str],
+                 partial: Dict[str, Any]) -> None:
+    """Record the partial of filepath; discovery errors (no filepath) are collected under None"""
+    if filepath is None:
+        previous = partials.get(None)
+        if previous is not None:
+            partial = dict(partial, errors=previous['errors'] + partial['errors'])
+    else:
+        meta['files_processed'] += 1
+    partials[filepath] = partial
+    if partial.get('language'):
+        meta['languages'].add(partial['language'])
+
+
+class _InotifySource:
+    """Recursive inotify watch over a directory tree, via libc
+
+    Only directories that ``discovery`` enters are watched, so the
+    excludes and .gitignore rules of a full analysis apply here as well.
+    """
+
+    def __init__(self, root_folder: str, discovery: FileDiscovery):
+        self.root_folder = root_folder
+        self.discovery = discovery
+        self.fd = -1
+        self.directories: Dict[int, str] = {}
+        self._libc = None
+
+    def open(self) -> bool:
+        libc_name = ctypes.util.find_library('c')
+        if not libc_name:
+            return False
+        try:
+            self._libc = ctypes.CDLL(libc_name, use_errno=True)
+            self.fd = self._libc.inotify_init1(IN_NONBLOCK)
+        except (OSError, AttributeError):
+            return False
+        if self.fd < 0:
+            return False
+
+        for directory, _ in self.discovery.walk():
+            if not self._add_watch(directory):
+                # Most likely fs.inotify.max_user_watches; let the caller poll instead
+                self.close()
+                return False
+        return True
+
+    def _add_watch(self, directory: str) -> bool:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), _WATCH_MASK)
+        if wd < 0:
+            return False
+        self.directories[wd] = directory
+        return True
+
+    def rewatch(self, discovery: FileDiscovery) -> None:
+        """Switch to new discovery rules: watch the directories they enter and only those"""
+        self.discovery = discovery
+        wanted = [directory for directory, _ in discovery.walk()]
+        watched = set(self.directories.values())
+        for directory in wanted:
+            if directory not in watched:
+                self._add_watch(directory)
+        wanted = set(wanted)
+        for wd, path in list(self.directories.items()):
+            if path not in wanted:
+                del self.directories[wd]
+                self._libc.inotify_rm_watch(self.fd, wd)
+
+    def _remove_watches(self, directory: str) -> None:
+        """Stop watching directory and everything below it; a moved directory keeps its watches otherwise"""
+        prefix = directory + os.sep
+        for wd, path in list(self.directories.items()):
+            if path == directory or path.startswith(prefix):
+                del self.directories[wd]
+                self._libc.inotify_rm_watch(self.fd, wd)
+
+    def read(self, timeout: float) -> Optional[Set[str]]:
+        """Paths touched by the events that arrive within timeout, None after an overflow"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+
+        changed = set()
+        overflow = False
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+
+            directory = self.directories.get(wd)
+            if mask & IN_Q_OVERFLOW:
+                overflow = True
+                continue
+            if directory is None or not name:
+                continue
+
+            path = os.path.join(directory, name)
+            if mask & IN_ISDIR:
+                if mask & (IN_MOVED_FROM | IN_DELETE):
+                    # apply_changes() drops every file under a directory that is gone
+                    self._remove_watches(path)
+                    changed.add(path)
+                    continue
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    # A new or moved-in directory: watch it and pick up its files, unless discovery prunes it
+                    for directory, files in self.discovery.walk(path):
+                        self._add_watch(directory)
+                        changed.update(files)
+                continue
+            # Excluded files are passed on too: one that stopped being included must be dropped
+            if name == _RULES_FILE or path.endswith(self.discovery.extensions):
+                changed.add(path)
+        return None if overflow else changed
+
+    def close(self) -> None:
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+def _stat_key(filepath: str) -> tuple:
+    try:
+        stat = os.stat(filepath)
+    except OSError:
+        return ()
+    return stat.st_mtime_ns, stat.st_size